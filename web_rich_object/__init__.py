@@ -1,6 +1,7 @@
 """Web rich object handler"""
 try:
     from .api import WebRichObject
+    from .preload import warmup
 except ImportError:
     pass
 
@@ -0,0 +1,170 @@
+"""
+Per-domain learning of the sources resolving each field
+
+Domains tend to follow the same metadata conventions on all their pages.
+With ``WRO_ADAPTIVE`` set, or with ``learner`` given to ``WebRichObject``,
+the rule groups tried and the one which resolved each field are counted
+by domain. Once a domain has ``min_samples`` pages:
+
+- groups tried on ``min_samples`` pages without ever resolving are moved
+  after the others, and skipped if they are ``func`` extractors
+- if fields were always resolved from sources found before ``</head>``,
+  only the head of pages is downloaded and parsed. ``func`` extractors
+  always count as reading the body.
+
+One page out of ``explore_every`` uses the full rules, so that stats keep
+up with domains changing their markup. Stats are kept in ``cache``, a
+``SqliteCache`` at ``WRO_ADAPTIVE_PATH`` to persist across restarts. The
+last writer wins when a cache is shared between processes.
+"""
+import atexit
+import os
+import threading
+
+from web_rich_object.cache import MemoryCache, SqliteCache
+
+ADAPTIVE = os.environ.get('WRO_ADAPTIVE', '') not in ('', '0')
+ADAPTIVE_PATH = os.environ.get('WRO_ADAPTIVE_PATH')
+ADAPTIVE_MIN_SAMPLES = int(os.environ.get('WRO_ADAPTIVE_MIN_SAMPLES', 20))
+ADAPTIVE_EXPLORE_EVERY = int(os.environ.get('WRO_ADAPTIVE_EXPLORE_EVERY', 50))
+ADAPTIVE_FLUSH_EVERY = int(os.environ.get('WRO_ADAPTIVE_FLUSH_EVERY', 100))
+ADAPTIVE_MAX_SITES = int(os.environ.get('WRO_ADAPTIVE_MAX_SITES', 10000))
+# Extractors reading the document body
+BODY_KIND = 'func:'
+
+
+def needs_body(group_key):
+    return BODY_KIND in group_key
+
+
+def _body_hits(counts):
+    # Stats predating body hits, all hits may need the body
+    return counts[2] if len(counts) > 2 else counts[1]
+
+
+class PageSources(object):
+    """Adaptive order of sources for a single page of a domain."""
+    def __init__(self, learner, site, stats, explore):
+        self.learner = learner
+        self.site = site
+        self.stats = stats
+        self.explore = explore
+        self.head_only = not explore and not any(
+            _body_hits(counts) for field_stats in stats['fields'].values()
+            for counts in field_stats.values())
+
+    def order(self, field, group_keys):
+        """Indexes of groups to try, ``None`` for the priority order."""
+        if self.explore:
+            return None
+        min_samples = self.learner.min_samples
+        field_stats = self.stats['fields'].get(field, {})
+        kept, demoted = [], []
+        for index, key in enumerate(group_keys):
+            tried, hits = field_stats.get(key, (0, 0))[:2]
+            if tried < min_samples or hits:
+                kept.append(index)
+            elif not needs_body(key):
+                demoted.append(index)
+        return kept + demoted
+
+    def record(self, field, group_keys, order, winner, in_body=False):
+        """
+        Count groups tried in ``order`` until ``winner``, ``None`` if none
+        resolved, ``in_body`` if the winner was found after the head.
+        """
+        if order is None:
+            order = range(len(group_keys))
+        self.learner.record(self.site, field, [group_keys[i] for i in order],
+                            None if winner is None else group_keys[winner],
+                            in_body=in_body)
+
+
+class SourceLearner(object):
+    def __init__(self, cache=None, path=None, min_samples=ADAPTIVE_MIN_SAMPLES,
+                 explore_every=ADAPTIVE_EXPLORE_EVERY,
+                 flush_every=ADAPTIVE_FLUSH_EVERY, max_sites=ADAPTIVE_MAX_SITES):
+        self.path = path
+        self.min_samples = min_samples
+        self.explore_every = explore_every
+        self.flush_every = flush_every
+        self.max_sites = max_sites
+        self._cache = cache
+        # site: {'pages': count,
+        #        'fields': {field: {group key: [tried, hits, body hits]}}}
+        self._sites = {}
+        self._dirty = set()
+        self._updates = 0
+        self._lock = threading.RLock()
+
+    @property
+    def cache(self):
+        # Opened on first use, not at import
+        if self._cache is None:
+            self._cache = SqliteCache(self.path) if self.path else MemoryCache()
+        return self._cache
+
+    def _get_stats(self, site):
+        stats = self._sites.get(site)
+        if stats is None:
+            if len(self._sites) >= self.max_sites:
+                self.flush()
+                self._sites.clear()
+            stats = self.cache.get(site) or {'pages': 0, 'fields': {}}
+            self._sites[site] = stats
+        return stats
+
+    def start(self, site):
+        """Count a new page of ``site`` and get its sources."""
+        with self._lock:
+            stats = self._get_stats(site)
+            stats['pages'] += 1
+            self._dirty.add(site)
+            explore = (stats['pages'] <= self.min_samples or
+                       stats['pages'] % self.explore_every == 0)
+            return PageSources(self, site, stats, explore)
+
+    def record(self, site, field, tried, winner, in_body=False):
+        with self._lock:
+            stats = self._get_stats(site)
+            field_stats = stats['fields'].setdefault(field, {})
+            for key in tried:
+                counts = field_stats.setdefault(key, [0, 0, 0])
+                if len(counts) < 3:
+                    counts.append(_body_hits(counts))
+                counts[0] += 1
+                if key == winner:
+                    counts[1] += 1
+                    if in_body or needs_body(key):
+                        counts[2] += 1
+                    break
+            self._dirty.add(site)
+            self._updates += 1
+            if self._updates >= self.flush_every:
+                self.flush()
+
+    def get_stats(self, site):
+        with self._lock:
+            return self._get_stats(site)
+
+    def flush(self):
+        """Write stats of updated domains to the cache."""
+        with self._lock:
+            if self._dirty:
+                self.cache.set_many(dict(
+                    (site, self._sites[site]) for site in self._dirty
+                    if site in self._sites))
+            self._dirty.clear()
+            self._updates = 0
+
+    def clear(self):
+        with self._lock:
+            self._sites.clear()
+            self._dirty.clear()
+            self._updates = 0
+            self.cache.clear()
+
+
+DEFAULT_LEARNER = SourceLearner(path=ADAPTIVE_PATH)
+if ADAPTIVE:
+    atexit.register(DEFAULT_LEARNER.flush)
@@ -1,94 +1,351 @@
 import os
 import json
-from io import BytesIO
 try:
-    from urllib.request import urlopen, Request
+    from urllib.request import Request
+    from urllib.error import HTTPError
     from urllib.parse import urlparse, urljoin
     from urllib import unquote
+    from http.client import HTTPException
 except ImportError:
-    from urllib2 import urlopen, Request, unquote
+    from urllib2 import Request, HTTPError, unquote
     from urlparse import urlparse, urljoin
+    from httplib import HTTPException
 
-import bs4
-import chardet
-from pdfminer.pdfparser import PDFParser
-from pdfminer.pdfdocument import PDFDocument
-
-from web_rich_object import utils
+from web_rich_object import (
+    utils, urls, redirects, images, parsing, rules, sites, oembed, fingerprint,
+    timestamps, buffers, profiling, failures, compression, adaptive,
+)
+from web_rich_object.lazy import cached_field
+from web_rich_object.redirects import urlopen
 
+NETWORK_ERRORS = (IOError, OSError, HTTPException)
 DEFAULT_USER_AGENT = os.environ.get('WRO_USER_AGENT', 'Web Rich Object Client')
 DOWNLOAD_MAX_SIZE = int(os.environ.get('WRO_DOWNLOAD_MAX_SIZE', 10*10**6))
+# PDFs larger than the spill threshold don't stay in memory
+PDF_DOWNLOAD_MAX_SIZE = int(os.environ.get('WRO_PDF_DOWNLOAD_MAX_SIZE', 50*10**6))
+READ_CHUNK_SIZE = int(os.environ.get('WRO_READ_CHUNK_SIZE', 64*1024))
+# Info of pages given as HTML or entirely described by a site extractor
+SITE_RESPONSE_INFO = {
+    'headers': [],
+    'maintype': 'text',
+    'subtype': 'html',
+    'type': 'text/html',
+}
 
 
 class WebRichObject(object):
-    def __init__(self, url=None, html=None, headers=None, user_agent=None):
+    FIELDS = (
+        'title',
+        'type',
+        'subtype',
+        'image',
+        'url',
+        'site_name',
+        'description',
+        'author',
+        'generator',
+        'determiner',
+        'locale',
+        'locale_alternative',
+        'audio',
+        'video',
+        'video_width',
+        'video_height',
+        'video_duration',
+        'images',
+        'tags',
+        'section',
+        'created_time',
+        'published_time',
+        'modified_time',
+        'expiration_time',
+    )
+
+    def __init__(self, url=None, html=None, headers=None, user_agent=None,
+                 url_index=None, max_redirects=None, redirect_cache=None,
+                 parse_mode=None, plan=None, site_registry=None,
+                 oembed_providers=None, previous_fingerprint=None,
+                 timestamp_parser=None, buffer_pool=None, profiler=None,
+                 failure_guard=None, learner=None, image_prober=None):
         if url is None and html is None:
             raise ValueError("You must specify a URL or HTML content")
         self.user_agent = user_agent or DEFAULT_USER_AGENT
+        self.url_index = url_index
+        self.parse_mode = parse_mode or parsing.PARSE_MODE
+        self.plan = plan or rules.DEFAULT_PLAN
+        if max_redirects is None:
+            max_redirects = redirects.MAX_REDIRECTS
+        if redirect_cache is None:
+            redirect_cache = redirects.DEFAULT_REDIRECT_CACHE
+        self.max_redirects = max_redirects
+        self.redirect_cache = redirect_cache
+        self.redirect_chain = []
+        self.final_url = url
+        self.fingerprint = None
+        self.unchanged = False
+        if site_registry is None:
+            site_registry = sites.DEFAULT_REGISTRY
+        if oembed_providers is None:
+            oembed_providers = oembed.DEFAULT_PROVIDERS
+        self.site_registry = site_registry
+        self.oembed_providers = oembed_providers
+        self.timestamp_parser = timestamp_parser or timestamps.DEFAULT_PARSER
+        if buffer_pool is None:
+            buffer_pool = buffers.DEFAULT_POOL
+        self.buffer_pool = buffer_pool
+        self._buffer = None
+        if failure_guard is None:
+            failure_guard = failures.DEFAULT_GUARD
+        self.failure_guard = failure_guard
+        # Probes image sizes for the biggest image fallback, one at a time if None
+        self.image_prober = image_prober
+        if profiler is None and profiling.PROFILE:
+            profiler = profiling.DEFAULT_PROFILER
+        self.profile = None
+        if profiler is not None:
+            site = urlparse(url).hostname if url is not None else None
+            self.profile = profiling.Profile(site=site, profiler=profiler)
+        if learner is None and adaptive.ADAPTIVE:
+            learner = adaptive.DEFAULT_LEARNER
+        self.sources = None
+        if learner is not None and url is not None:
+            self.sources = learner.start(urlparse(url).hostname)
+        # Only the head was downloaded
+        self.head_only = False
+        site_fields, complete = {}, False
         if url is not None:
-            response = self.urlopen(url, headers=headers)
-            self.info = vars(response.info())
-            self.request_headers = dict([
-                [i.strip() for i in h.split(':', 1)]
-                for h in self.info['headers']
-            ])
-            self.html = response.read(DOWNLOAD_MAX_SIZE)
+            with self._profile_branch('_download', 'site'):
+                site_fields, complete = self._get_site_fields(url)
+        for field, value in site_fields.items():
+            setattr(self, '_%s' % field, value)
+        if complete:
+            self.info = dict(SITE_RESPONSE_INFO)
+            self.request_headers = {}
+            self.body = b''
+        elif url is not None:
+            with self._profile_branch('_download', 'http'):
+                response = self.urlopen(url, headers=headers)
+                self.info = vars(response.info())
+                self.request_headers = dict([
+                    [i.strip() for i in h.split(':', 1)]
+                    for h in self.info['headers']
+                ])
+                try:
+                    self.body = self._read_body(response, previous_fingerprint)
+                except compression.DecodingError:
+                    # Broken response, the host itself works
+                    raise
+                except NETWORK_ERRORS as err:
+                    self.failure_guard.failure(url, err, host_url=self.final_url)
+                    raise
+            # Remember oEmbed endpoint announced for the host
+            if self.info.get('subtype') == 'html' and not self.unchanged:
+                oembed_url = oembed.discover(
+                    buffers.to_bytes(self.body[:oembed.DISCOVERY_MAX_SIZE]))
+                if oembed_url:
+                    self.oembed_providers.add_discovered(self.final_url, oembed_url)
         else:
-            self.info = {}
+            # Given content is HTML
+            self.info = dict(SITE_RESPONSE_INFO)
             self.request_headers = {}
-            self.html = html
+            self.body = html
         self.base_url = url
 
+    def _profile_branch(self, field, branch):
+        if self.profile is None:
+            return profiling.NULL_BRANCH
+        return self.profile.branch(field, branch)
+
+    def _get_site_fields(self, url):
+        """
+        Get fields from site extractors then from oEmbed providers, and
+        whether they are complete enough to skip the page download.
+        """
+        site_url = self.redirect_cache.get(url) or url
+        fields = self.site_registry.extract(site_url, user_agent=self.user_agent) or {}
+        complete = sites.is_complete(fields)
+        if not complete:
+            oembed_fields = self.oembed_providers.extract(site_url, user_agent=self.user_agent)
+            if oembed_fields:
+                fields = dict(oembed_fields, **fields)
+                # Endpoints serve the URL they are given
+                if sites.is_complete(dict(fields, url=fields.get('url') or site_url)):
+                    fields.setdefault('url', site_url)
+                    complete = True
+        return fields, complete
+
+    def _read_body(self, response, previous_fingerprint=None):
+        """
+        Read the response by chunks into a pooled buffer while computing the
+        fingerprint of its head, stop after the head if it matches
+        ``previous_fingerprint`` or if the domain never needs the body.
+        Compressed bodies are decoded on the fly, the size limit applying to
+        decoded bytes. Bodies above ``buffers.SPILL_THRESHOLD`` continue in a
+        temporary file. Returns a view of the buffer.
+        """
+        head_fingerprint = fingerprint.HeadFingerprint()
+        decoder = compression.get_decoder(
+            compression.get_content_encoding(self.request_headers))
+        self._buffer = buffer_ = self.buffer_pool.acquire()
+        max_size = DOWNLOAD_MAX_SIZE
+        if self.info.get('subtype') == 'pdf':
+            max_size = PDF_DOWNLOAD_MAX_SIZE
+        size = 0
+        done = False
+        while size < max_size and not done:
+            if decoder is None:
+                data = response.read(min(READ_CHUNK_SIZE, max_size - size))
+                chunks = [data] if data else []
+            else:
+                data = response.read(READ_CHUNK_SIZE)
+                chunks = compression.iter_decode(
+                    decoder, data, min(READ_CHUNK_SIZE, max_size - size))
+            # Short read means end of body
+            done = len(data) < READ_CHUNK_SIZE
+            for chunk in chunks:
+                chunk = chunk[:max_size - size]
+                buffer_.write(chunk)
+                size += len(chunk)
+                if size > buffers.SPILL_THRESHOLD and isinstance(buffer_, buffers.Buffer):
+                    self._buffer = buffers.spill(buffer_)
+                    self.buffer_pool.release(buffer_)
+                    buffer_ = self._buffer
+                if not head_fingerprint.done:
+                    head_fingerprint.update(chunk)
+                    if head_fingerprint.done:
+                        self.fingerprint = head_fingerprint.hexdigest()
+                        if self.fingerprint == previous_fingerprint:
+                            self.unchanged = True
+                        elif self.sources is not None and self.sources.head_only:
+                            self.head_only = True
+                        if self.unchanged or self.head_only:
+                            response.close()
+                            done = True
+                            break
+                if size >= max_size:
+                    break
+        if self.fingerprint is None:
+            self.fingerprint = head_fingerprint.hexdigest()
+        return buffer_.view()
+
+    @property
+    def html(self):
+        """Body as bytes, copied from the buffer on each access."""
+        return buffers.to_bytes(self.body)
+
+    def release(self):
+        """
+        Give the body buffer back to the pool. Fields not computed yet can't
+        use the body afterwards.
+        """
+        self.body = b''
+        if self._buffer is not None:
+            self.buffer_pool.release(self._buffer)
+            self._buffer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def to_dict(self):
+        return dict((field, getattr(self, field)) for field in self.FIELDS)
+
     # TODO: Make staticmethod
     def urlopen(self, url, headers):
         headers = headers or {}
         if not headers.get('User-Agent'):
             headers['User-Agent'] = self.user_agent
-        req = Request(url.encode('utf-8'), headers=headers)
-        return urlopen(req)
-
-    @property
+        if not headers.get('Accept-Encoding') and compression.ACCEPT_ENCODING:
+            headers['Accept-Encoding'] = compression.ACCEPT_ENCODING
+        # Skip known redirections
+        target_url = self.redirect_cache.get(url) or url
+        self.redirect_chain = []
+        self.failure_guard.check(url)
+        while True:
+            if target_url != url:
+                self.failure_guard.check(target_url)
+            req = Request(target_url.encode('utf-8'), headers=headers)
+            try:
+                response = urlopen(req)
+                break
+            except HTTPError as err:
+                if err.code not in redirects.REDIRECT_CODES:
+                    self.failure_guard.failure(url, err, host_url=target_url)
+                    raise
+                location = err.info().get('Location') or err.info().get('URI')
+                err.close()
+                if not location:
+                    raise
+                if len(self.redirect_chain) >= self.max_redirects:
+                    raise redirects.TooManyRedirects(
+                        "More than %d redirections from %s" % (self.max_redirects, url))
+                self.redirect_chain.append(target_url)
+                target_url = urljoin(target_url, location)
+            except NETWORK_ERRORS as err:
+                self.failure_guard.failure(url, err, host_url=target_url)
+                raise
+        self.failure_guard.success(target_url)
+        if self.redirect_chain:
+            self.redirect_cache.set(url, target_url)
+        self.final_url = target_url
+        return response
+
+    @cached_field
     def soup(self):
-        if not hasattr(self, '_soup'):
-            self._soup = bs4.BeautifulSoup(self.html, 'html.parser')
-        return self._soup
+        with self._profile_branch('_document', 'parse'):
+            return parsing.parse_html(self.html, self.parse_mode)
 
     def _format_url(self, url):
         parsed_url = urlparse(url)
-        parsed_base_url = urlparse(self.base_url)
+        parsed_base_url = urlparse(self.final_url)
         if parsed_url.path.startswith('/'):
-            base_url = '%(scheme)s://%(hostname)s' % {
+            base_url = '%(scheme)s://%(netloc)s' % {
                 'scheme': parsed_base_url.scheme,
-                'hostname': parsed_base_url.hostname
+                'netloc': parsed_base_url.netloc
             }
         else:
-            base_url = self.base_url
+            base_url = self.final_url
         return urljoin(base_url, url)
 
-    @property
+    @cached_field
     def pdf_info(self):
-        if not hasattr(self, '_pdf_info'):
+        # Heavy, imported on first PDF
+        from pdfminer.pdfparser import PDFParser
+        from pdfminer.pdfdocument import PDFDocument
+        with self._profile_branch('_document', 'pdf'):
             try:
-                fp = BytesIO(self.html)
+                fp = buffers.BufferReader(self.body)
                 parser = PDFParser(fp)
                 doc = PDFDocument(parser)
-                self._pdf_info = doc.info
+                return doc.info
             except:
-                self._pdf_info = None
-        return self._pdf_info
-
-    @property
+                return None
+
+    @cached_field
+    def meta_index(self):
+        soup = self.soup
+        with self._profile_branch('_document', 'index'):
+            profiling.count_tree_scan()
+            # Only the start of the body is copied, a head ending later is
+            # not found and its values are taken as found in the body
+            head_end = parsing.get_head_end(
+                buffers.to_bytes(self.body[:parsing.HEAD_END_SEARCH_SIZE]),
+                soup.original_encoding)
+            return rules.MetaIndex(soup, self.plan, head_end=head_end)
+
+    @cached_field
     def contextly_info(self):
-        if not hasattr(self, '_contextly_info'):
-            self._contextly_info = {}
-            contextly_tag = self.soup.find('meta', attrs={'name': 'contextly-page'})
-            if contextly_tag is not None and contextly_tag.attrs.get('content'):
-                self._contextly_info = json.loads(contextly_tag.attrs['content'])
-                if self._contextly_info.get('pub_date'):
-                    self._contextly_info['pub_date'] = utils.parse_contextly_time(self._contextly_info['pub_date'])
-                if self._contextly_info.get('mod_date'):
-                    self._contextly_info['mod_date'] = utils.parse_contextly_time(self._contextly_info['mod_date'])
-        return self._contextly_info
+        value = {}
+        contextly_data = self.meta_index.first('name', 'contextly-page')
+        if contextly_data:
+            value = json.loads(contextly_data)
+            if value.get('pub_date'):
+                value['pub_date'] = self._parse_time(value['pub_date'])
+            if value.get('mod_date'):
+                value['mod_date'] = self._parse_time(value['mod_date'])
+        return value
 
     def _valid_string(self, value):
         if not value:
@@ -97,574 +354,464 @@ class WebRichObject(object):
             return None
         return value.strip()
 
+    def _valid_value(self, value):
+        if isinstance(value, utils.string_types):
+            return self._valid_string(value)
+        if isinstance(value, (list, tuple)) and not value:
+            return None
+        return value
+
+    def _get_source(self, kind, key):
+        if kind == 'contextly':
+            values = [self.contextly_info.get(key)]
+        elif kind == 'header':
+            values = [self.request_headers.get(key)]
+        elif kind == 'func':
+            values = [getattr(self, '_extract_%s' % key)()]
+        else:
+            values = self.meta_index.get(kind, key)
+        values = [self._valid_value(v) for v in values]
+        return [v for v in values if v is not None]
+
+    def _get_field_source(self, field):
+        if self.profile is None:
+            return self._get_source
+        return self.profile.wrap_source(field, self._get_source)
+
+    def _group_candidates(self, field):
+        """
+        Candidates of ``field`` with their group index, in the order learnt
+        for the domain, and a callback recording the winning group and
+        whether it was found in the body.
+        """
+        get_source = self._get_field_source(field)
+        if self.sources is None:
+            return self.plan.group_candidates(field, get_source), lambda winner: None
+        group_keys = self.plan.group_keys.get(field, ())
+        order = self.sources.order(field, group_keys)
+
+        def record(winner):
+            in_body = winner is not None and self._group_in_body(field, winner)
+            self.sources.record(field, group_keys, order, winner, in_body=in_body)
+        return self.plan.group_candidates(field, get_source, order), record
+
+    def _group_in_body(self, field, index):
+        """Whether a source of a group of ``field`` had a value after the head."""
+        for source in self.plan.fields[field][index]:
+            kind, key = source.kind, source.key
+            if kind == 'header':
+                continue
+            if kind == 'func':
+                return True
+            if kind == 'contextly':
+                kind, key = 'name', 'contextly-page'
+            if self.meta_index.in_body(kind, key):
+                return True
+        return False
+
+    def _resolve(self, field, convert=None):
+        """Get the first valid value of a field from the extraction plan."""
+        candidates, record = self._group_candidates(field)
+        for index, value in candidates:
+            if convert is not None:
+                value = convert(value)
+            if value is not None:
+                record(index)
+                return value
+        record(None)
+        return None
+
+    def _resolve_all(self, field):
+        """Get the first non-empty group of values of a multi-valued field."""
+        candidates, record = self._group_candidates(field)
+        for index, values in candidates:
+            if values:
+                record(index)
+                return values
+        record(None)
+        return []
+
+    def _parse_time(self, value):
+        # PDF dates are bytes
+        if isinstance(value, bytes):
+            value = value.decode('latin-1')
+        if isinstance(value, utils.string_types):
+            # Formats are remembered by site
+            site = urlparse(self.final_url).hostname if self.final_url else None
+            return self.timestamp_parser.parse(value, site=site)
+        return value
+
+    # Extractors used by rules
+    def _extract_mediawiki_thumbnail(self):
+        if self.generator and 'MediaWiki' in self.generator:
+            profiling.count_tree_scan()
+            thumb_tag = self.soup.find('div', attrs={'class': 'thumbinner'})
+            if thumb_tag is not None:
+                img_tag = thumb_tag.find('img')
+                if img_tag is not None:
+                    return img_tag.attrs.get('src')
+        return None
+
+    def _extract_biggest_image(self):
+        profiling.count_tree_scan()
+        candidates = images.rank_images([
+            i.attrs for i in self.soup.find_all('img')
+        ])
+        # Trust sizes announced by HTML
+        if candidates and candidates[0].is_sized:
+            return self._format_url(candidates[0].url)
+        elif candidates:
+            image_urls = [self._format_url(c.url) for c in
+                          candidates[:images.IMAGE_PROBE_COUNT]]
+            if self.image_prober is not None:
+                return self.image_prober.get_biggest_image(
+                    image_urls, user_agent=self.user_agent)
+            return utils.get_biggest_image(image_urls, guard=self.failure_guard)
+        return None
+
+    def _extract_first_paragraph(self):
+        profiling.count_tree_scan()
+        for p_tag in self.soup.find_all('p'):
+            description_text = p_tag.getText()
+            if not description_text.strip() or len(description_text) < 20:
+                continue
+            description = description_text[:100]
+            if len(description) < description_text:
+                description += '...'
+            return description
+        return None
+
+    def _extract_html5_video(self):
+        profiling.count_tree_scan()
+        video_tag = self.soup.find('video')
+        if video_tag is not None:
+            source_tag = video_tag.find('source')
+            if source_tag is not None:
+                return source_tag.attrs.get('src')
+        return None
+
     # Mandatory fields
-    @property
+    @cached_field
     def title(self):
-        if not hasattr(self, '_title'):
-            self._title = None
-            # PDF
-            if self.subtype == 'pdf' and self.pdf_info:
-                raw_title = self.pdf_info[0].get('Title', None)
-                if raw_title:
-                    charset = chardet.detect(raw_title)['encoding']
-                    if charset not in ('ascii', 'utf8'):
-                        raw_title = raw_title[2:]
-                    self._title = raw_title.decode(charset, 'ignore')
-            # HTML
-            elif self.subtype == 'html' and self.soup.find():
-                # Try opengraph
-                title_tag = self.soup.find('meta', property='og:title')
-                if title_tag is not None:
-                    title = self._valid_string(title_tag.attrs.get('content'))
-                    if title:
-                        self._title = title_tag.attrs['content']
-                # Check with <title>
-                if self._title is None:
-                    title_tag = self.soup.find('title')
-                    if title_tag is not None:
-                        self._title = self._valid_string(title_tag.text)
-                # Get from contextly-data
-                if (self._title is None and self.contextly_info and
-                        self.contextly_info.get('title')):
-                    self._title = self._valid_string(self.contextly_info['title'])
-            # From file name
-            if not self._title and not self.subtype == 'html':
-                parsed_url = urlparse(self.base_url)
-                filename = parsed_url.path.split('/')[-1:]
-                if filename:
-                    self._title = unquote(filename[0])
-            # If no title, take the URL
-            if not self._title and self.site_name is not None:
-                self._title = self.site_name
-        return self._title
-
-    @property
+        value = None
+        # PDF
+        if self.subtype == 'pdf' and self.pdf_info:
+            raw_title = self.pdf_info[0].get('Title', None)
+            if raw_title:
+                import chardet
+                charset = chardet.detect(raw_title)['encoding']
+                if charset not in ('ascii', 'utf8'):
+                    raw_title = raw_title[2:]
+                value = raw_title.decode(charset, 'ignore')
+        # HTML
+        elif self.subtype == 'html' and self.soup.find():
+            value = self._resolve('title')
+        # From file name
+        if not value and not self.subtype == 'html':
+            parsed_url = urlparse(self.base_url)
+            filename = parsed_url.path.split('/')[-1:]
+            if filename:
+                value = unquote(filename[0])
+        # If no title, take the URL
+        if not value and self.site_name is not None:
+            value = self.site_name
+        return value
+
+    @cached_field
     def type(self):
-        if not hasattr(self, '_type'):
-            self._type = None
-            if self.info.get('maintype', 'text') not in ('text', 'text/html'):
-                self._type = self.info['maintype']
-            # Guess embed video link
-            elif 'facebook.com/' in self.url and '/videos/' in self.url:
-                self._type = 'video'
-            elif self.info.get('maintype') == 'text':
-                og_type_tag = self.soup.find('meta', property='og:type')
-                if og_type_tag is not None:
-                    type_ = og_type_tag.attrs['content']
-                    type_ = self._valid_string(type_)
-                    if type_ is not None:
-                        # Remove  prefix
-                        content = type_.split(':')[-1]
-                        self._type = content
-                # Default for text is website
-                if self._type is None:
-                    self._type = 'website'
-                # Get from contextly-data
-                if (self._type is None and self.contextly_info and
-                        self.contextly_info.get('type')):
-                    type_ = self._valid_string(self.contextly_info['type'])
-                    self._type = self.contextly_info['type']
-
-            else:
-                self._type = self.info.get('type')
-            if self._type:
-                self._type = self._type.lower()
-        return self._type
+        value = None
+        if self.info.get('maintype', 'text') not in ('text', 'text/html'):
+            value = self.info['maintype']
+        elif self.info.get('maintype') == 'text':
+            type_ = self._resolve('type')
+            if type_ is not None:
+                # Remove  prefix
+                value = type_.split(':')[-1]
+            # Default for text is website
+            if value is None:
+                value = 'website'
+        else:
+            value = self.info.get('type')
+        if value:
+            value = value.lower()
+        return value
 
-    @property
+    @cached_field
     def image(self):
-        if not hasattr(self, '_image'):
-            self._image = None
-            # If is image take its URL
-            if self.info.get('maintype') == 'image':
-                self._image = self.base_url
-            # HTML
-            elif self.subtype == 'html' and self.soup.find():
-                # MediaWiki
-                if self._image is None and self.generator and 'MediaWiki' in self.generator:
-                    thumb_tag = self.soup.find('div', attrs={'class': 'thumbinner'})
-                    if thumb_tag is not None:
-                        img_tag = thumb_tag.find('img')
-                        if img_tag is not None:
-                            self._image = img_tag.attrs['src']
-                # Get from opengraph
-                if self._image is None:
-                    image_tag = self.soup.find('meta', property='og:image')
-                    if image_tag is not None and image_tag.attrs.get('content'):
-                        image = self._valid_string(image_tag.attrs['content'])
-                        self._image = image
-                # Get from contextly-data
-                if (self._image is None and self.contextly_info and
-                        self.contextly_info.get('image')):
-                    image = self._valid_string(self.contextly_info['image'])
-                    self._image = image
-                # Get biggest image
-                if self._image is None:
-                    image_urls = [self._format_url(i.attrs['src'])
-                                  for i in self.soup.find_all('img')
-                                  if 'src' in i.attrs]
-                    self._image = utils.get_biggest_image(image_urls)
-                # Get from favicon
-                if self._image is None:
-                    favicon_tag = self.soup.find('link',
-                                                 property="shortcut icon")
-                    if favicon_tag is not None:
-                        self._image = favicon_tag.attrs['href']
-                # 2nd try for favicon
-                if self._image is None:
-                    favicon_tag = self.soup.find('link', rel="icon")
-                    if favicon_tag is not None:
-                        self._image = favicon_tag.attrs['href']
-            # Format URL
-            if self._image is not None and not self._image.startswith('http'):
-                self._image = self._format_url(self._image)
-
-        return self._image
-
-    @property
+        value = None
+        # If is image take its URL
+        if self.info.get('maintype') == 'image':
+            value = self.base_url
+        # HTML
+        elif self.subtype == 'html' and self.soup.find():
+            value = self._resolve('image')
+        # Format URL
+        if value is not None and not value.startswith('http'):
+            value = self._format_url(value)
+        return value
+
+    @cached_field
     def url(self):
-        if not hasattr(self, '_url'):
-            self._url = None
-            if self.subtype == 'html' and self.soup.find():
-                url_tag = self.soup.find('meta', property='og:url')
-                if url_tag is not None and url_tag.attrs.get('content'):
-                    self._url = self._valid_string(url_tag.attrs['content'])
-                # Get from contextly-data
-                if (self._url is None and self.contextly_info and
-                        self.contextly_info.get('url')):
-                    self._url = self._valid_string(self.contextly_info['url'])
-            if self._url is None:
-                self._url = self.base_url
-        return self._url
+        value = None
+        if self.subtype == 'html' and self.soup.find():
+            value = self._resolve('url')
+        if value is None:
+            value = self.base_url
+        # Link announced URL with requested one
+        elif self.url_index is not None and self.base_url:
+            self.url_index.link(value, self.base_url)
+        return value
+
+    @cached_field
+    def canonical_url(self):
+        value = None
+        if self.base_url:
+            if self.url_index is not None:
+                value = self.url_index.add(self.base_url)
+            else:
+                value = urls.canonicalize_url(self.base_url)
+        return value
 
     # Optional
-    @property
+    @cached_field
     def subtype(self):
-        if not hasattr(self, '_subtype'):
-            self._subtype = self.info['subtype']
-        return self._subtype
+        return self.info['subtype']
 
-    @property
+    @cached_field
     def generator(self):
-        if not hasattr(self, '_generator'):
-            self._generator = None
-            # PDF
-            if self.subtype == 'pdf' and self.pdf_info:
-                creator = self.pdf_info[0].get('Creator', None)
-                if creator:
-                    self._generator = creator
-                else:
-                    producer = self.pdf_info[0].get('Producer', None)
-                    if producer:
-                        self._generator = producer
-            # HTML
-            elif self.subtype == 'html' and self.soup.find():
-                generator_tag = self.soup.find('meta', attrs={'name': "generator"})
-                if generator_tag is not None:
-                    self._generator = generator_tag.attrs['content']
-        return self._generator
-
-    @property
+        value = None
+        # PDF
+        if self.subtype == 'pdf' and self.pdf_info:
+            creator = self.pdf_info[0].get('Creator', None)
+            if creator:
+                value = creator
+            else:
+                producer = self.pdf_info[0].get('Producer', None)
+                if producer:
+                    value = producer
+        # HTML
+        elif self.subtype == 'html' and self.soup.find():
+            value = self._resolve('generator')
+        return value
+
+    @cached_field
     def description(self):
-        if not hasattr(self, '_description'):
-            self._description = None
-            # PDF
-            if self.subtype == 'pdf' and self.pdf_info:
-                self._description = self.pdf_info[0].get('Subject', None)
-            # HTML
-            elif self.subtype == 'html' and self.soup.find():
-                # from opengraph
-                if self._description is None:
-                    desc_tag = self.soup.find('meta', property='og:description')
-                    if desc_tag is not None and desc_tag.attrs.get('content'):
-                        desc = self._valid_string(desc_tag.attrs['content'])
-                        self._description = desc
-                # from meta description
-                if self._description is None:
-                    desc_tag = self.soup.find('meta', attrs={'name': 'description'})
-                    if desc_tag is not None and desc_tag.attrs.get('content'):
-                        desc = self._valid_string(desc_tag.attrs['content'])
-                        self._description = desc
-                # Get first p
-                if self._description is None:
-                    for p_tag in self.soup.find_all('p'):
-                        description_text = p_tag.getText()
-                        if not description_text.strip() or len(description_text) < 20:
-                            continue
-                        self._description = description_text[:100]
-                        if len(self._description) < description_text:
-                            self._description += '...'
-                        break
-        return self._description
-
-    @property
+        value = None
+        # PDF
+        if self.subtype == 'pdf' and self.pdf_info:
+            value = self.pdf_info[0].get('Subject', None)
+        # HTML
+        elif self.subtype == 'html' and self.soup.find():
+            value = self._resolve('description')
+        return value
+
+    @cached_field
     def audio(self):
-        if not hasattr(self, '_audio'):
-            self._audio = None
-            # HTML
-            if self.subtype == 'html' and self.soup.find():
-                audio_tag = self.soup.find('meta', property='og:audio')
-                if audio_tag:
-                    self._audio = audio_tag.attrs['content']
-        return self._audio
+        value = None
+        # HTML
+        if self.subtype == 'html' and self.soup.find():
+            value = self._resolve('audio')
+        return value
 
-    @property
+    @cached_field
     def determiner(self):
-        if not hasattr(self, '_determiner'):
-            self._determiner = None
-            # HTML
-            if self.subtype == 'html' and self.soup.find():
-                determiner_tag = self.soup.find('meta', property='og:determiner')
-                if determiner_tag is not None:
-                    self._determiner = determiner_tag.attrs['content']
-        if self._determiner is None:
-            self._determiner = 'auto'
-        return self._determiner
-
-    @property
+        value = None
+        # HTML
+        if self.subtype == 'html' and self.soup.find():
+            value = self._resolve('determiner')
+        if value is None:
+            value = 'auto'
+        return value
+
+    @cached_field
     def locale(self):
-        if not hasattr(self, '_locale'):
-            self._locale = None
-            # HTML
-            if self.subtype == 'html' and self.soup.find():
-                # from open graph
-                locale_tag = self.soup.find('meta', property='og:locale')
-                if locale_tag is not None:
-                    self._locale = locale_tag.attrs['content']
-                # Or get with HTML tag
-                if self._locale is None:
-                    html_tag = self.soup.find('html')
-                    if html_tag is not None:
-                        self._locale = html_tag.attrs.get('lang')
-                        if self._locale is None:
-                            self._locale = html_tag.attrs.get('xml:lang')
-                # Get from response header
-                if self._locale is None and self.request_headers:
-                    self._locale = self.request_headers.get('Content-Language')
-            if self._locale is not None:
-                self._locale = self._locale.upper()
-        return self._locale
-
-    @property
+        value = None
+        # HTML
+        if self.subtype == 'html' and self.soup.find():
+            value = self._resolve('locale')
+        if value is not None:
+            value = value.upper()
+        return value
+
+    @cached_field
     def locale_alternative(self):
-        if not hasattr(self, '_locale_alternative'):
-            self._locale_alternative = [
-                t.attrs['content']
-                for t in
-                self.soup.find_all('meta', property='og:locale_alternative')
-            ]
-        return self._locale_alternative
+        value = None
+        # HTML
+        if self.subtype == 'html' and self.soup.find():
+            value = self._resolve_all('locale_alternative')
+        return value
 
-    @property
+    @cached_field
     def site_name(self):
-        if not hasattr(self, '_site_name'):
-            self._site_name = None
-            # HTML
-            if self.subtype == 'html' and self.soup.find():
-                site_name_tag = self.soup.find('meta', property='og:site_name')
-                if site_name_tag is not None:
-                    self._site_name = site_name_tag.attrs['content']
-            # If unfound get from URL
-            if self._site_name is None:
-                self._site_name = urlparse(self.base_url).hostname
-        return self._site_name
-
-    @property
+        value = None
+        # HTML
+        if self.subtype == 'html' and self.soup.find():
+            value = self._resolve('site_name')
+        # If unfound get from URL
+        if value is None:
+            value = urlparse(self.base_url).hostname
+        return value
+
+    @cached_field
     def video(self):
-        if not hasattr(self, '_video'):
-            self._video = None
-            if self.subtype == 'html' and self.soup.find():
-                # From open graph
-                og_video_tag = self.soup.find('meta', property='og:video')
-                if og_video_tag is not None:
-                    self._video = og_video_tag.attrs['content']
-                # From open graph video url
-                if self._video is None:
-                    og_video_tag = self.soup.find('meta', property='og:video:url')
-                    if og_video_tag is not None:
-                        self._video = og_video_tag.attrs['content']
-                # From open graph video secure url
-                if self._video is None:
-                    og_video_tag = self.soup.find('meta', property='og:video:secure_url')
-                    if og_video_tag is not None:
-                        self._video = og_video_tag.attrs['content']
-                # From HTML5 video_tag
-                if self._video is None:
-                    video_tag = self.soup.find('video')
-                    if video_tag is not None:
-                        source_tag = video_tag.find('source')
-                        if source_tag is not None:
-                            self._video = source_tag.attrs['src']
-            elif self.info['maintype'] == 'video':
-                self._video = self.base_url
-            # Format URL
-            if self._video is not None and not self._video.startswith('http'):
-                self._video = self._format_url(self._video)
-        return self._video
-
-    @property
+        value = None
+        if self.subtype == 'html' and self.soup.find():
+            value = self._resolve('video')
+        elif self.info['maintype'] == 'video':
+            value = self.base_url
+        # Format URL
+        if value is not None and not value.startswith('http'):
+            value = self._format_url(value)
+        return value
+
+    @cached_field
     def video_width(self):
-        if not hasattr(self, '_video_width'):
-            self._video_width = None
-            if self.subtype == 'html' and self.soup.find():
-                # From open graph
-                og_video_tag = self.soup.find('meta', property='og:video:width')
-                if og_video_tag is not None:
-                    self._video_width = og_video_tag.attrs['content']
-        return self._video_width
+        value = None
+        if self.subtype == 'html' and self.soup.find():
+            value = self._resolve('video_width')
+        return value
 
-    @property
+    @cached_field
     def video_height(self):
-        if not hasattr(self, '_video_height'):
-            self._video_height = None
-            if self.subtype == 'html' and self.soup.find():
-                # From open graph
-                og_video_tag = self.soup.find('meta', property='og:video:height')
-                if og_video_tag is not None:
-                    self._video_height = og_video_tag.attrs['content']
-        return self._video_height
+        value = None
+        if self.subtype == 'html' and self.soup.find():
+            value = self._resolve('video_height')
+        return value
 
-    @property
+    @cached_field
     def video_duration(self):
-        if not hasattr(self, '_video_duration'):
-            self._video_duration = None
-            if self.subtype == 'html' and self.soup.find():
-                # From open graph
-                og_video_tag = self.soup.find('meta', property='og:video:duration')
-                if og_video_tag is not None:
-                    self._video_duration = og_video_tag.attrs['content']
-        return self._video_duration
+        value = None
+        if self.subtype == 'html' and self.soup.find():
+            value = self._resolve('video_duration')
+        return value
 
-    @property
+    @cached_field
     def video_info(self):
-        if not hasattr(self, '_struct_video'):
-            self._struct_video = {}
-            if self.video:
-                self._struct_video['url'] = self.video
-            if self.video_width:
-                self._struct_video['width'] = self.video_width
-            if self.video_height:
-                self._struct_video['height'] = self.video_height
-            if self.video_duration:
-                self._struct_video['duration'] = self.video_duration
-        return self._struct_video
+        value = {}
+        video = self.video
+        if video:
+            value['url'] = video
+        # Attributes of the OpenGraph video being the video, if any, so
+        # they aren't taken from different videos
+        struct_video = None
+        for entry in self.struct_media['video']:
+            video_urls = [u if u.startswith('http') else self._format_url(u)
+                          for u in (entry.get('url'), entry.get('secure_url')) if u]
+            if video in video_urls:
+                struct_video = entry
+                break
+        for key in ('width', 'height', 'duration'):
+            if struct_video is not None:
+                attr = struct_video.get(key)
+            else:
+                attr = getattr(self, 'video_%s' % key)
+            if attr:
+                value[key] = attr
+        return value
 
-    @property
+    @cached_field
     def images(self):
-        if not hasattr(self, '_images'):
-            self._images = []
-            if self.subtype == 'html' and self.soup.find():
-                self._images = [
-                    t.attrs['content']
-                    for t in
-                    self.soup.find_all('meta', property='og:image')
-                ]
-        return self._images
+        value = []
+        if self.subtype == 'html' and self.soup.find():
+            value = self._resolve_all('images')
+        return value
 
-    @property
+    @cached_field
     def author(self):
-        if not hasattr(self, '_author'):
-            self._author = None
-            # PDF
-            if self.subtype == 'pdf' and self.pdf_info:
-                self._author = self.pdf_info[0].get('Author', None)
-            # HTML
-            elif self.subtype == 'html' and self.soup.find():
-                # from og:author
-                og_author_tag = self.soup.find('meta', property='og:author')
-                if og_author_tag is not None:
-                    self._author = og_author_tag.attrs['content']
-                # from opengraph article:author
-                if self._author is None:
-                    og_author_article_tag = self.soup.find('meta', property='article:author')
-                    if og_author_article_tag is not None:
-                        self._author = og_author_article_tag.attrs['content']
-                # from opengraph book:author
-                if self._author is None:
-                    og_author_article_tag = self.soup.find('meta', property='book:author')
-                    if og_author_article_tag is not None:
-                        self._author = og_author_article_tag.attrs['content']
-                # Get from contextly-data
-                if self._author is None and self.contextly_info:
-                    if self.contextly_info.get('author_display_name'):
-                        self._author = self.contextly_info['author_display_name']
-                    elif self.contextly_info.get('author_name'):
-                        self._author = self.contextly_info['author_name']
-                # from HTML meta author
-                if self._author is None:
-                    meta_author_tag = self.soup.find('meta', attrs={'name': 'author'})
-                    if og_author_article_tag is not None:
-                        self._author = meta_author_tag.attrs['content']
-        return self._author
-
-    @property
+        value = None
+        # PDF
+        if self.subtype == 'pdf' and self.pdf_info:
+            value = self.pdf_info[0].get('Author', None)
+        # HTML
+        elif self.subtype == 'html' and self.soup.find():
+            value = self._resolve('author')
+        return value
+
+    @cached_field
     def created_time(self):
-        if not hasattr(self, '_created_time'):
-            self._created_time = None
-            # PDF
-            if self.subtype == 'pdf' and self.pdf_info:
-                date_str = self.pdf_info[0].get('CreationDate', None)
-                if date_str:
-                    self._created_time = utils.parse_pdf_time(date_str)
-        return self._created_time
-
-    @property
+        value = None
+        # PDF
+        if self.subtype == 'pdf' and self.pdf_info:
+            date_str = self.pdf_info[0].get('CreationDate', None)
+            if date_str:
+                value = self._parse_time(date_str)
+        return value
+
+    @cached_field
     def published_time(self):
-        if not hasattr(self, '_published_time'):
-            self._published_time = None
-            # HTML
-            if self.subtype == 'html' and self.soup.find():
-                # from og:published_time, XXX: Hack
-                og_pt_tag = self.soup.find('meta', property='og:published_time')
-                if og_pt_tag is not None:
-                    date_str = og_pt_tag.attrs['content']
-                    self._published_time = utils.parse_opengraph_time(date_str)
-                # from opengraph article_published_time
-                if self.published_time is None:
-                    og_article_pt_tag = self.soup.find('meta', property='article:published_time')
-                    if og_article_pt_tag is not None:
-                        date_str = og_article_pt_tag.attrs['content']
-                        self._published_time = utils.parse_opengraph_time(date_str)
-                # Get from contextly-data
-                if (self._published_time is None and self.contextly_info and
-                        self.contextly_info.get('pub_date')):
-                    self._published_time = self.contextly_info['pub_date']
-                # from html5 issued
-                if self.published_time is None:
-                    issued_tag = self.soup.find('meta', attrs={'name': 'issued'})
-                    if issued_tag is not None:
-                        self.published_time = issued_tag['content']
-        return self._published_time
+        value = None
+        # HTML
+        if self.subtype == 'html' and self.soup.find():
+            value = self._resolve('published_time', convert=self._parse_time)
+        return value
 
-    @property
+    @cached_field
     def modified_time(self):
-        if not hasattr(self, '_modified_time'):
-            self._modified_time = None
-            # PDF
-            if self.subtype == 'pdf' and self.pdf_info:
-                date_str = self.pdf_info[0].get('ModDate', None)
-                if date_str:
-                    self._modified_time = utils.parse_pdf_time(date_str)
-            # HTML
-            elif self.subtype == 'html' and self.soup.find():
-                # from og:modified_time, XXX: Hack
-                og_md_tag = self.soup.find('meta', property='og:modified_time')
-                if og_md_tag is not None:
-                    date_str = og_md_tag.attrs['content']
-                    self._modified_time = utils.parse_opengraph_time(date_str)
-                # from opengraph article_modified_time
-                if self.modified_time is None:
-                    og_article_md_tag = self.soup.find('meta', property='article:modified_time')
-                    if og_article_md_tag is not None:
-                        date_str = og_article_md_tag.attrs['content']
-                        self._modified_time = utils.parse_opengraph_time(date_str)
-                # Get from contextly-data
-                if (self._modified_time is None and self.contextly_info and
-                        self.contextly_info.get('mod_date')):
-                    self._modified_time = self.contextly_info['mod_date']
-                # from html5 issued
-                if self.modified_time is None:
-                    issued_tag = self.soup.find('meta', attrs={'name': 'modified'})
-                    if issued_tag is not None:
-                        self.modified_time = issued_tag['content']
-        return self._modified_time
-
-    @property
+        value = None
+        # PDF
+        if self.subtype == 'pdf' and self.pdf_info:
+            date_str = self.pdf_info[0].get('ModDate', None)
+            if date_str:
+                value = self._parse_time(date_str)
+        # HTML
+        elif self.subtype == 'html' and self.soup.find():
+            value = self._resolve('modified_time', convert=self._parse_time)
+        return value
+
+    @cached_field
     def expiration_time(self):
-        if not hasattr(self, '_expiration_time'):
-            self._expiration_time = None
-            # HTML
-            if self.subtype == 'html' and self.soup.find():
-                # from og:expiration_time, XXX: Hack
-                og_md_tag = self.soup.find('meta', property='og:expiration_time')
-                if og_md_tag is not None:
-                    self._expiration_time = og_md_tag.attrs['content']
-                # from opengraph article_expiration_time
-                if self.expiration_time is None:
-                    og_article_md_tag = self.soup.find('meta', property='article:expiration_time')
-                    if og_article_md_tag is not None:
-                        self._expiration_time = og_article_md_tag.attrs['content']
-        return self._expiration_time
+        value = None
+        # HTML
+        if self.subtype == 'html' and self.soup.find():
+            value = self._resolve('expiration_time')
+        return value
 
-    @property
+    @cached_field
     def section(self):
-        if not hasattr(self, '_section'):
-            self._section = None
-            # HTML
-            if self.subtype == 'html' and self.soup.find():
-                # from og:section, XXX: Hack
-                og_section_tag = self.soup.find('meta', property='og:section')
-                if og_section_tag is not None:
-                    self._expiration_time = og_section_tag.attrs['content']
-                # from opengraph article:section
-                if self.expiration_time is None:
-                    og_article_section_tag = self.soup.find('meta', property='article:section')
-                    if og_article_section_tag is not None:
-                        self._expiration_time = og_article_section_tag.attrs['content']
-                # Get from contextly-data
-                if (self._section is None and self.contextly_info and
-                        self.contextly_info.get('categories')):
-                    self._section = self.contextly_info['categories'][0]
-        return self._section
+        value = None
+        # HTML
+        if self.subtype == 'html' and self.soup.find():
+            value = self._resolve('section')
+        return value
 
     category = section
 
-    @property
+    @cached_field
     def tags(self):
-        if not hasattr(self, '_tags'):
-            self._tags = []
-            # PDF
-            if self.subtype == 'pdf' and self.pdf_info:
-                keywords = self.pdf_info[0].get('Keywords', '')
-                self._tags.extend(keywords.split())
-            # HTML
-            elif self.subtype == 'html' and self.soup.find():
-                # from og:tag, XXX: Hack
-                og_tag_tags = self.soup.find_all('meta', property='og:tag')
-                for tag in og_tag_tags:
-                    self._tags.append(tag.attrs['content'])
-                # from opengraph article:tags
-                article_tag_tags = self.soup.find_all('meta', property='article:tag')
-                for tag in article_tag_tags:
-                    self._tags.append(tag.attrs['content'])
-                # from opengraph article:tags
-                video_tag_tags = self.soup.find_all('meta', property='video:tag')
-                for tag in video_tag_tags:
-                    self._tags.append(tag.attrs['content'])
-                # Get from contextly-data
-                if (not self._tags and self.contextly_info and
-                        self.contextly_info.get('tags')):
-                    self._tags = self.contextly_info['tags']
-                # From meta keywords
-                if not self._tags:
-                    keywords_tag = self.soup.find('meta', attrs={'name': 'keywords'})
-                    if keywords_tag is not None:
-                        keywords = [k.strip() for k in keywords_tag.attrs['content'].split(',')]
-                        self._tags.extend(keywords)
-            self._tags = [self._valid_string(t) for t in self._tags
-                          if self._valid_string(t)]
-        return self._tags
-
-    @property
+        value = []
+        # PDF
+        if self.subtype == 'pdf' and self.pdf_info:
+            keywords = self.pdf_info[0].get('Keywords', '')
+            value.extend(keywords.split())
+        # HTML
+        elif self.subtype == 'html' and self.soup.find():
+            value = self._resolve_all('tags')
+        return [self._valid_string(t) for t in value if self._valid_string(t)]
+
+    @cached_field
+    def struct_media(self):
+        """
+        OpenGraph images, videos and audios with their structured
+        properties, as lists of dicts by kind.
+        """
+        value = dict((kind, []) for kind in rules.MEDIA_KINDS)
+        if self.subtype == 'html' and self.soup.find():
+            media = self.meta_index.media
+            for kind in rules.MEDIA_KINDS:
+                value[kind] = [dict(entry) for entry in media.get(kind)]
+        return value
+
+    @cached_field
     def struct_image(self):
-        if not hasattr(self, '_struct_image'):
-            _image = self.soup.find('meta', property='og:image')
-            self._struct_image = {}
-            if _image is not None:
-                self._struct_image = {
-                    'url': _image.attrs['content'],
-                }
-                next_img_metas = _image.find_next_siblings('meta',
-                                                           property=True)
-                for img_meta in next_img_metas:
-                    if img_meta.attrs['property'] == 'og:image':
-                        break
-                    elif img_meta.attrs['property'] == 'og:image:width':
-                        self._struct_image['width'] = img_meta.attrs['content']
-                    elif img_meta.attrs['property'] == 'og:image:height':
-                        self._struct_image['height'] = img_meta.attrs['content']
-                    elif img_meta.attrs['property'] == 'og:image:type':
-                        self._struct_image['type'] = img_meta.attrs['content']
-                    elif img_meta.attrs['property'] == 'og:image:secure_url':
-                        self._struct_image['secure_url'] = img_meta.attrs['content']
-        return self._struct_image
+        image_list = self.struct_media['image']
+        return image_list[0] if image_list else {}
+
+    @cached_field
+    def struct_video(self):
+        video_list = self.struct_media['video']
+        return video_list[0] if video_list else {}
+
+    @cached_field
+    def struct_audio(self):
+        audio_list = self.struct_media['audio']
+        return audio_list[0] if audio_list else {}
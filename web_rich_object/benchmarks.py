@@ -0,0 +1,130 @@
+"""
+Micro-benchmarks, run with ``python -m web_rich_object.benchmarks [name...]``
+"""
+import os
+import re
+import subprocess
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+import web_rich_object
+from web_rich_object import timestamps
+
+NUMBER = 10000
+# Each import runs in a fresh interpreter
+IMPORT_NUMBER = 5
+IMPORT_SCRIPT = """
+import sys, time
+sys.path.insert(0, %r)
+start = time.time()
+for name in %r:
+    try:
+        __import__(name)
+    except ImportError:
+        pass
+print(time.time() - start)
+"""
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(web_rich_object.__file__)))
+# Heavy dependencies imported lazily, what the import would cost if eager
+IMPORT_SAMPLES = (
+    ('package', ('web_rich_object',)),
+    ('eager', ('web_rich_object', 'bs4', 'chardet', 'pdfminer.pdfparser',
+               'PIL.Image', 'sqlite3')),
+)
+
+# Implementation replaced by ``timestamps``, kept as reference
+LEGACY_UTC_OFFSET_REG = re.compile(r'.*([+-]\d\d).*')
+
+
+def legacy_parse_pdf_time(date_str):
+    try:
+        date = datetime.strptime(date_str[2:-7], '%Y%m%d%H%M%S')
+        offset = int(LEGACY_UTC_OFFSET_REG.sub(r'\1', date_str))
+        return date + timedelta(seconds=offset*3600)
+    except ValueError:
+        return None
+
+
+def legacy_parse_opengraph_time(date_str):
+    try:
+        try:
+            date = datetime.strptime(date_str[:-6], '%Y-%m-%dT%H:%M:%S')
+        except ValueError:
+            date = datetime.strptime(date_str[:-6].strip(), '%d/%m/%Y %H:%M:%S')
+        offset = int(LEGACY_UTC_OFFSET_REG.sub(r'\1', date_str))
+        return date + timedelta(seconds=offset*3600)
+    except (ValueError, NameError):
+        return None
+
+
+def legacy_parse_contextly_time(date_str):
+    try:
+        return datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        return None
+
+
+TIMESTAMP_SAMPLES = (
+    ('opengraph', legacy_parse_opengraph_time, '2016-12-12T08:00:15+05:30'),
+    ('opengraph dmy', legacy_parse_opengraph_time, '12/12/2016 08:00:15 +01:00'),
+    ('pdf', legacy_parse_pdf_time, "D:20161212080015+01'00'"),
+    ('contextly', legacy_parse_contextly_time, '2016-12-12 08:00:15'),
+)
+
+
+def bench_timestamps(number=NUMBER):
+    """Legacy ``utils`` parsers against ``timestamps.TimestampParser``."""
+    parser = timestamps.TimestampParser()
+    results = []
+    for name, legacy, value in TIMESTAMP_SAMPLES:
+        results.append((
+            name,
+            timeit.timeit(lambda: legacy(value), number=number),
+            timeit.timeit(lambda: parser.parse(value), number=number),
+            timeit.timeit(lambda: parser.parse(value, site='example.com'),
+                          number=number),
+        ))
+    return ('sample', 'legacy', 'timestamps', 'per site'), results
+
+
+def _time_import(modules):
+    script = IMPORT_SCRIPT % (ROOT_DIR, modules)
+    output = subprocess.check_output([sys.executable, '-c', script])
+    return float(output.decode('utf-8').strip().splitlines()[-1])
+
+
+def bench_import(number=IMPORT_NUMBER):
+    """``import web_rich_object`` against eager heavy imports."""
+    results = []
+    for name, modules in IMPORT_SAMPLES:
+        results.append((
+            name, sum(_time_import(modules) for _ in range(number))))
+    return ('modules', 'import'), results
+
+
+# name: (function, calls per measure)
+BENCHMARKS = {
+    'import': (bench_import, IMPORT_NUMBER),
+    'timestamps': (bench_timestamps, NUMBER),
+}
+
+
+def print_results(title, header, results, number=NUMBER):
+    print(title)
+    print(''.join(h.ljust(16) for h in header))
+    for row in results:
+        # Microseconds per call
+        print(row[0].ljust(16) + ''.join(
+            ('%.2fus' % (t * 10**6 / number)).ljust(16) for t in row[1:]))
+
+
+def main(names=None):
+    for name in names or sorted(BENCHMARKS):
+        func, number = BENCHMARKS[name]
+        header, results = func(number)
+        print_results(name, header, results, number)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
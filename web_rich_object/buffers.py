@@ -0,0 +1,163 @@
+"""Reusable body buffers shared between ``WebRichObject`` instances"""
+import mmap
+import os
+import tempfile
+import threading
+
+BUFFER_INITIAL_SIZE = int(os.environ.get('WRO_BUFFER_INITIAL_SIZE', 256*1024))
+# Buffers kept by a pool and largest capacity kept
+BUFFER_POOL_SIZE = int(os.environ.get('WRO_BUFFER_POOL_SIZE', 8))
+BUFFER_POOL_MAX_SIZE = int(os.environ.get('WRO_BUFFER_POOL_MAX_SIZE', 2*10**6))
+# Bodies larger than this are moved to a memory-mapped temporary file
+SPILL_THRESHOLD = int(os.environ.get('WRO_SPILL_THRESHOLD', 4*10**6))
+SPILL_DIR = os.environ.get('WRO_SPILL_DIR')
+
+
+def to_bytes(data):
+    """Copy a buffer view or a memory map to bytes."""
+    if isinstance(data, memoryview):
+        return data.tobytes()
+    if isinstance(data, mmap.mmap):
+        return data[:]
+    return data
+
+
+class Buffer(object):
+    """
+    Growable ``bytearray`` with its used length. Data is exposed through
+    ``view()`` without copy. When growing, a new array is allocated instead
+    of resizing the current one, which may still be exported by a view.
+    """
+    def __init__(self, size=BUFFER_INITIAL_SIZE):
+        self._data = bytearray(size)
+        self.length = 0
+
+    @property
+    def capacity(self):
+        return len(self._data)
+
+    def write(self, chunk):
+        end = self.length + len(chunk)
+        if end > len(self._data):
+            data = bytearray(max(end, 2 * len(self._data)))
+            data[:self.length] = memoryview(self._data)[:self.length]
+            self._data = data
+        self._data[self.length:end] = chunk
+        self.length = end
+
+    def view(self):
+        return memoryview(self._data)[:self.length]
+
+    def clear(self):
+        self.length = 0
+
+    def close(self):
+        self.clear()
+
+
+class FileBuffer(object):
+    """
+    Body written to a temporary file, exposed as a read-only memory map.
+    The file is deleted when closed.
+    """
+    def __init__(self, dir=None):
+        self._file = tempfile.TemporaryFile(dir=dir or SPILL_DIR)
+        self._map = None
+        self.length = 0
+
+    def write(self, chunk):
+        self._file.write(chunk)
+        self.length += len(chunk)
+
+    def view(self):
+        if not self.length:
+            return b''
+        if self._map is None or len(self._map) != self.length:
+            self._file.flush()
+            self._map = mmap.mmap(self._file.fileno(), self.length,
+                                  access=mmap.ACCESS_READ)
+        return self._map
+
+    def close(self):
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # Still exported, closed when collected
+                pass
+            self._map = None
+        self._file.close()
+
+
+def spill(buffer_, dir=None):
+    """Copy the content of a ``Buffer`` to a new ``FileBuffer``."""
+    file_buffer = FileBuffer(dir=dir)
+    file_buffer.write(buffer_.view())
+    return file_buffer
+
+
+class BufferPool(object):
+    """Free ``Buffer`` objects kept for reuse, bounded in count and size."""
+    def __init__(self, max_buffers=BUFFER_POOL_SIZE, max_size=BUFFER_POOL_MAX_SIZE,
+                 initial_size=BUFFER_INITIAL_SIZE):
+        self.max_buffers = max_buffers
+        self.max_size = max_size
+        self.initial_size = initial_size
+        self._free = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+        return Buffer(self.initial_size)
+
+    def release(self, buffer_):
+        if not isinstance(buffer_, Buffer) or buffer_.capacity > self.max_size:
+            buffer_.close()
+            return
+        buffer_.clear()
+        with self._lock:
+            if len(self._free) < self.max_buffers:
+                self._free.append(buffer_)
+
+    def __len__(self):
+        return len(self._free)
+
+
+class BufferReader(object):
+    """
+    Read-only file object over a buffer or a memory map, reads only copy
+    what is returned.
+    """
+    def __init__(self, data):
+        if not isinstance(data, (memoryview, mmap.mmap)):
+            data = memoryview(data)
+        self._view = data
+        self._pos = 0
+
+    def read(self, size=-1):
+        start = self._pos
+        if size is None or size < 0:
+            self._pos = len(self._view)
+        else:
+            self._pos = min(start + size, len(self._view))
+        return to_bytes(self._view[start:self._pos])
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self._pos
+        elif whence == 2:
+            offset += len(self._view)
+        self._pos = max(0, min(offset, len(self._view)))
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def close(self):
+        self._view = memoryview(b'')
+        self._pos = 0
+
+
+DEFAULT_POOL = BufferPool()
@@ -0,0 +1,371 @@
+"""Key-value cache backends with time to live"""
+import json
+import re
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+from web_rich_object import serialization
+
+REDIS_SCAN_COUNT = 1000
+REDIS_GLOB_REG = re.compile(r'([\\*?\[\]])')
+
+
+class BaseCache(object):
+    """
+    Interface of cache backends, values must be JSON serializable.
+
+    ``ttl`` is expressed in seconds, ``None`` means no expiration.
+    """
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+
+    def _expires(self, ttl):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl is None:
+            return None
+        return time.time() + ttl
+
+    def get(self, key, default=None):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def get_many(self, keys):
+        values = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                values[key] = value
+        return values
+
+    def set_many(self, mapping, ttl=None):
+        for key, value in mapping.items():
+            self.set(key, value, ttl=ttl)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+
+class MemoryCache(BaseCache):
+    """In-memory least recently used cache."""
+    def __init__(self, max_size=10000, ttl=None):
+        super(MemoryCache, self).__init__(ttl=ttl)
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is None:
+                return default
+            value, expires = entry
+            if expires is not None and expires < time.time():
+                return default
+            # Move to the most recently used end
+            self._data[key] = entry
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, self._expires(ttl))
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SqliteCache(BaseCache):
+    """Persistent cache stored in a SQLite database."""
+    def __init__(self, path, ttl=None, table='cache'):
+        super(SqliteCache, self).__init__(ttl=ttl)
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        # Only loaded when a persistent cache is used
+        import sqlite3
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS %s '
+                '(key TEXT PRIMARY KEY, value TEXT, expires REAL)' % self.table)
+            self._conn.commit()
+
+    def get(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires FROM %s WHERE key = ?' % self.table,
+                (key,)).fetchone()
+        if row is None:
+            return default
+        value, expires = row
+        if expires is not None and expires < time.time():
+            self.delete(key)
+            return default
+        return json.loads(value)
+
+    def get_many(self, keys):
+        keys = list(keys)
+        values = {}
+        now = time.time()
+        # Stay under SQLite's limit of host parameters
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i+500]
+            with self._lock:
+                rows = self._conn.execute(
+                    'SELECT key, value, expires FROM %s WHERE key IN (%s)' % (
+                        self.table, ','.join('?' * len(chunk))),
+                    chunk).fetchall()
+            for key, value, expires in rows:
+                if expires is None or expires >= now:
+                    values[key] = json.loads(value)
+        return values
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO %s (key, value, expires) '
+                'VALUES (?, ?, ?)' % self.table,
+                (key, json.dumps(value), self._expires(ttl)))
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute('DELETE FROM %s WHERE key = ?' % self.table,
+                               (key,))
+            self._conn.commit()
+
+    def purge(self):
+        """Remove expired entries."""
+        with self._lock:
+            self._conn.execute('DELETE FROM %s WHERE expires < ?' % self.table,
+                               (time.time(),))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM %s' % self.table)
+            self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+class RedisError(Exception):
+    """Error reply of the server."""
+
+
+REDIS_ERRORS = (IOError, OSError, RedisError)
+
+
+class RedisCache(BaseCache):
+    """
+    Cache shared across processes and hosts, in a server speaking the Redis
+    protocol. Values are stored with ``serializer`` (``dumps`` and
+    ``loads``), compact binary ``serialization`` by default.
+
+    Network and server errors are handled as misses, so an unavailable or
+    misconfigured server only costs extractions. Commands of ``get_many`` and ``set_many`` are
+    pipelined on a single round trip.
+    """
+    def __init__(self, host='localhost', port=6379, db=0, password=None,
+                 ttl=None, prefix='wro:', timeout=1.0, serializer=None):
+        super(RedisCache, self).__init__(ttl=ttl)
+        self.address = (host, port)
+        self.db = db
+        self.password = password
+        self.prefix = prefix
+        self.timeout = timeout
+        self.serializer = serialization if serializer is None else serializer
+        self._sock = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        sock = socket.create_connection(self.address, self.timeout)
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._sock, self._file = sock, sock.makefile('rb')
+            commands = []
+            if self.password is not None:
+                commands.append(('AUTH', self.password))
+            if self.db:
+                commands.append(('SELECT', self.db))
+            if commands:
+                self._execute(commands)
+        except BaseException:
+            # Never keep a connection which is not authenticated or not on
+            # the right database, later commands would fail on it
+            sock.close()
+            self._disconnect()
+            raise
+
+    def _disconnect(self):
+        if self._sock is not None:
+            try:
+                if self._file is not None:
+                    self._file.close()
+                self._sock.close()
+            except (IOError, OSError):
+                pass
+        self._sock = self._file = None
+
+    @staticmethod
+    def _encode(value):
+        if isinstance(value, bytes):
+            return value
+        if not isinstance(value, (int, float)):
+            return value.encode('utf-8')
+        return ('%s' % value).encode('ascii')
+
+    def _pack(self, command):
+        parts = [('*%d\r\n' % len(command)).encode('ascii')]
+        for arg in command:
+            arg = self._encode(arg)
+            parts.append(('$%d\r\n' % len(arg)).encode('ascii'))
+            parts.append(arg)
+            parts.append(b'\r\n')
+        return b''.join(parts)
+
+    def _read_reply(self):
+        line = self._file.readline()
+        if not line.endswith(b'\r\n'):
+            raise IOError("Connection closed by server")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest
+        if kind == b'-':
+            return RedisError(rest.decode('utf-8', 'replace'))
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            size = int(rest)
+            if size < 0:
+                return None
+            return self._file.read(size + 2)[:-2]
+        if kind == b'*':
+            size = int(rest)
+            if size < 0:
+                return None
+            return [self._read_reply() for _ in range(size)]
+        raise IOError("Protocol error: %r" % line)
+
+    def _execute(self, commands):
+        """Send ``commands`` at once and read their replies."""
+        self._sock.sendall(b''.join(self._pack(command) for command in commands))
+        replies = [self._read_reply() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    def execute(self, *commands):
+        """Pipeline ``commands``, reconnecting once if the connection was lost."""
+        with self._lock:
+            for attempt in (0, 1):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._execute(commands)
+                except (IOError, OSError):
+                    self._disconnect()
+                    if attempt:
+                        raise
+
+    def _key(self, key):
+        return self.prefix + key
+
+    def _loads(self, value):
+        if value is None:
+            return None
+        try:
+            return self.serializer.loads(value)
+        except ValueError:
+            return None
+
+    def _set_command(self, key, value, ttl):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl is None:
+            return ('SET', self._key(key), self.serializer.dumps(value))
+        if ttl <= 0:
+            return ('DEL', self._key(key))
+        return ('SET', self._key(key), self.serializer.dumps(value),
+                'PX', int(ttl * 1000))
+
+    def get(self, key, default=None):
+        try:
+            value = self._loads(self.execute(('GET', self._key(key)))[0])
+        except REDIS_ERRORS:
+            return default
+        return default if value is None else value
+
+    def get_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        try:
+            replies = self.execute(('MGET',) + tuple(self._key(key) for key in keys))[0]
+        except REDIS_ERRORS:
+            return {}
+        values = {}
+        for key, reply in zip(keys, replies):
+            value = self._loads(reply)
+            if value is not None:
+                values[key] = value
+        return values
+
+    def set(self, key, value, ttl=None):
+        try:
+            self.execute(self._set_command(key, value, ttl))
+        except REDIS_ERRORS:
+            pass
+
+    def set_many(self, mapping, ttl=None):
+        commands = [self._set_command(key, value, ttl)
+                    for key, value in mapping.items()]
+        if commands:
+            try:
+                self.execute(*commands)
+            except REDIS_ERRORS:
+                pass
+
+    def delete(self, key):
+        try:
+            self.execute(('DEL', self._key(key)))
+        except REDIS_ERRORS:
+            pass
+
+    def clear(self):
+        """Delete keys starting with ``prefix``, other keys are left alone."""
+        pattern = REDIS_GLOB_REG.sub(r'\\\1', self.prefix) + '*'
+        cursor = b'0'
+        while True:
+            cursor, keys = self.execute(
+                ('SCAN', cursor, 'MATCH', pattern, 'COUNT', REDIS_SCAN_COUNT))[0]
+            if keys:
+                self.execute(('DEL',) + tuple(keys))
+            if cursor == b'0':
+                return
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
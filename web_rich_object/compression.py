@@ -0,0 +1,110 @@
+"""
+Negotiation and streaming decoding of compressed responses
+
+``gzip`` and ``deflate`` are always accepted, ``br`` when the optional
+``brotli`` package, 1.1 or later, is installed. Decoders produce output in bounded pieces,
+so the size limit of a download applies to the decoded bytes and a small
+compressed body can't expand past it.
+"""
+import os
+import zlib
+try:
+    import brotli
+    BROTLI_ERROR = brotli.error
+    # Only decompressors bounding their output, brotli >= 1.1, are used
+    if not hasattr(brotli.Decompressor(), 'can_accept_more_data'):
+        brotli = None
+except (ImportError, AttributeError):
+    brotli = None
+
+SUPPORTED_ENCODINGS = ('gzip', 'deflate') + (('br',) if brotli is not None else ())
+ACCEPT_ENCODING = os.environ.get('WRO_ACCEPT_ENCODING', ', '.join(SUPPORTED_ENCODINGS))
+ENCODING_ALIASES = {'x-gzip': 'gzip', 'x-deflate': 'deflate'}
+
+
+class DecodingError(IOError):
+    """Body doesn't match its content encoding."""
+
+
+class ZlibDecoder(object):
+    """
+    Decoder of gzip and zlib streams, raw deflate streams sent as
+    ``deflate`` by some servers are detected.
+    """
+    def __init__(self, encoding):
+        # Automatic detection of the gzip or zlib header
+        self._obj = zlib.decompressobj(32 + zlib.MAX_WBITS)
+        self._raw_fallback = encoding == 'deflate'
+        self._tail = b''
+
+    def decompress(self, data, max_length):
+        data = self._tail + data
+        try:
+            chunk = self._obj.decompress(data, max_length)
+        except zlib.error as err:
+            if not self._raw_fallback:
+                raise DecodingError("Invalid compressed body: %s" % err)
+            self._raw_fallback = False
+            self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+            return self.decompress(data, max_length)
+        self._raw_fallback = False
+        self._tail = self._obj.unconsumed_tail
+        return chunk
+
+
+class BrotliDecoder(object):
+    """
+    Decoder of brotli streams. Input is buffered while the decompressor
+    still has output pending beyond ``max_length``.
+    """
+    def __init__(self, encoding=None):
+        self._obj = brotli.Decompressor()
+        self._tail = b''
+
+    def decompress(self, data, max_length):
+        self._tail += data
+        data = b''
+        if self._obj.can_accept_more_data():
+            data, self._tail = self._tail, b''
+        try:
+            return self._obj.process(data, output_buffer_limit=max_length)
+        except BROTLI_ERROR as err:
+            raise DecodingError("Invalid compressed body: %s" % err)
+
+
+DECODERS = {
+    'gzip': ZlibDecoder,
+    'deflate': ZlibDecoder,
+}
+if brotli is not None:
+    DECODERS['br'] = BrotliDecoder
+
+
+def get_content_encoding(headers):
+    """Content encoding from a dict of response headers, any case."""
+    for name, value in headers.items():
+        if name.lower() == 'content-encoding':
+            encoding = value.strip().lower()
+            return ENCODING_ALIASES.get(encoding, encoding)
+    return None
+
+
+def get_decoder(encoding):
+    """
+    Decoder for ``encoding``, ``None`` for identity. Raises
+    ``DecodingError`` on encodings which weren't negotiated.
+    """
+    if encoding in (None, '', 'identity'):
+        return None
+    decoder_class = DECODERS.get(encoding)
+    if decoder_class is None:
+        raise DecodingError("Unsupported content encoding: %s" % encoding)
+    return decoder_class(encoding)
+
+
+def iter_decode(decoder, data, size):
+    """Decoded pieces of ``data`` of about ``size`` bytes at most."""
+    chunk = decoder.decompress(data, size)
+    while chunk:
+        yield chunk
+        chunk = decoder.decompress(b'', size)
@@ -0,0 +1,126 @@
+"""Negative caching of failed URLs and circuit breaking of failing hosts"""
+import os
+import threading
+import time
+try:
+    from urllib.error import URLError, HTTPError
+    from urllib.parse import urlsplit
+except ImportError:
+    from urllib2 import URLError, HTTPError
+    from urlparse import urlsplit
+
+from web_rich_object.cache import MemoryCache
+
+FAILURE_CACHE_TTL = int(os.environ.get('WRO_FAILURE_CACHE_TTL', 60))
+FAILURE_CACHE_SIZE = int(os.environ.get('WRO_FAILURE_CACHE_SIZE', 10000))
+BREAKER_THRESHOLD = int(os.environ.get('WRO_BREAKER_THRESHOLD', 5))
+BREAKER_COOLDOWN = int(os.environ.get('WRO_BREAKER_COOLDOWN', 30))
+# Client errors which don't mean the host is failing
+HOST_ALIVE_CODES = frozenset(range(400, 500)) - frozenset([408, 429])
+
+
+class CachedFailure(URLError):
+    """The URL failed recently."""
+
+
+class HostUnavailable(URLError):
+    """The circuit of the host is open."""
+
+
+def is_host_failure(error):
+    if isinstance(error, HTTPError):
+        return error.code not in HOST_ALIVE_CODES
+    return True
+
+
+class CircuitBreaker(object):
+    """
+    Open the circuit of a host after ``threshold`` consecutive failures.
+    After ``cooldown`` seconds a single request is let through as a probe,
+    its success closes the circuit and its failure opens it again.
+    """
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        # host: [consecutive failures, time of opening]
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def allow(self, host):
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None or state[0] < self.threshold:
+                return True
+            now = time.time()
+            if now - state[1] >= self.cooldown:
+                # Half-open, other requests wait for the probe
+                state[1] = now
+                return True
+            return False
+
+    def is_open(self, host):
+        with self._lock:
+            state = self._hosts.get(host)
+            return state is not None and state[0] >= self.threshold
+
+    def success(self, host):
+        with self._lock:
+            self._hosts.pop(host, None)
+
+    def failure(self, host):
+        with self._lock:
+            state = self._hosts.setdefault(host, [0, 0])
+            state[0] += 1
+            if state[0] >= self.threshold:
+                state[1] = time.time()
+
+    def clear(self):
+        with self._lock:
+            self._hosts.clear()
+
+
+class FailureGuard(object):
+    """Fail fast on URLs which failed recently and on hosts with an open circuit."""
+    def __init__(self, cache=None, ttl=FAILURE_CACHE_TTL, breaker=None):
+        if cache is None:
+            cache = MemoryCache(max_size=FAILURE_CACHE_SIZE)
+        if breaker is None:
+            breaker = CircuitBreaker()
+        self.cache = cache
+        self.ttl = ttl
+        self.breaker = breaker
+
+    def check(self, url):
+        """Raise ``CachedFailure`` or ``HostUnavailable`` instead of fetching ``url``."""
+        reason = self.cache.get(url)
+        if reason is not None:
+            raise CachedFailure(reason)
+        host = urlsplit(url).hostname
+        if host and not self.breaker.allow(host):
+            raise HostUnavailable("Circuit open for %s" % host)
+
+    def failure(self, url, error, host_url=None):
+        """
+        Record ``error`` on ``url``, the host is taken from ``host_url`` when
+        the failure happened after a redirection.
+        """
+        self.cache.set(url, '%s' % error, ttl=self.ttl)
+        host = urlsplit(host_url or url).hostname
+        if not host:
+            return
+        if is_host_failure(error):
+            self.breaker.failure(host)
+        else:
+            self.breaker.success(host)
+
+    def success(self, url):
+        host = urlsplit(url).hostname
+        if host:
+            self.breaker.success(host)
+
+    def clear(self):
+        self.cache.clear()
+        self.breaker.clear()
+
+
+DEFAULT_GUARD = FailureGuard()
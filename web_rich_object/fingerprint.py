@@ -0,0 +1,57 @@
+"""Fingerprint of the metadata region of pages for incremental refresh"""
+import hashlib
+import re
+
+HEAD_END_REG = re.compile(br'</head\s*>', re.IGNORECASE)
+# Longest ``</head>`` variant kept between chunks
+HEAD_END_MAX_SIZE = 16
+
+
+class HeadFingerprint(object):
+    """
+    Hash of the bytes up to the end of ``</head>``, fed chunk by chunk while
+    streaming. ``done`` becomes true once the end of head is reached.
+    """
+    def __init__(self):
+        self._hash = hashlib.sha1()
+        self._tail = b''
+        self.done = False
+
+    def update(self, chunk):
+        if self.done:
+            return
+        data = self._tail + chunk
+        match = HEAD_END_REG.search(data)
+        if match is not None:
+            self._hash.update(data[len(self._tail):match.end()])
+            self.done = True
+        else:
+            self._hash.update(chunk)
+            self._tail = data[-HEAD_END_MAX_SIZE:]
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
+def get_fingerprint(html):
+    fingerprint = HeadFingerprint()
+    fingerprint.update(html)
+    return fingerprint.hexdigest()
+
+
+def refresh(url, previous=None, **kwargs):
+    """
+    Extract ``url`` again unless the metadata region of the page didn't
+    change since ``previous``, a dict returned by an earlier call. In this
+    case the download stops after ``</head>`` and ``previous`` is returned
+    without any parsing.
+    """
+    # Avoid circular import
+    from web_rich_object.api import WebRichObject
+    previous_fingerprint = (previous or {}).get('fingerprint')
+    with WebRichObject(url, previous_fingerprint=previous_fingerprint, **kwargs) as wro:
+        if wro.unchanged:
+            return previous
+        result = wro.to_dict()
+        result['fingerprint'] = wro.fingerprint
+        return result
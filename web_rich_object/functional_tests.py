@@ -6,6 +6,7 @@ from datetime import datetime
 import warnings
 
 from web_rich_object.api import WebRichObject as WRO
+from web_rich_object.timestamps import UTC
 
 
 TEST_URLS = [
@@ -16,8 +17,8 @@ TEST_URLS = [
     ('https://github.com/', {'title': 'Build software better, together', 'url': 'https://github.com', 'site_name': 'GitHub', 'type': 'website', 'subtype': 'html', 'image': 'https://assets-cdn.github.com/images/modules/open_graph/github-logo.png', 'generator': None, 'author': None, 'tags': []}),
     ('https://en.wikipedia.org/wiki/Main_Page', {'title': 'Wikipedia, the free encyclopedia', 'url': 'https://en.wikipedia.org/wiki/Main_Page', 'site_name': 'en.wikipedia.org', 'type': 'website', 'subtype': 'html', 'tags': []}),
     ('https://en.wikipedia.org/wiki/', {'title': 'Wikipedia, the free encyclopedia', 'url': 'https://en.wikipedia.org/wiki/', 'site_name': 'en.wikipedia.org', 'type': 'website', 'subtype': 'html', 'tags': []}),
-    ('https://en.wikipedia.org/wiki/Portugal', {'title': 'Portugal - Wikipedia', 'url': 'https://en.wikipedia.org/wiki/Portugal', 'site_name': 'en.wikipedia.org', 'type': 'website', 'subtype': 'html', 'tags': []}),
-    ('https://www.revealnews.org/article/uber-said-it-protects-you-from-spying-security-sources-say-otherwise/', {'title': "Uber said it protects you from spying. Security sources say otherwise", 'url': 'https://www.revealnews.org/article/uber-said-it-protects-you-from-spying-security-sources-say-otherwise/', 'site_name': 'Reveal', 'type': 'article', 'subtype': 'html', 'tags': ['privacy', 'surveillance', 'uber'], 'category': None, 'published_time': datetime(2016, 12, 12, 8, 0, 15), 'modified_time': datetime(2016, 12, 12, 23, 40, 26)}),
+    ('https://en.wikipedia.org/wiki/Portugal', {'title': 'Portugal', 'url': 'https://en.wikipedia.org/wiki/Portugal', 'site_name': 'en.wikipedia.org', 'type': 'website', 'subtype': 'html', 'tags': []}),
+    ('https://www.revealnews.org/article/uber-said-it-protects-you-from-spying-security-sources-say-otherwise/', {'title': "Uber said it protects you from spying. Security sources say otherwise", 'url': 'https://www.revealnews.org/article/uber-said-it-protects-you-from-spying-security-sources-say-otherwise/', 'site_name': 'Reveal', 'type': 'article', 'subtype': 'html', 'tags': ['privacy', 'surveillance', 'uber'], 'category': None, 'published_time': datetime(2016, 12, 12, 8, 0, 15, tzinfo=UTC), 'modified_time': datetime(2016, 12, 12, 23, 40, 26, tzinfo=UTC)}),
     ('http://rue89.nouvelobs.com/2016/12/19/gagner-temps-ils-matent-films-series-vitesse-acceleree-265930', {'title': "Rue89", 'url': 'http://rue89.nouvelobs.com/2016/12/19/gagner-temps-ils-matent-films-series-vitesse-acceleree-265930', 'site_name': 'Rue89', 'type': 'website', 'subtype': 'html', 'tags': [], 'category': None, 'published_time': None, 'modified_time': None}),
     ('http://www.permaculturedesign.fr/pedagogie-montessori-ecole-enseigner-permaculture-design', {'title': 'Enseigner autrement avec la p\xe9dagogie Montessori.', 'url': 'http://www.permaculturedesign.fr/pedagogie-montessori-ecole-enseigner-permaculture-design', 'site_name': 'Blog du bureau d\u2019\xe9tudes PermacultureDesign', 'type': 'article', 'subtype': 'html', 'tags': [], 'category': None, 'published_time': None, 'modified_time': None}),
     # Image
@@ -29,7 +30,7 @@ TEST_URLS = [
     ('http://www.pdf995.com/samples/pdf.pdf', {'title': 'PDF', 'url': 'http://www.pdf995.com/samples/pdf.pdf', 'site_name': 'www.pdf995.com', 'type': 'application', 'subtype': 'pdf', 'tags': ['pdf,', 'create', 'pdf,', 'software,', 'acrobat,', 'adobe']}),
     # ('http://www.cbu.edu.zm/downloads/pdf-sample.pdf', {'title': 'This is a test PDF file', 'url': 'http://www.cbu.edu.zm/downloads/pdf-sample.pdf', 'site_name': 'www.cbu.edu.zm', 'type': 'application', 'subtype': 'pdf', 'tags': []}),
     # Video HTML
-    ('https://www.youtube.com/watch?v=4nzaATIOAAE', {'title': 'Sir Samuel - Urban Classik [CLIP OFFICIEL]', 'url': 'https://www.youtube.com/watch?v=4nzaATIOAAE', 'site_name': 'YouTube', 'type': 'video', 'subtype': 'html', 'image': 'https://i.ytimg.com/vi/4nzaATIOAAE/maxresdefault.jpg', 'generator': None, 'author': None, 'tags': ['sir', 'samuel', 'teaser', 'gallery', 'miroir', 'aime', 'casquette', 'reggae', 'ragga', 'dub', 'hip', 'hop', 'rap', 'saian', 'supa', 'crew', 'fefe', 'mental', 'offishall', 'secher', 'larmes', 'urban', '...'], 'video': 'https://www.youtube.com/embed/4nzaATIOAAE'}),
+    ('https://www.youtube.com/watch?v=4nzaATIOAAE', {'title': 'Sir Samuel - Urban Classik [CLIP OFFICIEL]', 'url': 'https://www.youtube.com/watch?v=4nzaATIOAAE', 'site_name': 'YouTube', 'type': 'video', 'subtype': 'html', 'image': 'https://i.ytimg.com/vi/4nzaATIOAAE/hqdefault.jpg', 'generator': None, 'author': 'Sir Samuel', 'tags': [], 'video': 'https://www.youtube.com/embed/4nzaATIOAAE'}),
     ('http://www.dailymotion.com/video/x2h2pgt_yannick-van-doorne-l-electroculture-une-technologie-d-avenir-meta-tv-1-4_tv', {'title': "Yannick Van Doorne - L'\xe9lectroculture une technologie d'avenir - Meta TV 3/4 - vid\xe9o Dailymotion", 'url': 'http://www.dailymotion.com/video/x2h2pgt', 'site_name': 'Dailymotion', 'type': 'video', 'subtype': 'html', 'image': 'http://s1.dmcdn.net/I8M_O/526x297-FRU.jpg', 'generator': None, 'author': None, 'tags': ['Agriculture'], 'video': 'http://www.dailymotion.com/embed/video/x2h2pgt?autoplay=1'}),
 
     ('http://www.koreus.com/video/faux-professeur-chimie.html', {'title': 'Un faux professeur le premier jour de cours (Blague)', 'url': 'http://www.koreus.com/video/faux-professeur-chimie.html', 'type': 'video.other', 'subtype': 'html', 'image': 'http://thumbshigh.koreus.com/201309/faux-professeur-chimie.jpg', 'generator': None, 'author': None, 'tags': ['uid Vid\xe9o', 'amphi', 'blague', 'chimie', 'cours', 'faux', 'professeur', 'vostfr', 'clip', 'fun', 'jeu', 'divertissement', 'loisir', 'humour', 'animation', 'gratuit'], 'video': 'http://www.koreus.com/video/faux-professeur-chimie/autostart', 'video_width': '1280', 'video_height': '720'}),
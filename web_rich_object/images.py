@@ -0,0 +1,151 @@
+"""Rank image candidates from HTML hints, without network"""
+import os
+import re
+try:
+    from urllib.parse import urlsplit
+except ImportError:
+    from urlparse import urlsplit
+
+from web_rich_object.utils import MIN_IMAGE_SIZE
+
+IMAGE_PROBE_COUNT = int(os.environ.get('WRO_IMAGE_PROBE_COUNT', 3))
+
+SIZE_REG = re.compile(r'^\s*(\d+)(?:px)?\s*$')
+URL_SIZE_REG = re.compile(r'(?<![0-9])(\d{2,4})[xX](\d{2,4})(?![0-9])')
+SRCSET_DESCRIPTOR_REG = re.compile(r'^(\d+(?:\.\d+)?)([wx])$')
+# Directories, or file names made of these words and numbers, of
+# decorations, trackers and ads
+SKIPPED_WORDS = frozenset([
+    'sprite', 'sprites', 'spacer', 'blank', 'pixel', 'transparent', 'favicon',
+    'icon', 'icons', 'tracking', 'tracker', 'beacon', 'analytics', 'ad', 'ads',
+    '1x1',
+])
+SKIPPED_HOSTS = ('doubleclick.net', 'google-analytics.com')
+SKIPPED_EXTENSIONS = ('.ico', '.svg')
+FILE_NAME_SEP_REG = re.compile(r'[-_.]+')
+NUMBER_REG = re.compile(r'^\d+(?:x\d+)?$')
+
+
+def is_skipped_url(url):
+    """
+    Whether ``url`` looks like a decoration, tracker or ad, from its host,
+    its directories and its file name.
+    """
+    parts = urlsplit(url)
+    hostname = (parts.hostname or '').lower()
+    if any(hostname == host or hostname.endswith('.' + host) for host in SKIPPED_HOSTS):
+        return True
+    path = parts.path.lower()
+    if path.endswith(SKIPPED_EXTENSIONS):
+        return True
+    segments = path.split('/')
+    if any(segment in SKIPPED_WORDS for segment in segments[:-1]):
+        return True
+    words = [w for w in FILE_NAME_SEP_REG.split(segments[-1].rsplit('.', 1)[0]) if w]
+    return (any(w in SKIPPED_WORDS for w in words) and
+            all(w in SKIPPED_WORDS or NUMBER_REG.match(w) for w in words))
+
+
+class ImageCandidate(object):
+    def __init__(self, url, width=None, height=None):
+        self.url = url
+        self.width = width
+        self.height = height
+
+    @property
+    def is_sized(self):
+        return self.width is not None and self.height is not None
+
+    @property
+    def is_too_small(self):
+        return ((self.width is not None and self.width < MIN_IMAGE_SIZE) or
+                (self.height is not None and self.height < MIN_IMAGE_SIZE))
+
+    @property
+    def score(self):
+        if self.is_sized:
+            return self.width * self.height
+        # Assume a square for partial hints, ranked under complete ones
+        side = self.width or self.height
+        if side:
+            return side * side // 2
+        return 0
+
+    def __repr__(self):
+        return '<ImageCandidate %s %sx%s>' % (self.url, self.width, self.height)
+
+
+def _parse_size(value):
+    if not value:
+        return None
+    match = SIZE_REG.match(value)
+    if match is None:
+        return None
+    return int(match.group(1))
+
+
+def parse_srcset(srcset):
+    """Return ``(url, width)`` of the biggest ``srcset`` candidate."""
+    best = (None, None, -1)
+    for candidate in srcset.split(','):
+        parts = candidate.split()
+        if not parts:
+            continue
+        url, width, weight = parts[0], None, 1
+        if len(parts) > 1:
+            match = SRCSET_DESCRIPTOR_REG.match(parts[1])
+            if match is not None:
+                value = float(match.group(1))
+                if match.group(2) == 'w':
+                    width = int(value)
+                    weight = width
+                else:
+                    weight = value
+        if weight > best[2]:
+            best = (url, width, weight)
+    return best[0], best[1]
+
+
+def get_candidate(attrs):
+    """Build an :class:`ImageCandidate` from ``<img>`` attributes."""
+    url = attrs.get('src')
+    width = _parse_size(attrs.get('width'))
+    height = _parse_size(attrs.get('height'))
+    srcset = attrs.get('srcset')
+    if srcset:
+        srcset_url, srcset_width = parse_srcset(srcset)
+        if srcset_url:
+            if srcset_width is not None and width and height:
+                height = height * srcset_width // width
+            if srcset_width is not None:
+                width = srcset_width
+            url = srcset_url
+    if not url:
+        return None
+    url = url.strip()
+    if url.startswith('data:') or is_skipped_url(url):
+        return None
+    if width is None and height is None:
+        match = URL_SIZE_REG.search(url)
+        if match is not None:
+            width, height = int(match.group(1)), int(match.group(2))
+    return ImageCandidate(url, width, height)
+
+
+def rank_images(img_attrs):
+    """
+    Sort ``<img>`` attributes by their estimated surface, dropping data
+    URIs, trackers, sprites, icons and images announced as too small.
+    """
+    candidates = []
+    seen = set()
+    for attrs in img_attrs:
+        candidate = get_candidate(attrs)
+        if candidate is None or candidate.is_too_small:
+            continue
+        if candidate.url in seen:
+            continue
+        seen.add(candidate.url)
+        candidates.append(candidate)
+    candidates.sort(key=lambda c: c.score, reverse=True)
+    return candidates
@@ -0,0 +1,49 @@
+"""
+Fields computed on first access, at most once across threads
+
+``cached_field`` replaces the ``hasattr(self, '_x')`` pattern of
+properties. The value is stored in the instance ``__dict__`` as
+``_<name>``, so a value set beforehand, by site extractors for instance, is
+used as is. Reading a computed field takes no lock. The first computation
+runs under a lock of the field, threads reading the field meanwhile wait
+for its value instead of computing it again. Different fields of an object
+are computed concurrently, so fields must not depend on each other in a
+cycle. A computation raising an error is attempted again on next access.
+"""
+import threading
+
+# Guards creation of field locks
+_locks_lock = threading.Lock()
+
+
+class cached_field(object):
+    def __init__(self, func):
+        self.func = func
+        self.name = func.__name__
+        self.attr = '_%s' % func.__name__
+        self.__doc__ = func.__doc__
+
+    def _get_lock(self, obj):
+        with _locks_lock:
+            locks = obj.__dict__.setdefault('_field_locks', {})
+            lock = locks.get(self.attr)
+            if lock is None:
+                # Reentrant for extractors reading fields being computed
+                lock = locks[self.attr] = threading.RLock()
+            return lock
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self
+        values = obj.__dict__
+        try:
+            return values[self.attr]
+        except KeyError:
+            pass
+        with self._get_lock(obj):
+            if self.attr not in values:
+                values[self.attr] = self.func(obj)
+            return values[self.attr]
+
+    def __set__(self, obj, value):
+        raise AttributeError("can't set attribute %s" % self.name)
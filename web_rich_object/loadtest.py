@@ -0,0 +1,146 @@
+"""
+Load driver measuring ``WebRichObject`` throughput under concurrency
+
+Run with ``python -m web_rich_object.loadtest [options] [url...]``, without
+URLs the corpus of a local stand-in server is used. With ``WRO_PROFILE``
+set, the cost of each field fallback branch is reported too.
+"""
+import argparse
+import threading
+import time
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+from web_rich_object import profiling
+from web_rich_object.api import WebRichObject
+
+PERCENTILES = (50, 90, 99)
+
+
+def get_max_rss():
+    """Peak resident memory of the process in KB, ``None`` if unknown."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of sorted ``values``."""
+    if not values:
+        return None
+    index = max(0, int(round(percent / 100.0 * len(values))) - 1)
+    return values[min(index, len(values) - 1)]
+
+
+def extract(url, **kwargs):
+    with WebRichObject(url, **kwargs) as wro:
+        return wro.to_dict()
+
+
+class LoadResult(object):
+    def __init__(self, latencies, errors, duration, max_rss):
+        self.latencies = sorted(latencies)
+        self.errors = errors
+        self.duration = duration
+        self.max_rss = max_rss
+
+    @property
+    def count(self):
+        return len(self.latencies) + self.errors
+
+    @property
+    def rate(self):
+        return self.count / self.duration if self.duration else 0
+
+    def percentiles(self):
+        return dict((p, percentile(self.latencies, p)) for p in PERCENTILES)
+
+    def report(self):
+        lines = [
+            'requests: %d (%d errors) in %.2fs' % (self.count, self.errors, self.duration),
+            'throughput: %.1f URL/s' % self.rate,
+        ]
+        for percent, latency in sorted(self.percentiles().items()):
+            if latency is not None:
+                lines.append('p%d: %.1fms' % (percent, latency * 1000))
+        if self.max_rss is not None:
+            lines.append('max RSS: %d KB' % self.max_rss)
+        return '\n'.join(lines)
+
+
+def run_load(urls, concurrency=8, requests=None, duration=None, func=extract,
+             **kwargs):
+    """
+    Call ``func(url, **kwargs)`` on ``urls`` in a loop from ``concurrency``
+    threads, until ``requests`` calls were made or ``duration`` seconds
+    elapsed (one pass over ``urls`` by default).
+    """
+    if requests is None and duration is None:
+        requests = len(urls)
+    lock = threading.Lock()
+    latencies = []
+    state = {'sent': 0, 'errors': 0}
+    start = time.time()
+
+    def next_url():
+        with lock:
+            if requests is not None and state['sent'] >= requests:
+                return None
+            if duration is not None and time.time() - start >= duration:
+                return None
+            url = urls[state['sent'] % len(urls)]
+            state['sent'] += 1
+            return url
+
+    def worker():
+        url = next_url()
+        while url is not None:
+            request_start = time.time()
+            try:
+                func(url, **kwargs)
+            except Exception:
+                with lock:
+                    state['errors'] += 1
+            else:
+                latency = time.time() - request_start
+                with lock:
+                    latencies.append(latency)
+            url = next_url()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return LoadResult(latencies, state['errors'], time.time() - start, get_max_rss())
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('urls', nargs='*')
+    parser.add_argument('-c', '--concurrency', type=int, default=8)
+    parser.add_argument('-n', '--requests', type=int)
+    parser.add_argument('-d', '--duration', type=float, default=10)
+    parser.add_argument('--latency', type=float, default=0,
+                        help="Stand-in server latency in seconds")
+    parser.add_argument('--rate', type=int, default=0,
+                        help="Stand-in server bandwidth in bytes per second")
+    args = parser.parse_args(args)
+    duration = None if args.requests else args.duration
+    if args.urls:
+        result = run_load(args.urls, args.concurrency, args.requests, duration)
+    else:
+        from web_rich_object.tests.server import StandInServer
+        with StandInServer(latency=args.latency, rate=args.rate) as server:
+            urls = [server.url(path) for path in sorted(server.httpd.corpus)]
+            result = run_load(urls, args.concurrency, args.requests, duration)
+    print(result.report())
+    if profiling.PROFILE:
+        print(profiling.DEFAULT_PROFILER.report())
+
+
+if __name__ == '__main__':
+    main()
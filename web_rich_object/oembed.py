@@ -0,0 +1,179 @@
+"""oEmbed providers and endpoint discovery"""
+import json
+import re
+try:
+    from urllib.parse import urlsplit, urlencode, parse_qsl
+except ImportError:
+    from urlparse import urlsplit, parse_qsl
+    from urllib import urlencode
+
+from web_rich_object.cache import MemoryCache
+from web_rich_object.sites import SiteExtractor, FETCH_ERRORS
+
+# (endpoint, URL schemes) with ``*`` as wildcard
+PROVIDERS = (
+    ('https://www.youtube.com/oembed', (
+        'https://*.youtube.com/watch*',
+        'https://*.youtube.com/shorts/*',
+        'https://youtu.be/*',
+    )),
+    ('https://vimeo.com/api/oembed.json', (
+        'https://vimeo.com/*',
+        'https://player.vimeo.com/video/*',
+    )),
+    ('https://www.dailymotion.com/services/oembed', (
+        'https://www.dailymotion.com/video/*',
+        'https://dai.ly/*',
+    )),
+    ('https://www.flickr.com/services/oembed/', (
+        'https://*.flickr.com/photos/*',
+        'https://flic.kr/p/*',
+    )),
+    ('https://soundcloud.com/oembed', (
+        'https://soundcloud.com/*',
+    )),
+    ('https://open.spotify.com/oembed', (
+        'https://open.spotify.com/*',
+    )),
+    ('https://publish.twitter.com/oembed', (
+        'https://twitter.com/*/status/*',
+        'https://x.com/*/status/*',
+    )),
+)
+OEMBED_LINK_REG = re.compile(
+    br'<link\b[^>]*\btype=["\']application/json\+oembed["\'][^>]*>',
+    re.IGNORECASE)
+HREF_REG = re.compile(br'\bhref=["\']([^"\']+)["\']', re.IGNORECASE)
+IFRAME_SRC_REG = re.compile(r'<iframe\b[^>]*\bsrc=["\']([^"\']+)["\']',
+                            re.IGNORECASE)
+# Stop looking for discovery links after the head
+DISCOVERY_MAX_SIZE = 64 * 1024
+OEMBED_TYPES = {
+    'video': 'video',
+    'photo': 'image',
+    'rich': 'website',
+    'link': 'website',
+}
+
+
+def _compile_scheme(scheme):
+    # Accept both protocols and escape everything but wildcards
+    scheme = re.sub(r'^https?://', '', scheme)
+    pattern = '.*'.join(re.escape(part) for part in scheme.split('*'))
+    return re.compile(r'^https?://%s$' % pattern, re.IGNORECASE)
+
+
+def discover(html):
+    """Find the JSON oEmbed endpoint announced by a page."""
+    match = OEMBED_LINK_REG.search(html[:DISCOVERY_MAX_SIZE])
+    if match is None:
+        return None
+    href = HREF_REG.search(match.group(0))
+    if href is None:
+        return None
+    return href.group(1).decode('utf-8', 'ignore').replace('&amp;', '&')
+
+
+def get_fields(data):
+    """Map an oEmbed response to ``WebRichObject`` fields."""
+    fields = {
+        'title': data.get('title'),
+        'author': data.get('author_name'),
+        'site_name': data.get('provider_name'),
+        'type': OEMBED_TYPES.get(data.get('type')),
+        'image': data.get('thumbnail_url'),
+    }
+    if data.get('type') == 'photo':
+        fields['image'] = data.get('url') or fields['image']
+    elif data.get('type') == 'video':
+        iframe_src = IFRAME_SRC_REG.search(data.get('html') or '')
+        if iframe_src is not None:
+            fields['video'] = iframe_src.group(1)
+        if data.get('width'):
+            fields['video_width'] = str(data['width'])
+        if data.get('height'):
+            fields['video_height'] = str(data['height'])
+    return dict((k, v) for k, v in fields.items() if v)
+
+
+def _same_site(host, other):
+    """
+    Whether ``host`` and ``other`` are the same host or one is a subdomain
+    of the other. Without a public suffix list, sibling subdomains are not
+    taken as the same site.
+    """
+    return (host == other or host.endswith('.' + other) or
+            other.endswith('.' + host))
+
+
+class OembedProviders(SiteExtractor):
+    """
+    Resolve URLs through oEmbed endpoints, from known providers or from
+    the endpoint announced by a page of the same host on an earlier
+    download. Announced endpoints are only kept if served by the site
+    itself, so a page can't send the other pages of its host elsewhere.
+    """
+    def __init__(self, providers=PROVIDERS, discovered_cache=None,
+                 user_agent=None):
+        super(OembedProviders, self).__init__(user_agent=user_agent)
+        self._providers = []
+        for endpoint, schemes in providers:
+            self.register(endpoint, schemes)
+        if discovered_cache is None:
+            discovered_cache = MemoryCache(max_size=10000, ttl=24*3600)
+        self.discovered = discovered_cache
+
+    def register(self, endpoint, schemes):
+        for scheme in schemes:
+            self._providers.append((_compile_scheme(scheme), endpoint))
+
+    def get_endpoint(self, url):
+        for scheme, endpoint in self._providers:
+            if scheme.match(url):
+                return endpoint, {}
+        hostname = urlsplit(url).hostname
+        if not hostname:
+            return None
+        discovered = self.discovered.get(hostname)
+        if discovered is not None:
+            return discovered['endpoint'], discovered['params']
+        return None
+
+    def add_discovered(self, url, oembed_url):
+        """
+        Remember the oEmbed endpoint announced by the page at ``url`` for
+        its host, if the endpoint is on the same site.
+        """
+        hostname = urlsplit(url).hostname
+        endpoint, _, query = oembed_url.partition('?')
+        endpoint_hostname = urlsplit(endpoint).hostname
+        if not hostname or not endpoint_hostname or \
+                not _same_site(hostname, endpoint_hostname):
+            return
+        params = dict((k, v) for k, v in parse_qsl(query) if k != 'url')
+        self.discovered.set(hostname, {'endpoint': endpoint, 'params': params})
+
+    def get_oembed_url(self, url):
+        endpoint = self.get_endpoint(url)
+        if endpoint is None:
+            return None
+        endpoint, params = endpoint
+        params = dict(params, url=url)
+        params.setdefault('format', 'json')
+        separator = '&' if '?' in endpoint else '?'
+        return endpoint + separator + urlencode(sorted(params.items()))
+
+    def extract(self, url, user_agent=None):
+        oembed_url = self.get_oembed_url(url)
+        if oembed_url is None:
+            return None
+        try:
+            data = json.loads(self.fetch(oembed_url, user_agent).decode('utf-8'))
+        except FETCH_ERRORS:
+            return None
+        if not isinstance(data, dict):
+            return None
+        return get_fields(data)
+
+
+DEFAULT_PROVIDERS = OembedProviders()
@@ -0,0 +1,191 @@
+"""HTML parsing modes"""
+import os
+import re
+try:
+    from html import unescape
+    from html.parser import HTMLParser
+    HTML_PARSE_ERRORS = (AssertionError,)
+except ImportError:
+    from HTMLParser import HTMLParser, HTMLParseError
+    unescape = HTMLParser().unescape
+    HTML_PARSE_ERRORS = (AssertionError, HTMLParseError)
+
+from web_rich_object.fingerprint import HEAD_END_REG
+
+PARSE_MODE_FULL = 'full'
+PARSE_MODE_BOUNDED = 'bounded'
+PARSE_MODE = os.environ.get('WRO_PARSE_MODE', PARSE_MODE_FULL)
+PARSE_MAX_PARAGRAPHS = int(os.environ.get('WRO_PARSE_MAX_PARAGRAPHS', 20))
+HEAD_END_SEARCH_SIZE = int(os.environ.get('WRO_HEAD_END_SEARCH_SIZE', 256*1024))
+
+KEPT_TAGS = ('meta', 'title', 'link', 'video', 'source', 'img')
+VOID_TAGS = ('meta', 'link', 'source', 'img')
+NEWLINE_REG = re.compile('\n')
+TEXT_HEAD_END_REG = re.compile(HEAD_END_REG.pattern.decode('ascii'), re.IGNORECASE)
+
+
+class BoundedFilter(HTMLParser):
+    """
+    Find the parts of a document used by extraction: top-level tags in
+    ``KEPT_TAGS``, paragraphs, JSON-LD scripts and MediaWiki thumbnails,
+    with their content, and the ``<html>`` start tag. Everything else
+    (scripts, styles, body markup) is blanked out by ``reduce``, keeping
+    newlines so that parsed tags have their positions in the document.
+    Paragraphs stop being kept after ``max_paragraphs`` with text.
+    """
+    def __init__(self, max_paragraphs=PARSE_MAX_PARAGRAPHS):
+        HTMLParser.__init__(self)
+        self.max_paragraphs = max_paragraphs
+        self.paragraphs = 0
+        # (start, end) offsets of kept parts
+        self.regions = []
+        self._text = u''
+        self._line_starts = [0]
+        # Kept tag being read, with its start offset and nesting depth
+        self._tag = None
+        self._start = 0
+        self._depth = 0
+        self._has_text = False
+        self._html_found = False
+
+    def _offset(self):
+        line, column = self.getpos()
+        return self._line_starts[line - 1] + column
+
+    def keep(self, name, attrs):
+        if name in KEPT_TAGS:
+            return True
+        if name == 'p':
+            return self.paragraphs < self.max_paragraphs
+        if name == 'script':
+            return (attrs.get('type') or '').lower() == 'application/ld+json'
+        # MediaWiki thumbnails
+        if name == 'div':
+            return 'thumbinner' in (attrs.get('class') or '')
+        return False
+
+    def _close_tag(self, end):
+        self.regions.append((self._start, end))
+        # Empty and spacer paragraphs don't count
+        if self._tag == 'p' and self._has_text:
+            self.paragraphs += 1
+        self._tag = None
+
+    def handle_starttag(self, name, attrs):
+        if self._tag is not None:
+            if name != self._tag:
+                return
+            # Paragraphs are closed by the next one
+            if name != 'p':
+                self._depth += 1
+                return
+            self._close_tag(self._offset())
+        start = self._offset()
+        end = start + len(self.get_starttag_text())
+        if name == 'html':
+            if not self._html_found:
+                self._html_found = True
+                self.regions.append((start, end))
+        elif self.keep(name, dict(attrs)):
+            if name in VOID_TAGS:
+                self.regions.append((start, end))
+            else:
+                self._tag, self._start, self._depth = name, start, 1
+                self._has_text = False
+
+    def handle_startendtag(self, name, attrs):
+        if self._tag is None and name != 'html' and self.keep(name, dict(attrs)):
+            start = self._offset()
+            self.regions.append((start, start + len(self.get_starttag_text())))
+
+    def handle_endtag(self, name):
+        if name != self._tag:
+            return
+        self._depth -= 1
+        if not self._depth:
+            start = self._offset()
+            end = self._text.find('>', start) + 1 or len(self._text)
+            self._close_tag(end)
+
+    def handle_data(self, data):
+        if self._tag is not None and not self._has_text:
+            self._has_text = bool(data.strip())
+
+    def handle_entityref(self, name):
+        self.handle_data(unescape('&%s;' % name))
+
+    def handle_charref(self, name):
+        self.handle_data(unescape('&#%s;' % name))
+
+    def reduce(self, text):
+        """``text`` with the parts not kept replaced by spaces."""
+        self._text = text
+        for match in NEWLINE_REG.finditer(text):
+            self._line_starts.append(match.end())
+        self.feed(text)
+        self.close()
+        if self._tag is not None:
+            self._close_tag(len(text))
+        parts = []
+        position = 0
+        for start, end in self.regions:
+            last_newline = text.rfind('\n', position, start)
+            if last_newline == -1:
+                parts.append(' ' * (start - position))
+            else:
+                parts.append('\n' * text.count('\n', position, start))
+                parts.append(' ' * (start - last_newline - 1))
+            parts.append(text[start:end])
+            position = end
+        return u''.join(parts)
+
+
+def parse_bounded(html, max_paragraphs=PARSE_MAX_PARAGRAPHS):
+    # Heavy, imported on first parse
+    import bs4
+    from bs4.dammit import UnicodeDammit
+    encoding = None
+    text = html
+    if isinstance(html, bytes):
+        dammit = UnicodeDammit(html, is_html=True)
+        text, encoding = dammit.unicode_markup, dammit.original_encoding
+    if text is None:
+        return bs4.BeautifulSoup(html, 'html.parser')
+    try:
+        reduced = BoundedFilter(max_paragraphs=max_paragraphs).reduce(text)
+    except HTML_PARSE_ERRORS:
+        return bs4.BeautifulSoup(html, 'html.parser')
+    soup = bs4.BeautifulSoup(reduced, 'html.parser')
+    # Positions of tags are in the decoded document
+    soup.original_encoding = encoding
+    return soup
+
+
+def get_head_end(html, encoding=None):
+    """
+    Position of ``</head>`` in ``html`` as ``(line, column)``, comparable
+    to ``sourceline`` and ``sourcepos`` of parsed tags, ``None`` if absent.
+    Bytes are decoded with ``encoding``, the one detected by the parser.
+    """
+    if isinstance(html, bytes):
+        match, newline = HEAD_END_REG.search(html), b'\n'
+    else:
+        match, newline = TEXT_HEAD_END_REG.search(html), u'\n'
+    if match is None:
+        return None
+    prefix = html[:match.start()]
+    line = prefix[prefix.rfind(newline) + 1:]
+    if isinstance(line, bytes):
+        line = line.decode(encoding or 'utf-8', 'replace')
+    return prefix.count(newline) + 1, len(line)
+
+
+def parse_html(html, mode=None):
+    mode = mode or PARSE_MODE
+    if mode == PARSE_MODE_BOUNDED:
+        return parse_bounded(html)
+    if mode != PARSE_MODE_FULL:
+        raise ValueError("Unknown parse mode: %s" % mode)
+    # Heavy, imported on first parse
+    import bs4
+    return bs4.BeautifulSoup(html, 'html.parser')
@@ -0,0 +1,83 @@
+"""One-time initialisation before forking workers"""
+import gc
+
+from web_rich_object import adaptive, buffers, parsing, profiling, timestamps
+from web_rich_object.cache import MemoryCache
+
+WARMUP_URL = 'http://example.com/warmup'
+WARMUP_HTML = b"""<html lang="en"><head>
+<title>Warm-up</title>
+<meta property="og:title" content="Warm-up"/>
+<meta property="og:type" content="article"/>
+<meta property="og:image" content="http://example.com/warmup.jpg"/>
+<meta property="og:url" content="http://example.com/warmup"/>
+<meta name="description" content="Warm-up"/>
+<meta property="article:published_time" content="2016-01-01T00:00:00+00:00"/>
+<script type="application/ld+json">{"@type": "Article", "headline": "Warm-up"}</script>
+</head><body><p>Warm-up</p></body></html>"""
+# Minimal document, read by pdfminer's fallback parser
+WARMUP_PDF = (
+    b'%PDF-1.4\n1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n'
+    b'2 0 obj\n<< /Type /Pages /Kids [] /Count 0 >>\nendobj\n'
+    b'3 0 obj\n<< /Title (Warm-up) /CreationDate (D:20160101000000Z) >>\nendobj\n'
+    b'trailer\n<< /Size 4 /Root 1 0 R /Info 3 0 R >>\n%%EOF\n'
+)
+
+
+class _WarmupInfo(object):
+    def __init__(self):
+        self.headers = ['Content-Type: text/html\r\n']
+        self.maintype = 'text'
+        self.subtype = 'html'
+        self.type = 'text/html'
+
+
+class _WarmupResponse(object):
+    def __init__(self, body):
+        self._body = buffers.BufferReader(body)
+
+    def info(self):
+        return _WarmupInfo()
+
+    def read(self, size=-1):
+        return self._body.read(size)
+
+    def close(self):
+        pass
+
+
+def warmup(freeze=True):
+    """
+    Import the lazily loaded parsers and run them once on small documents,
+    so pre-fork servers do it in the master instead of each worker's first
+    request. With ``freeze``, objects created so far are moved out of the
+    garbage collector (Python 3.7+) to keep their pages shared after fork.
+    The warm-up page is served without network and its extraction is kept
+    out of the shared timestamp formats, learnt sources and profiler.
+    """
+    # Avoid circular import
+    from web_rich_object.api import WebRichObject
+
+    class WarmupObject(WebRichObject):
+        def urlopen(self, url, headers):
+            self.final_url = url
+            return _WarmupResponse(WARMUP_HTML)
+    import chardet
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdfdocument import PDFDocument
+    from PIL import Image
+
+    # Registers all image plugins, done on first open otherwise
+    Image.init()
+    chardet.detect(WARMUP_PDF)
+    PDFDocument(PDFParser(buffers.BufferReader(WARMUP_PDF))).info
+    for mode in (parsing.PARSE_MODE_FULL, parsing.PARSE_MODE_BOUNDED):
+        with WarmupObject(
+                WARMUP_URL, parse_mode=mode,
+                timestamp_parser=timestamps.TimestampParser(),
+                learner=adaptive.SourceLearner(cache=MemoryCache()),
+                profiler=profiling.Profiler()) as wro:
+            wro.to_dict()
+    if freeze and hasattr(gc, 'freeze'):
+        gc.collect()
+        gc.freeze()
@@ -0,0 +1,158 @@
+"""
+Cache of extracted fields serving stale entries
+
+An entry is fresh for ``ttl`` seconds. For ``stale_while_revalidate``
+seconds more, it is returned as is while a background thread refreshes it.
+Within ``stale_if_error`` seconds after expiration, a synchronous refresh is
+attempted but the stale entry is served if it fails or doesn't finish within
+``refresh_timeout``. Each key has at most one refresh in flight.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+
+from web_rich_object import fingerprint, timestamps, urls
+from web_rich_object.cache import MemoryCache
+
+PREVIEW_TTL = int(os.environ.get('WRO_PREVIEW_TTL', 3600))
+PREVIEW_STALE_WHILE_REVALIDATE = int(os.environ.get('WRO_PREVIEW_STALE_WHILE_REVALIDATE', 24*3600))
+PREVIEW_STALE_IF_ERROR = int(os.environ.get('WRO_PREVIEW_STALE_IF_ERROR', 7*24*3600))
+PREVIEW_REFRESH_TIMEOUT = float(os.environ.get('WRO_PREVIEW_REFRESH_TIMEOUT', 5))
+PREVIEW_MAX_REFRESHES = int(os.environ.get('WRO_PREVIEW_MAX_REFRESHES', 8))
+TIME_FIELDS = ('created_time', 'published_time', 'modified_time')
+
+
+def dump_fields(fields):
+    """Make extracted fields JSON serializable."""
+    return dict(
+        (k, v.isoformat() if isinstance(v, datetime) else v)
+        for k, v in fields.items()
+    )
+
+
+def load_fields(fields):
+    fields = dict(fields)
+    for field in TIME_FIELDS:
+        if fields.get(field):
+            fields[field] = timestamps.parse_timestamp(fields[field])
+    return fields
+
+
+def extract(url, previous=None):
+    """Extract fields of ``url``, reusing ``previous`` if its head is unchanged."""
+    return fingerprint.refresh(url, previous)
+
+
+class _Refresh(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.fields = None
+        self.error = None
+
+
+class PreviewCache(object):
+    def __init__(self, cache=None, ttl=PREVIEW_TTL,
+                 stale_while_revalidate=PREVIEW_STALE_WHILE_REVALIDATE,
+                 stale_if_error=PREVIEW_STALE_IF_ERROR,
+                 refresh_timeout=PREVIEW_REFRESH_TIMEOUT,
+                 max_refreshes=PREVIEW_MAX_REFRESHES, extract=extract):
+        if cache is None:
+            cache = MemoryCache()
+        self.cache = cache
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stale_if_error = stale_if_error
+        self.refresh_timeout = refresh_timeout
+        self.extract = extract
+        self._refreshes = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_refreshes)
+
+    def get_key(self, url):
+        return urls.canonicalize_url(url)
+
+    def _store(self, key, fields):
+        entry = {'fields': dump_fields(fields), 'expires': time.time() + self.ttl}
+        stale_ttl = max(self.stale_while_revalidate, self.stale_if_error)
+        self.cache.set(key, entry, ttl=self.ttl + stale_ttl)
+
+    def _run_refresh(self, key, url, previous, refresh):
+        try:
+            fields = self.extract(url, previous)
+            self._store(key, fields)
+            refresh.fields = fields
+        except Exception as err:
+            # Stale entry kept
+            refresh.error = err
+        finally:
+            with self._lock:
+                self._refreshes.pop(key, None)
+            self._slots.release()
+            refresh.done.set()
+
+    def _refresh(self, key, url, previous):
+        """
+        Start a background refresh of ``key`` unless one is in flight.
+        Returns the refresh or ``None`` if no thread is available.
+        """
+        with self._lock:
+            refresh = self._refreshes.get(key)
+            if refresh is not None:
+                return refresh
+            if not self._slots.acquire(False):
+                return None
+            refresh = self._refreshes[key] = _Refresh()
+        thread = threading.Thread(target=self._run_refresh,
+                                  args=(key, url, previous, refresh))
+        thread.daemon = True
+        thread.start()
+        return refresh
+
+    def get(self, url):
+        """
+        Get fields of ``url``, from cache when possible. Raises extraction
+        errors when there is no entry to serve.
+        """
+        key = self.get_key(url)
+        return self._get(key, url, self.cache.get(key))
+
+    def get_many(self, page_urls):
+        """
+        Get fields of ``page_urls`` as a dict, looking up all entries at
+        once. URLs whose extraction fails are left out.
+        """
+        keys = dict((url, self.get_key(url)) for url in page_urls)
+        entries = self.cache.get_many(set(keys.values()))
+        results = {}
+        for url, key in keys.items():
+            try:
+                results[url] = self._get(key, url, entries.get(key))
+            except Exception:
+                continue
+        return results
+
+    def _get(self, key, url, entry):
+        if entry is None:
+            fields = self.extract(url, None)
+            self._store(key, fields)
+            return fields
+        fields = load_fields(entry['fields'])
+        age = time.time() - entry['expires']
+        if age <= 0:
+            return fields
+        if age <= self.stale_while_revalidate:
+            self._refresh(key, url, fields)
+            return fields
+        if age <= self.stale_if_error:
+            refresh = self._refresh(key, url, fields)
+            if refresh is not None and refresh.done.wait(self.refresh_timeout):
+                if refresh.fields is not None:
+                    return refresh.fields
+            return fields
+        fields = self.extract(url, fields)
+        self._store(key, fields)
+        return fields
+
+    def invalidate(self, url):
+        self.cache.delete(self.get_key(url))
@@ -0,0 +1,299 @@
+"""
+Image size probing shared by a batch of pages
+
+An ``ImageProber`` given to ``WebRichObject`` as ``image_prober`` replaces
+the sequential ``get_image_size`` calls of the biggest image fallback:
+
+- candidates of a page are probed concurrently, with at most
+  ``concurrency`` probes in flight overall and ``host_concurrency`` per host
+- a URL being probed for another page is waited for instead of probed
+  again, results go to the image size cache
+- HTTP connections are kept alive and reused per host
+- only the first ``PROBE_RANGE_SIZE`` bytes are requested and reading
+  stops once the image header gave its size
+
+``resolve_images`` resolves the image of a batch of objects sharing a prober.
+"""
+import os
+import threading
+try:
+    from http.client import HTTPConnection, HTTPSConnection, HTTPException
+    from urllib.error import HTTPError, URLError
+    from urllib.parse import urlsplit, urljoin
+except ImportError:
+    from httplib import HTTPConnection, HTTPSConnection, HTTPException
+    from urllib2 import HTTPError, URLError
+    from urlparse import urlsplit, urljoin
+
+from web_rich_object import utils, profiling, failures, redirects
+
+PROBE_CONCURRENCY = int(os.environ.get('WRO_PROBE_CONCURRENCY', 16))
+PROBE_HOST_CONCURRENCY = int(os.environ.get('WRO_PROBE_HOST_CONCURRENCY', 4))
+PROBE_TIMEOUT = float(os.environ.get('WRO_PROBE_TIMEOUT', 10))
+PROBE_RANGE_SIZE = int(os.environ.get('WRO_PROBE_RANGE_SIZE', 64*1024))
+PROBE_MAX_SIZE = int(os.environ.get('WRO_PROBE_MAX_SIZE', 10*10**6))
+PROBE_MAX_REDIRECTS = 3
+PROBE_CHUNK_SIZE = 8*1024
+# Left over bytes read to keep a connection alive, instead of closing it
+PROBE_DRAIN_MAX_SIZE = PROBE_RANGE_SIZE
+NETWORK_ERRORS = (IOError, OSError, HTTPException)
+# Objects failing to resolve their image, on network errors or invalid URLs
+RESOLVE_ERRORS = NETWORK_ERRORS + (ValueError,)
+CONNECTION_CLASSES = {'http': HTTPConnection, 'https': HTTPSConnection}
+
+
+class _Host(object):
+    """Idle keep-alive connections and concurrency slots of a host."""
+    def __init__(self, scheme, netloc, concurrency, timeout):
+        self.scheme = scheme
+        self.netloc = netloc
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Get an idle connection or a new one, and whether it was idle."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        connection_class = CONNECTION_CLASSES[self.scheme]
+        return connection_class(self.netloc, timeout=self.timeout), False
+
+    def release(self, connection, reusable):
+        if reusable:
+            with self._lock:
+                self._idle.append(connection)
+        else:
+            connection.close()
+
+    def close(self):
+        with self._lock:
+            for connection in self._idle:
+                connection.close()
+            del self._idle[:]
+
+
+def read_image_size(response):
+    """
+    Size of the image being read from ``response``, as ``get_image_size``,
+    the body is read until the image header is parsed. ``None`` if the
+    header doesn't fit in the requested range, the size is then unknown.
+    """
+    # Heavy, imported on first image
+    from PIL import ImageFile
+    parser = ImageFile.Parser()
+    size = 0
+    while size < PROBE_MAX_SIZE:
+        chunk = response.read(PROBE_CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        try:
+            parser.feed(chunk)
+        except Exception:
+            return {}
+        if parser.image is not None:
+            width, height = parser.image.size
+            return {
+                'width': width,
+                'height': height,
+                'content_type': response.getheader('Content-Type'),
+            }
+    if size >= PROBE_MAX_SIZE or (response.status == 206 and size >= PROBE_RANGE_SIZE):
+        return None
+    return {}
+
+
+def drain(response):
+    """
+    Read what is left of a small response once its image header was
+    parsed, so that its connection can be reused. Returns whether the
+    response is now fully read.
+    """
+    if response.isclosed():
+        return True
+    if response.length is not None and response.length > PROBE_DRAIN_MAX_SIZE:
+        return False
+    try:
+        response.read(PROBE_DRAIN_MAX_SIZE + 1)
+    except NETWORK_ERRORS:
+        return False
+    return response.isclosed()
+
+
+class ImageProber(object):
+    def __init__(self, cache=None, guard=None, concurrency=PROBE_CONCURRENCY,
+                 host_concurrency=PROBE_HOST_CONCURRENCY, timeout=PROBE_TIMEOUT):
+        self.cache = utils.IMAGE_CACHE if cache is None else cache
+        self.guard = failures.DEFAULT_GUARD if guard is None else guard
+        self.concurrency = concurrency
+        self.host_concurrency = host_concurrency
+        self.timeout = timeout
+        # Count of network probes
+        self.probes = 0
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._hosts = {}
+        # url: event set once probed
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _get_host(self, scheme, netloc):
+        with self._lock:
+            host = self._hosts.get((scheme, netloc))
+            if host is None:
+                host = self._hosts[(scheme, netloc)] = _Host(
+                    scheme, netloc, self.host_concurrency, self.timeout)
+            return host
+
+    def _request(self, host, path, headers):
+        connection, idle = host.acquire()
+        try:
+            connection.request('GET', path, headers=headers)
+            return connection, connection.getresponse()
+        except NETWORK_ERRORS:
+            connection.close()
+            if not idle:
+                raise
+        # Closed by the server while idle
+        return self._request(host, path, headers)
+
+    def _fetch(self, url, user_agent):
+        """Size of the image at ``url``, raises network errors."""
+        headers = {'Range': 'bytes=0-%d' % (PROBE_RANGE_SIZE - 1)}
+        if user_agent:
+            headers['User-Agent'] = user_agent
+        for _ in range(PROBE_MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            if parts.scheme not in CONNECTION_CLASSES:
+                return {}
+            host = self._get_host(parts.scheme, parts.netloc)
+            path = (parts.path or '/') + ('?' + parts.query if parts.query else '')
+            with host.slots:
+                connection, response = self._request(host, path, headers)
+                try:
+                    location = response.getheader('Location')
+                    if response.status in redirects.REDIRECT_CODES and location:
+                        response.read()
+                        url = urljoin(url, location)
+                        continue
+                    if response.status >= 400:
+                        raise HTTPError(url, response.status, response.reason,
+                                        response.msg, None)
+                    return read_image_size(response)
+                finally:
+                    reusable = drain(response) and not response.will_close
+                    if not reusable:
+                        response.close()
+                    host.release(connection, reusable)
+        raise redirects.TooManyRedirects("More than %d redirections from %s" % (
+            PROBE_MAX_REDIRECTS, url))
+
+    def _probe(self, url, user_agent):
+        try:
+            try:
+                self.guard.check(url)
+            except URLError:
+                return None
+            with self._slots:
+                with self._lock:
+                    self.probes += 1
+                try:
+                    size = self._fetch(url, user_agent)
+                except NETWORK_ERRORS as err:
+                    self.guard.failure(url, err)
+                    return None
+            self.guard.success(url)
+            # Probed again with the next batch if unknown
+            if size is not None:
+                self.cache.set(url, size)
+            return size
+        finally:
+            with self._lock:
+                self._inflight.pop(url).set()
+
+    def probe(self, urls, user_agent=None):
+        """
+        Sizes of ``urls`` as a dict, like ``get_image_size`` with ``None``
+        for network errors and unknown sizes.
+        """
+        sizes = {}
+        owned = []
+        waited = []
+        with self._lock:
+            for url in urls:
+                if url in sizes or url in owned:
+                    continue
+                size = self.cache.get(url)
+                if size is not None:
+                    sizes[url] = size
+                elif url in self._inflight:
+                    waited.append((url, self._inflight[url]))
+                else:
+                    self._inflight[url] = threading.Event()
+                    owned.append(url)
+        for _ in owned:
+            profiling.count_fetch()
+        queue = list(owned)
+
+        def worker():
+            while True:
+                try:
+                    url = queue.pop()
+                except IndexError:
+                    return
+                sizes[url] = self._probe(url, user_agent)
+        threads = [threading.Thread(target=worker)
+                   for _ in range(min(len(owned), self.concurrency) - 1)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        worker()
+        for thread in threads:
+            thread.join()
+        for url, event in waited:
+            event.wait()
+            sizes[url] = self.cache.get(url)
+        return sizes
+
+    def get_biggest_image(self, urls, user_agent=None):
+        return utils.pick_biggest_image(urls, self.probe(urls, user_agent=user_agent))
+
+    def close(self):
+        with self._lock:
+            for host in self._hosts.values():
+                host.close()
+            self._hosts.clear()
+
+
+def resolve_images(wros, prober=None, concurrency=PROBE_CONCURRENCY):
+    """
+    Resolve the ``image`` of ``wros`` from ``concurrency`` threads sharing
+    ``prober``, so candidates common to pages are probed once. Returns the
+    list of images, ``None`` for objects failing to resolve it.
+    """
+    prober = ImageProber() if prober is None else prober
+    wros = list(wros)
+    results = [None] * len(wros)
+    queue = list(reversed(range(len(wros))))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                if not queue:
+                    return
+                index = queue.pop()
+            wro = wros[index]
+            wro.image_prober = prober
+            try:
+                results[index] = wro.image
+            except RESOLVE_ERRORS:
+                pass
+    threads = [threading.Thread(target=worker)
+               for _ in range(min(len(wros), concurrency))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
@@ -0,0 +1,160 @@
+"""
+Cost of each field fallback branch
+
+When ``WRO_PROFILE`` is set, or with ``profiler`` given to
+``WebRichObject``, the time spent resolving each source of a field is
+recorded with the tree scans and network sub-fetches it triggered. Nested
+branches (the document parsed while reading the first source, a field used
+by an extractor) are recorded on their own and excluded from their parent.
+Stats of all objects are aggregated by a ``Profiler``, per site too.
+"""
+import os
+import threading
+import time
+
+PROFILE = os.environ.get('WRO_PROFILE', '') not in ('', '0')
+REPORT_LIMIT = 20
+REPORT_SITES = 3
+
+_local = threading.local()
+
+
+class BranchStats(object):
+    __slots__ = ('calls', 'time', 'tree_scans', 'fetches')
+
+    def __init__(self):
+        self.calls = 0
+        self.time = 0.0
+        self.tree_scans = 0
+        self.fetches = 0
+
+    def add(self, other):
+        self.calls += other.calls
+        self.time += other.time
+        self.tree_scans += other.tree_scans
+        self.fetches += other.fetches
+
+
+class _NullBranch(object):
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_BRANCH = _NullBranch()
+
+
+class _Branch(object):
+    def __init__(self, profile, field, branch):
+        self.profile = profile
+        self.key = (field, branch)
+        self.stats = BranchStats()
+        self.child_time = 0.0
+
+    def __enter__(self):
+        self.stack = getattr(_local, 'stack', None)
+        if self.stack is None:
+            self.stack = _local.stack = []
+        self.stack.append(self)
+        self.start = time.time()
+        return self.stats
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        elapsed = time.time() - self.start
+        self.stack.pop()
+        if self.stack:
+            self.stack[-1].child_time += elapsed
+        self.stats.calls += 1
+        self.stats.time += elapsed - self.child_time
+        self.profile.record(self.key, self.stats)
+        return False
+
+
+def _current():
+    stack = getattr(_local, 'stack', None)
+    return stack[-1].stats if stack else None
+
+
+def count_tree_scan():
+    """Count a document traversal in the current branch, if profiling."""
+    stats = _current()
+    if stats is not None:
+        stats.tree_scans += 1
+
+
+def count_fetch():
+    """Count a network sub-fetch in the current branch, if profiling."""
+    stats = _current()
+    if stats is not None:
+        stats.fetches += 1
+
+
+class Profile(object):
+    """Stats of a single object, forwarded to ``profiler``."""
+    def __init__(self, site=None, profiler=None):
+        self.site = site
+        self.profiler = profiler
+        self.stats = {}
+
+    def branch(self, field, branch):
+        return _Branch(self, field, branch)
+
+    def wrap_source(self, field, get_source):
+        def profiled_get_source(kind, key):
+            with self.branch(field, '%s:%s' % (kind, key)):
+                return get_source(kind, key)
+        return profiled_get_source
+
+    def record(self, key, stats):
+        self.stats.setdefault(key, BranchStats()).add(stats)
+        if self.profiler is not None:
+            self.profiler.record(self.site, key, stats)
+
+
+class Profiler(object):
+    """Stats aggregated across objects, by branch and by site."""
+    def __init__(self):
+        self.stats = {}
+        self.sites = {}
+        self._lock = threading.Lock()
+
+    def record(self, site, key, stats):
+        with self._lock:
+            self.stats.setdefault(key, BranchStats()).add(stats)
+            site_stats = self.sites.setdefault(key, {})
+            site_stats.setdefault(site, BranchStats()).add(stats)
+
+    def clear(self):
+        with self._lock:
+            self.stats.clear()
+            self.sites.clear()
+
+    def top(self, limit=REPORT_LIMIT):
+        """``(field, branch), stats`` by decreasing total time."""
+        with self._lock:
+            items = list(self.stats.items())
+        items.sort(key=lambda item: item[1].time, reverse=True)
+        return items[:limit]
+
+    def top_sites(self, key, limit=REPORT_SITES):
+        with self._lock:
+            items = list(self.sites.get(key, {}).items())
+        items.sort(key=lambda item: item[1].time, reverse=True)
+        return items[:limit]
+
+    def report(self, limit=REPORT_LIMIT, sites=REPORT_SITES):
+        lines = ['%-18s %-32s %7s %10s %6s %8s  %s' % (
+            'field', 'branch', 'calls', 'time (ms)', 'scans', 'fetches', 'sites')]
+        for (field, branch), stats in self.top(limit):
+            top_sites = ', '.join(
+                '%s (%.1fms)' % (site, site_stats.time * 1000)
+                for site, site_stats in self.top_sites((field, branch), sites))
+            lines.append('%-18s %-32s %7d %10.1f %6d %8d  %s' % (
+                field, branch, stats.calls, stats.time * 1000,
+                stats.tree_scans, stats.fetches, top_sites))
+        return '\n'.join(lines)
+
+
+DEFAULT_PROFILER = Profiler()
@@ -0,0 +1,99 @@
+"""Explicit redirect following and shortener resolution cache"""
+import os
+try:
+    from urllib.request import HTTPRedirectHandler, build_opener
+    from urllib.error import URLError
+except ImportError:
+    from urllib2 import HTTPRedirectHandler, build_opener, URLError
+
+from web_rich_object.cache import MemoryCache
+
+MAX_REDIRECTS = int(os.environ.get('WRO_MAX_REDIRECTS', 10))
+REDIRECT_CACHE_TTL = int(os.environ.get('WRO_REDIRECT_CACHE_TTL', 24*3600))
+REDIRECT_CACHE_SIZE = int(os.environ.get('WRO_REDIRECT_CACHE_SIZE', 10000))
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+SHORTENER_HOSTS = (
+    't.co',
+    'bit.ly',
+    'bitly.com',
+    'goo.gl',
+    'ow.ly',
+    'tinyurl.com',
+    'buff.ly',
+    'dlvr.it',
+    'is.gd',
+    'fb.me',
+    'lnkd.in',
+    'youtu.be',
+)
+
+
+class TooManyRedirects(URLError):
+    pass
+
+
+class NoRedirectHandler(HTTPRedirectHandler):
+    """Let 3xx responses raise ``HTTPError`` instead of following them."""
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class LimitedRedirectHandler(HTTPRedirectHandler):
+    """Follow at most ``max_redirects`` redirections."""
+    def __init__(self, max_redirects=MAX_REDIRECTS):
+        self.max_redirections = max_redirects
+
+
+_opener = build_opener(NoRedirectHandler)
+_following_opener = build_opener(LimitedRedirectHandler)
+
+
+def urlopen(request):
+    """Open a request without following redirections."""
+    return _opener.open(request)
+
+
+def urlopen_following(request):
+    """
+    Open a request following up to ``MAX_REDIRECTS`` redirections, for
+    API calls whose intermediate URLs don't matter.
+    """
+    return _following_opener.open(request)
+
+
+class RedirectCache(object):
+    """
+    Remember the final URL of redirections with a time to live.
+
+    Only URLs from ``hosts`` are cached, or every URL if ``hosts`` is
+    ``None``. Entries are kept in ``backend``, an in-memory LRU cache by
+    default.
+    """
+    def __init__(self, ttl=REDIRECT_CACHE_TTL, max_size=REDIRECT_CACHE_SIZE,
+                 hosts=SHORTENER_HOSTS, backend=None):
+        if backend is None:
+            backend = MemoryCache(max_size=max_size, ttl=ttl)
+        self.hosts = hosts
+        self.backend = backend
+
+    def is_cacheable(self, url):
+        if self.hosts is None:
+            return True
+        hostname = url.split('://', 1)[-1].split('/', 1)[0].split(':')[0]
+        return hostname.lower() in self.hosts
+
+    def get(self, url):
+        return self.backend.get(url)
+
+    def set(self, url, final_url):
+        if self.is_cacheable(url):
+            self.backend.set(url, final_url)
+
+    def clear(self):
+        self.backend.clear()
+
+    def __len__(self):
+        return len(self.backend)
+
+
+DEFAULT_REDIRECT_CACHE = RedirectCache()
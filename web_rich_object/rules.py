@@ -0,0 +1,442 @@
+"""
+Declarative extraction rules
+
+Each field is resolved from an ordered list of sources, the first one giving
+a valid value wins. A source is written ``kind:key`` with ``kind`` among:
+
+- ``property``: ``content`` of ``<meta property="key">``
+- ``name``: ``content`` of ``<meta name="key">``
+- ``tag``: text of the first ``<key>`` tag (only ``title`` is indexed)
+- ``link``: ``href`` of ``<link rel="key">``
+- ``html``: attribute ``key`` of the ``<html>`` tag
+- ``jsonld``: property ``key`` of schema.org entities found in
+  ``<script type="application/ld+json">``
+- ``header``: response header ``key``
+- ``contextly``: key ``key`` of the ``contextly-page`` JSON
+- ``func``: value computed by ``WebRichObject._extract_<key>``
+
+A ``|split`` suffix splits a value on commas. For multi-valued fields, a
+nested list of sources is merged into a single candidate.
+
+Rules can be overridden per deployment with a JSON file set in
+``WRO_RULES_FILE``, mapping field names to their list of sources. Unknown
+kinds, filters and ``func`` extractors raise ``ValueError`` when compiled.
+"""
+import os
+import json
+
+from web_rich_object import utils
+
+RULES_FILE = os.environ.get('WRO_RULES_FILE')
+
+RULES = {
+    'title': [
+        'property:og:title',
+        'name:twitter:title',
+        'tag:title',
+        'contextly:title',
+        'jsonld:headline',
+        'jsonld:name',
+    ],
+    'type': ['property:og:type', 'contextly:type'],
+    'image': [
+        'func:mediawiki_thumbnail',
+        'property:og:image',
+        'name:twitter:image',
+        'name:twitter:image:src',
+        'contextly:image',
+        'jsonld:image',
+        'jsonld:thumbnailUrl',
+        'func:biggest_image',
+        'link:shortcut icon',
+        'link:icon',
+    ],
+    'url': ['property:og:url', 'contextly:url'],
+    'generator': ['name:generator'],
+    'description': [
+        'property:og:description',
+        'name:twitter:description',
+        'name:description',
+        'jsonld:description',
+        'func:first_paragraph',
+    ],
+    'audio': ['property:og:audio'],
+    'determiner': ['property:og:determiner'],
+    'locale': [
+        'property:og:locale',
+        'html:lang',
+        'html:xml:lang',
+        'header:Content-Language',
+    ],
+    'locale_alternative': ['property:og:locale_alternative'],
+    'site_name': ['property:og:site_name'],
+    'video': [
+        'property:og:video',
+        'property:og:video:url',
+        'property:og:video:secure_url',
+        'name:twitter:player',
+        'jsonld:embedUrl',
+        'jsonld:contentUrl',
+        'func:html5_video',
+    ],
+    'video_width': ['property:og:video:width', 'name:twitter:player:width'],
+    'video_height': ['property:og:video:height', 'name:twitter:player:height'],
+    'video_duration': ['property:og:video:duration', 'jsonld:duration'],
+    'images': ['property:og:image'],
+    'author': [
+        'property:og:author',
+        'property:article:author',
+        'property:book:author',
+        'contextly:author_display_name',
+        'contextly:author_name',
+        'jsonld:author',
+        'name:author',
+    ],
+    'published_time': [
+        'property:og:published_time',
+        'property:article:published_time',
+        'contextly:pub_date',
+        'jsonld:datePublished',
+        'name:issued',
+    ],
+    'modified_time': [
+        'property:og:modified_time',
+        'property:article:modified_time',
+        'contextly:mod_date',
+        'jsonld:dateModified',
+        'name:modified',
+    ],
+    'expiration_time': [
+        'property:og:expiration_time',
+        'property:article:expiration_time',
+    ],
+    'section': [
+        'property:og:section',
+        'property:article:section',
+        'contextly:categories',
+        'jsonld:articleSection',
+    ],
+    'tags': [
+        ['property:og:tag', 'property:article:tag', 'property:video:tag'],
+        'contextly:tags',
+        'jsonld:keywords|split',
+        'name:keywords|split',
+    ],
+}
+MULTI_VALUED_FIELDS = ('images', 'locale_alternative', 'tags')
+# Always indexed, used by WebRichObject itself
+INDEXED_SOURCES = ('name:contextly-page',)
+
+INDEXED_KINDS = ('property', 'name', 'tag', 'link', 'html', 'jsonld')
+KINDS = INDEXED_KINDS + ('header', 'contextly', 'func')
+# Keys of func sources, implemented by ``WebRichObject._extract_<key>``
+FUNC_EXTRACTORS = ('mediawiki_thumbnail', 'biggest_image', 'first_paragraph', 'html5_video')
+# OpenGraph structured properties, grouped by ``MetaIndex.media``
+MEDIA_KINDS = ('image', 'video', 'audio')
+FILTERS = {
+    'split': lambda value: (value if isinstance(value, (list, tuple)) else
+                            [v.strip() for v in value.split(',')]),
+}
+# Entities used as JSON-LD sources, by priority
+JSONLD_TYPES = (
+    'Article',
+    'NewsArticle',
+    'BlogPosting',
+    'Report',
+    'ScholarlyArticle',
+    'TechArticle',
+    'VideoObject',
+    'WebPage',
+)
+JSONLD_MIME_TYPE = 'application/ld+json'
+# Properties whose nodes are resolved to their URL instead of their name
+JSONLD_MEDIA_PROPERTIES = frozenset(['image', 'thumbnailUrl', 'embedUrl', 'contentUrl'])
+
+
+class Source(object):
+    __slots__ = ('kind', 'key', 'filters')
+
+    def __init__(self, source, func_extractors=FUNC_EXTRACTORS):
+        if not isinstance(source, utils.string_types):
+            raise ValueError("Invalid source: %r" % (source,))
+        source, _, filters = source.partition('|')
+        self.kind, _, self.key = source.partition(':')
+        if not self.kind or not self.key:
+            raise ValueError("Invalid source: %s" % source)
+        if self.kind not in KINDS:
+            raise ValueError("Unknown kind of source: %s" % source)
+        if self.kind == 'func' and self.key not in func_extractors:
+            raise ValueError("Unknown extractor: %s" % source)
+        names = [f for f in filters.split('|') if f]
+        for name in names:
+            if name not in FILTERS:
+                raise ValueError("Unknown filter of %s: %s" % (source, name))
+        self.filters = [FILTERS[f] for f in names]
+
+    def apply_filters(self, value):
+        for filter_ in self.filters:
+            value = filter_(value)
+        return value
+
+
+class ExtractionPlan(object):
+    """
+    Rules compiled into per-field source groups and the set of keys which
+    must be indexed during the single scan of the document. Invalid sources
+    raise ``ValueError``, ``func_extractors`` lists the known ``func`` keys.
+    """
+    def __init__(self, rules, multi_valued_fields=MULTI_VALUED_FIELDS,
+                 func_extractors=FUNC_EXTRACTORS):
+        self.rules = rules
+        self.multi_valued_fields = frozenset(multi_valued_fields)
+        self.fields = {}
+        # Identifiers of groups, stable across rule changes
+        self.group_keys = {}
+        self.indexed = dict((kind, set()) for kind in INDEXED_KINDS)
+        for field, sources in rules.items():
+            groups = []
+            for group in sources:
+                if not isinstance(group, (list, tuple)):
+                    group = [group]
+                try:
+                    groups.append(tuple(Source(s, func_extractors) for s in group))
+                except ValueError as err:
+                    raise ValueError("Invalid rule of %s: %s" % (field, err))
+            self.fields[field] = tuple(groups)
+            self.group_keys[field] = tuple(
+                '+'.join(group) if isinstance(group, (list, tuple)) else group
+                for group in sources)
+        for source in INDEXED_SOURCES:
+            self._index(Source(source))
+        for groups in self.fields.values():
+            for group in groups:
+                for source in group:
+                    self._index(source)
+        self.indexed = dict((k, frozenset(v)) for k, v in self.indexed.items())
+
+    def _index(self, source):
+        if source.kind in self.indexed:
+            self.indexed[source.kind].add(source.key.lower())
+
+    def candidates(self, field, get_source):
+        """
+        Yield candidate values of ``field`` in priority order, sources are
+        fetched lazily with ``get_source(kind, key)`` which returns a list.
+        """
+        for _, value in self.group_candidates(field, get_source):
+            yield value
+
+    def group_candidates(self, field, get_source, order=None):
+        """
+        Yield ``(group index, value)`` candidates of ``field``, groups are
+        taken in ``order``, a list of indexes, or in priority order.
+        """
+        multi_valued = field in self.multi_valued_fields
+        groups = self.fields.get(field, ())
+        if order is None:
+            order = range(len(groups))
+        for index in order:
+            group = groups[index]
+            merged = []
+            for source in group:
+                for value in get_source(source.kind, source.key):
+                    value = source.apply_filters(value)
+                    if isinstance(value, (list, tuple)):
+                        merged.extend(value)
+                    else:
+                        merged.append(value)
+            if multi_valued:
+                yield index, merged
+            else:
+                for value in merged:
+                    yield index, value
+
+
+class MediaGroups(object):
+    """
+    OpenGraph structured properties grouped by media, in document order.
+    ``og:image`` or ``og:image:url`` starts a new image, following
+    ``og:image:*`` properties describe it, the first value of each winning.
+    Properties before any image are dropped.
+    """
+    def __init__(self):
+        self._entries = dict((kind, []) for kind in MEDIA_KINDS)
+
+    def add(self, prop, content):
+        """Add ``<meta property="prop">``, ignored unless a media property."""
+        if not prop.startswith('og:'):
+            return
+        kind, _, attr = prop[3:].partition(':')
+        entries = self._entries.get(kind)
+        if entries is None:
+            return
+        if attr in ('', 'url'):
+            # og:image:url may repeat og:image
+            if not entries or entries[-1]['url'] != content:
+                entries.append({'url': content})
+        elif entries:
+            entries[-1].setdefault(attr, content)
+
+    def get(self, kind):
+        """List of ``kind`` entries, dicts of their attributes."""
+        return self._entries[kind]
+
+
+class MetaIndex(object):
+    """
+    Values of the sources required by a plan, built in one tree scan.
+    Sources with a value after ``head_end``, a position returned by
+    ``parsing.get_head_end``, are reported by ``in_body``. Without source
+    positions, all values are taken as found in the body.
+    """
+    def __init__(self, soup, plan, head_end=None):
+        self._values = {}
+        # (kind, key) of sources with values found after the head
+        self._body_keys = set()
+        self.media = MediaGroups()
+        indexed = plan.indexed
+        names = []
+        if indexed['property'] or indexed['name']:
+            names.append('meta')
+        if indexed['link']:
+            names.append('link')
+        if indexed['html']:
+            names.append('html')
+        if indexed['jsonld']:
+            names.append('script')
+        names.extend(indexed['tag'])
+        if not names:
+            return
+        seen_html = False
+        jsonld_entities = []
+        for tag in soup.find_all(names):
+            attrs = tag.attrs
+            in_head = (head_end is not None and tag.sourceline is not None and
+                       (tag.sourceline, tag.sourcepos) < head_end)
+            if tag.name == 'script':
+                if attrs.get('type', '').lower() == JSONLD_MIME_TYPE:
+                    jsonld_entities.extend(
+                        (entity, in_head) for entity in parse_jsonld(tag.string))
+            elif tag.name == 'meta':
+                content = attrs.get('content')
+                if content is None:
+                    continue
+                prop = attrs.get('property')
+                if prop:
+                    prop = prop.lower()
+                    if prop in indexed['property']:
+                        self._add('property', prop, content, in_head)
+                    self.media.add(prop, content)
+                name = attrs.get('name')
+                if name and name.lower() in indexed['name']:
+                    self._add('name', name, content, in_head)
+            elif tag.name == 'link':
+                href = attrs.get('href')
+                rels = attrs.get('rel') or []
+                if not href:
+                    continue
+                if not isinstance(rels, (list, tuple)):
+                    rels = rels.split()
+                for rel in set(rels) | set([' '.join(rels)]):
+                    if rel.lower() in indexed['link']:
+                        self._add('link', rel, href, in_head)
+            elif tag.name == 'html':
+                if seen_html:
+                    continue
+                seen_html = True
+                # Opening the document, always downloaded
+                for key, value in attrs.items():
+                    if key.lower() in indexed['html']:
+                        self._add('html', key, value, True)
+            elif ('tag', tag.name) not in self._values:
+                self._add('tag', tag.name, tag.text, in_head)
+        jsonld_entities.sort(key=lambda e: JSONLD_TYPES.index(e[0]['@type']))
+        for entity, in_head in jsonld_entities:
+            for key, value in entity.items():
+                if key.lower() in indexed['jsonld']:
+                    media = key in JSONLD_MEDIA_PROPERTIES
+                    for value in _get_jsonld_values(value, media):
+                        self._add('jsonld', key, value, in_head)
+
+    def _add(self, kind, key, value, in_head):
+        self._values.setdefault((kind, key.lower()), []).append(value)
+        if not in_head:
+            self._body_keys.add((kind, key.lower()))
+
+    def get(self, kind, key):
+        return self._values.get((kind, key.lower()), [])
+
+    def in_body(self, kind, key):
+        """Whether a value of the source was found after the head."""
+        return (kind, key.lower()) in self._body_keys
+
+    def first(self, kind, key):
+        values = self.get(kind, key)
+        return values[0] if values else None
+
+
+def _iter_jsonld_entities(data):
+    if isinstance(data, list):
+        for item in data:
+            for entity in _iter_jsonld_entities(item):
+                yield entity
+    elif isinstance(data, dict):
+        if '@graph' in data:
+            for entity in _iter_jsonld_entities(data['@graph']):
+                yield entity
+        types = data.get('@type')
+        if not isinstance(types, list):
+            types = [types]
+        for type_ in types:
+            if type_ in JSONLD_TYPES:
+                yield dict(data, **{'@type': type_})
+                break
+
+
+def _get_jsonld_values(value, media=False):
+    """
+    Flatten a JSON-LD property to strings. Nodes give their URL for
+    ``media`` properties, their name otherwise.
+    """
+    if isinstance(value, list):
+        values = []
+        for item in value:
+            values.extend(_get_jsonld_values(item, media))
+        return values
+    if isinstance(value, dict):
+        if media:
+            value = value.get('url') or value.get('contentUrl')
+        else:
+            value = value.get('name')
+        return _get_jsonld_values(value, media) if value else []
+    if isinstance(value, (int, float)):
+        return ['%s' % value]
+    if isinstance(value, utils.string_types) and value.strip():
+        return [value]
+    return []
+
+
+def parse_jsonld(data):
+    """Get supported schema.org entities from a JSON-LD script content."""
+    if not data:
+        return []
+    try:
+        return list(_iter_jsonld_entities(json.loads(data)))
+    except ValueError:
+        return []
+
+
+def load_rules(path=None):
+    rules = dict(RULES)
+    path = path or RULES_FILE
+    if path:
+        with open(path) as fd:
+            rules.update(json.load(fd))
+    return rules
+
+
+def compile_rules(rules=None):
+    return ExtractionPlan(load_rules() if rules is None else rules)
+
+
+DEFAULT_PLAN = compile_rules()
@@ -0,0 +1,243 @@
+"""
+Compact binary serialisation of extracted fields
+
+Values are ``None``, booleans, integers, floats, strings, bytes, datetimes,
+lists and dicts. Each value is written as a one byte tag followed by its
+payload, lengths and integers as varints. Dict keys found in ``KEYS`` are
+written as their index, so field names cost two bytes. Payloads larger
+than ``COMPRESS_MIN_SIZE`` are compressed with zlib.
+
+``KEYS`` is part of the format: only append to it.
+"""
+import struct
+import zlib
+from datetime import datetime, timedelta
+
+from web_rich_object import timestamps
+
+VERSION_RAW = b'\x01'
+VERSION_ZLIB = b'\x02'
+COMPRESS_MIN_SIZE = 512
+KEYS = (
+    # Preview cache entries
+    'fields',
+    'expires',
+    'fingerprint',
+    # WebRichObject.FIELDS
+    'title',
+    'type',
+    'subtype',
+    'image',
+    'url',
+    'site_name',
+    'description',
+    'author',
+    'generator',
+    'determiner',
+    'locale',
+    'locale_alternative',
+    'audio',
+    'video',
+    'video_width',
+    'video_height',
+    'video_duration',
+    'images',
+    'tags',
+    'section',
+    'created_time',
+    'published_time',
+    'modified_time',
+    'expiration_time',
+)
+KEY_INDEXES = dict((key, i) for i, key in enumerate(KEYS))
+
+TAG_NONE = b'N'
+TAG_TRUE = b'T'
+TAG_FALSE = b'F'
+TAG_INT = b'i'
+TAG_FLOAT = b'd'
+TAG_TEXT = b's'
+TAG_BYTES = b'b'
+TAG_LIST = b'l'
+TAG_DICT = b'm'
+TAG_KEY = b'k'
+TAG_DATETIME = b't'
+EPOCH = datetime(1970, 1, 1)
+FLOAT_STRUCT = struct.Struct('>d')
+
+try:
+    text_type = unicode
+except NameError:
+    text_type = str
+    long = int
+
+
+class SerializationError(ValueError):
+    pass
+
+
+def _write_varint(out, value):
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def _read_varint(data, pos):
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _write_zigzag(out, value):
+    _write_varint(out, value * 2 if value >= 0 else -value * 2 - 1)
+
+
+def _read_zigzag(data, pos):
+    value, pos = _read_varint(data, pos)
+    return (value >> 1) ^ -(value & 1), pos
+
+
+def _write_string(out, tag, value):
+    out.extend(tag)
+    _write_varint(out, len(value))
+    out.extend(value)
+
+
+def _write(out, value):
+    if value is None:
+        out.extend(TAG_NONE)
+    elif value is True:
+        out.extend(TAG_TRUE)
+    elif value is False:
+        out.extend(TAG_FALSE)
+    elif isinstance(value, (int, long)):
+        out.extend(TAG_INT)
+        _write_zigzag(out, value)
+    elif isinstance(value, float):
+        out.extend(TAG_FLOAT)
+        out.extend(FLOAT_STRUCT.pack(value))
+    elif isinstance(value, datetime):
+        # Wall clock microseconds, then whether aware and offset minutes
+        out.extend(TAG_DATETIME)
+        delta = value.replace(tzinfo=None) - EPOCH
+        _write_zigzag(out, (delta.days * 86400 + delta.seconds) * 10**6 + delta.microseconds)
+        offset = value.utcoffset()
+        if offset is None:
+            out.append(0)
+        else:
+            out.append(1)
+            _write_zigzag(out, offset.days * 1440 + offset.seconds // 60)
+    elif isinstance(value, text_type):
+        _write_string(out, TAG_TEXT, value.encode('utf-8'))
+    elif isinstance(value, bytes):
+        tag = TAG_BYTES
+        if bytes is str:
+            # Python 2 native strings are text when decodable
+            try:
+                value.decode('utf-8')
+                tag = TAG_TEXT
+            except UnicodeDecodeError:
+                pass
+        _write_string(out, tag, value)
+    elif isinstance(value, (list, tuple)):
+        out.extend(TAG_LIST)
+        _write_varint(out, len(value))
+        for item in value:
+            _write(out, item)
+    elif isinstance(value, dict):
+        out.extend(TAG_DICT)
+        _write_varint(out, len(value))
+        for key, item in value.items():
+            index = KEY_INDEXES.get(key)
+            if index is None:
+                _write(out, key)
+            else:
+                out.extend(TAG_KEY)
+                _write_varint(out, index)
+            _write(out, item)
+    else:
+        raise SerializationError("Can't serialize %r" % (value,))
+
+
+def _read(data, pos):
+    tag = data[pos:pos+1]
+    pos += 1
+    if tag == TAG_NONE:
+        return None, pos
+    if tag == TAG_TRUE:
+        return True, pos
+    if tag == TAG_FALSE:
+        return False, pos
+    if tag == TAG_INT:
+        return _read_zigzag(data, pos)
+    if tag == TAG_DATETIME:
+        microseconds, pos = _read_zigzag(data, pos)
+        value = EPOCH + timedelta(microseconds=microseconds)
+        aware = data[pos]
+        pos += 1
+        if aware:
+            minutes, pos = _read_zigzag(data, pos)
+            value = value.replace(tzinfo=timestamps.get_timezone(minutes))
+        return value, pos
+    if tag == TAG_FLOAT:
+        return FLOAT_STRUCT.unpack(bytes(data[pos:pos+8]))[0], pos + 8
+    if tag in (TAG_TEXT, TAG_BYTES):
+        size, pos = _read_varint(data, pos)
+        if pos + size > len(data):
+            raise IndexError("string out of range")
+        value = bytes(data[pos:pos+size])
+        if tag == TAG_TEXT:
+            value = value.decode('utf-8')
+        return value, pos + size
+    if tag == TAG_KEY:
+        index, pos = _read_varint(data, pos)
+        return KEYS[index], pos
+    if tag == TAG_LIST:
+        count, pos = _read_varint(data, pos)
+        values = []
+        for _ in range(count):
+            value, pos = _read(data, pos)
+            values.append(value)
+        return values, pos
+    if tag == TAG_DICT:
+        count, pos = _read_varint(data, pos)
+        values = {}
+        for _ in range(count):
+            key, pos = _read(data, pos)
+            values[key], pos = _read(data, pos)
+        return values, pos
+    raise SerializationError("Unknown tag %r at %d" % (tag, pos - 1))
+
+
+def dumps(value):
+    out = bytearray()
+    _write(out, value)
+    if len(out) >= COMPRESS_MIN_SIZE:
+        return VERSION_ZLIB + zlib.compress(bytes(out))
+    return VERSION_RAW + bytes(out)
+
+
+def loads(data):
+    version, payload = data[:1], data[1:]
+    if version == VERSION_ZLIB:
+        try:
+            payload = zlib.decompress(payload)
+        except zlib.error as err:
+            raise SerializationError("Invalid compressed data: %s" % err)
+    elif version != VERSION_RAW:
+        raise SerializationError("Unknown version %r" % version)
+    try:
+        value, _ = _read(bytearray(payload), 0)
+    except (IndexError, struct.error, UnicodeDecodeError) as err:
+        raise SerializationError("Truncated or invalid data: %s" % err)
+    return value
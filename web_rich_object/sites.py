@@ -0,0 +1,165 @@
+"""Site-specific extractors chosen by hostname before any download"""
+import json
+import re
+try:
+    from urllib.request import Request
+    from urllib.parse import urlsplit, quote, unquote
+    from http.client import HTTPException
+except ImportError:
+    from urllib2 import Request
+    from urlparse import urlsplit
+    from urllib import quote, unquote
+    from httplib import HTTPException
+
+from web_rich_object import profiling
+from web_rich_object.redirects import urlopen_following as urlopen
+
+SITE_FETCH_MAX_SIZE = 10**6
+# Network errors and invalid responses, extraction falls back on the page
+FETCH_ERRORS = (IOError, OSError, HTTPException, ValueError)
+# Fields an extractor must give to skip the page download
+REQUIRED_FIELDS = ('title', 'type', 'image', 'url')
+
+
+class SiteExtractor(object):
+    """
+    Base of site extractors. ``domains`` are matched against the hostname
+    and its parent domains; ``extract`` returns a dict of fields named as
+    ``WebRichObject`` properties, or ``None`` to fall back on generic
+    extraction.
+    """
+    domains = ()
+
+    def __init__(self, user_agent=None):
+        self.user_agent = user_agent
+
+    def fetch(self, url, user_agent=None):
+        """Body of ``url``, redirections followed, raises ``FETCH_ERRORS``."""
+        headers = {'Accept': 'application/json'}
+        if user_agent or self.user_agent:
+            headers['User-Agent'] = user_agent or self.user_agent
+        profiling.count_fetch()
+        response = urlopen(Request(url, headers=headers))
+        return response.read(SITE_FETCH_MAX_SIZE)
+
+    def extract(self, url, user_agent=None):
+        raise NotImplementedError
+
+
+class YoutubeExtractor(SiteExtractor):
+    domains = ('youtube.com', 'youtu.be')
+    VIDEO_ID_REG = re.compile(r'^[\w-]{11}$')
+
+    def get_video_id(self, parts):
+        if parts.hostname.endswith('youtu.be'):
+            video_id = parts.path.strip('/')
+        elif parts.path == '/watch':
+            params = dict(p.split('=', 1) for p in parts.query.split('&')
+                          if '=' in p)
+            video_id = params.get('v', '')
+        elif parts.path.startswith(('/embed/', '/shorts/', '/v/')):
+            video_id = parts.path.split('/')[2]
+        else:
+            return None
+        if self.VIDEO_ID_REG.match(video_id):
+            return video_id
+        return None
+
+    def extract(self, url, user_agent=None):
+        video_id = self.get_video_id(urlsplit(url))
+        if video_id is None:
+            return None
+        return {
+            'type': 'video',
+            'site_name': 'YouTube',
+            'url': 'https://www.youtube.com/watch?v=%s' % video_id,
+            'image': 'https://i.ytimg.com/vi/%s/hqdefault.jpg' % video_id,
+            'video': 'https://www.youtube.com/embed/%s' % video_id,
+        }
+
+
+class WikipediaExtractor(SiteExtractor):
+    """Use the REST summary API instead of the article page."""
+    domains = ('wikipedia.org',)
+    SUMMARY_URL = 'https://%(host)s/api/rest_v1/page/summary/%(title)s'
+
+    def extract(self, url, user_agent=None):
+        parts = urlsplit(url)
+        if not parts.path.startswith('/wiki/'):
+            return None
+        title = parts.path[len('/wiki/'):]
+        # Special pages and main page aren't articles
+        if not title or ':' in unquote(title) or title == 'Main_Page':
+            return None
+        summary_url = self.SUMMARY_URL % {
+            'host': parts.hostname,
+            'title': quote(unquote(title), safe=''),
+        }
+        try:
+            summary = json.loads(self.fetch(summary_url, user_agent).decode('utf-8'))
+        except FETCH_ERRORS:
+            return None
+        if not isinstance(summary, dict):
+            return None
+        if summary.get('type') not in ('standard', 'disambiguation'):
+            return None
+        fields = {
+            'title': summary.get('titles', {}).get('normalized') or summary.get('title'),
+            'type': 'website',
+            'description': summary.get('extract') or summary.get('description'),
+            'url': summary.get('content_urls', {}).get('desktop', {}).get('page') or url,
+            'locale': summary.get('lang', '').upper() or None,
+            'site_name': parts.hostname,
+            'image': (summary.get('originalimage') or
+                      summary.get('thumbnail') or {}).get('source'),
+        }
+        return dict((k, v) for k, v in fields.items() if v is not None)
+
+
+class FacebookVideoExtractor(SiteExtractor):
+    domains = ('facebook.com',)
+
+    def extract(self, url, user_agent=None):
+        if '/videos/' not in urlsplit(url).path:
+            return None
+        return {'type': 'video'}
+
+
+class SiteRegistry(object):
+    def __init__(self, extractors=()):
+        self._extractors = {}
+        for extractor in extractors:
+            self.register(extractor)
+
+    def register(self, extractor):
+        for domain in extractor.domains:
+            self._extractors[domain.lower()] = extractor
+
+    def unregister(self, domain):
+        self._extractors.pop(domain.lower(), None)
+
+    def get(self, url):
+        hostname = (urlsplit(url).hostname or '').lower()
+        labels = hostname.split('.')
+        for i in range(len(labels) - 1):
+            extractor = self._extractors.get('.'.join(labels[i:]))
+            if extractor is not None:
+                return extractor
+        return None
+
+    def extract(self, url, user_agent=None):
+        extractor = self.get(url)
+        if extractor is None:
+            return None
+        return extractor.extract(url, user_agent=user_agent)
+
+
+def is_complete(fields):
+    return all(fields.get(f) for f in REQUIRED_FIELDS)
+
+
+DEFAULT_REGISTRY = SiteRegistry([
+    YoutubeExtractor(),
+    WikipediaExtractor(),
+    FacebookVideoExtractor(),
+])
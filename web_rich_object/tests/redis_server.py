@@ -0,0 +1,171 @@
+"""
+In-process fake server speaking the Redis protocol
+
+Supports the commands used by ``RedisCache``: ``PING``, ``AUTH``,
+``SELECT``, ``GET``, ``MGET``, ``SET`` (with ``EX`` and ``PX``), ``DEL``,
+``SCAN`` (a single page) and ``FLUSHDB``. Received commands are recorded.
+"""
+import fnmatch
+import socket
+import threading
+import time
+try:
+    from socketserver import StreamRequestHandler, ThreadingTCPServer
+except ImportError:
+    from SocketServer import StreamRequestHandler, ThreadingTCPServer
+
+
+class FakeRedisHandler(StreamRequestHandler):
+    def setup(self):
+        StreamRequestHandler.setup(self)
+        self.server.connections.add(self.connection)
+
+    def finish(self):
+        self.server.connections.discard(self.connection)
+        StreamRequestHandler.finish(self)
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line.startswith(b'*'):
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def _write(self, reply):
+        if reply is None:
+            self.wfile.write(b'$-1\r\n')
+        elif isinstance(reply, Exception):
+            self.wfile.write(('-ERR %s\r\n' % reply).encode('utf-8'))
+        elif isinstance(reply, int):
+            self.wfile.write((':%d\r\n' % reply).encode('ascii'))
+        elif isinstance(reply, list):
+            self.wfile.write(('*%d\r\n' % len(reply)).encode('ascii'))
+            for item in reply:
+                self._write(item)
+        else:
+            self.wfile.write(('$%d\r\n' % len(reply)).encode('ascii') + reply + b'\r\n')
+
+    def handle(self):
+        self.db = 0
+        while True:
+            command = self._read_command()
+            if command is None:
+                return
+            self.server.commands.append([command[0].upper()] + command[1:])
+            try:
+                reply = self.server.execute(self, command[0].upper().decode('ascii'), command[1:])
+            except Exception as err:
+                reply = err
+            self._write(reply)
+            self.wfile.flush()
+
+
+class _FakeRedisTCPServer(ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def _get_db(self, handler):
+        return self.dbs.setdefault(handler.db, {})
+
+    def _get(self, db, key):
+        entry = db.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires is not None and expires < time.time():
+            del db[key]
+            return None
+        return value
+
+    def execute(self, handler, name, args):
+        if self.password is not None and name != 'AUTH' and \
+                not getattr(handler, 'authenticated', False):
+            raise Exception('NOAUTH Authentication required.')
+        with self.lock:
+            db = self._get_db(handler)
+            if name == 'PING':
+                return b'PONG'
+            if name == 'AUTH':
+                if args[0].decode('utf-8') != self.password:
+                    raise Exception('invalid password')
+                handler.authenticated = True
+                return b'OK'
+            if name == 'SELECT':
+                handler.db = int(args[0])
+                return b'OK'
+            if name == 'GET':
+                return self._get(db, args[0])
+            if name == 'MGET':
+                return [self._get(db, key) for key in args]
+            if name == 'SET':
+                expires = None
+                options = [arg.upper() for arg in args[2:]]
+                if b'EX' in options:
+                    expires = time.time() + int(args[2 + options.index(b'EX') + 1])
+                elif b'PX' in options:
+                    expires = time.time() + int(args[2 + options.index(b'PX') + 1]) / 1000.0
+                db[args[0]] = (args[1], expires)
+                return b'OK'
+            if name == 'DEL':
+                return sum(1 for key in args if db.pop(key, None) is not None)
+            if name == 'SCAN':
+                options = [arg.upper() for arg in args]
+                pattern = b'*'
+                if b'MATCH' in options:
+                    pattern = args[options.index(b'MATCH') + 1]
+                keys = [key for key in list(db) if self._get(db, key) is not None
+                        and fnmatch.fnmatchcase(key.decode('utf-8'), pattern.decode('utf-8'))]
+                return [b'0', keys]
+            if name == 'FLUSHDB':
+                db.clear()
+                return b'OK'
+            raise Exception("unknown command '%s'" % name)
+
+
+class FakeRedisServer(object):
+    """Serve an in-memory key-value store on a free local port."""
+    def __init__(self, password=None, host='127.0.0.1', port=0):
+        self.server = _FakeRedisTCPServer((host, port), FakeRedisHandler)
+        self.server.dbs = {}
+        self.server.commands = []
+        self.server.connections = set()
+        self.server.password = password
+        self.server.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def address(self):
+        return self.server.server_address[:2]
+
+    @property
+    def commands(self):
+        return self.server.commands
+
+    def data(self, db=0):
+        return self.server.dbs.get(db, {})
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and drop client connections."""
+        self.server.shutdown()
+        for connection in list(self.server.connections):
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except (IOError, OSError):
+                pass
+        self.server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
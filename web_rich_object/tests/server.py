@@ -0,0 +1,219 @@
+"""
+Local stand-in HTTP server serving a corpus of pages
+
+Behaviour is set per server and can be overridden per request with query
+parameters:
+
+- ``latency``: seconds to wait before responding
+- ``rate``: bandwidth in bytes per second
+- ``chunked``: ``1`` to use chunked transfer encoding
+- ``slowloris``: seconds to wait between each byte of the body
+- ``gzip``: ``1`` to compress bodies when the client accepts gzip
+
+``/redirect/<n>/<path>`` redirects ``n`` times before serving ``<path>``
+and ``Range`` requests on a single byte range are answered with a 206.
+"""
+import re
+import threading
+import time
+import zlib
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlsplit, parse_qsl
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlsplit, parse_qsl
+
+from web_rich_object.preload import WARMUP_PDF
+
+PAGE_TEMPLATE = """<html lang="en"><head>
+<title>%(title)s</title>
+<meta property="og:title" content="%(title)s"/>
+<meta property="og:type" content="article"/>
+<meta property="og:image" content="/image.png"/>
+<meta property="og:description" content="%(title)s description"/>
+<meta property="article:published_time" content="2016-12-12T08:00:15+00:00"/>
+</head><body>%(body)s</body></html>"""
+CORPUS = {
+    '/': ('text/html; charset=utf-8', PAGE_TEMPLATE % {
+        'title': 'Home', 'body': '<p>Home</p>'}),
+    '/article': ('text/html; charset=utf-8', PAGE_TEMPLATE % {
+        'title': 'Article', 'body': '<p>Article</p>' * 500}),
+    '/bare': ('text/html; charset=utf-8',
+              '<html><head><title>Bare</title></head><body><p>Bare</p></body></html>'),
+    '/doc.pdf': ('application/pdf', WARMUP_PDF),
+}
+RANGE_REG = re.compile(r'^bytes=(\d*)-(\d*)$')
+WRITE_SIZE = 16 * 1024
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _get_options(self, query):
+        options = dict(self.server.options)
+        for key, value in parse_qsl(query):
+            if key in options:
+                options[key] = float(value)
+        return options
+
+    def do_HEAD(self):
+        self.do_GET(head=True)
+
+    def do_GET(self, head=False):
+        self.server.hits += 1
+        parts = urlsplit(self.path)
+        options = self._get_options(parts.query)
+        if options['latency']:
+            time.sleep(options['latency'])
+        path = parts.path
+        if path.startswith('/redirect/'):
+            _, _, count, path = path.split('/', 3)
+            count = int(count)
+            location = '/redirect/%d/%s' % (count - 1, path) if count > 1 else '/' + path
+            if parts.query:
+                location += '?' + parts.query
+            self.send_response(302)
+            self.send_header('Location', location)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if path not in self.server.corpus:
+            self.send_error(404)
+            return
+        content_type, body = self.server.corpus[path]
+        if not isinstance(body, bytes):
+            body = body.encode('utf-8')
+        status = 200
+        headers = [('Content-Type', content_type), ('Accept-Ranges', 'bytes')]
+        range_match = RANGE_REG.match(self.headers.get('Range') or '')
+        if range_match is not None and any(range_match.groups()):
+            start, end = range_match.groups()
+            if start:
+                start, end = int(start), int(end) if end else len(body) - 1
+            else:
+                start, end = max(0, len(body) - int(end)), len(body) - 1
+            end = min(end, len(body) - 1)
+            headers.append(('Content-Range', 'bytes %d-%d/%d' % (start, end, len(body))))
+            body = body[start:end+1]
+            status = 206
+        elif options['gzip'] and 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+            compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            body = compressor.compress(body) + compressor.flush()
+            headers.append(('Content-Encoding', 'gzip'))
+        chunked = bool(options['chunked'])
+        if chunked:
+            headers.append(('Transfer-Encoding', 'chunked'))
+        else:
+            headers.append(('Content-Length', str(len(body))))
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if not head:
+            self._write_body(body, options, chunked)
+
+    def _write_body(self, body, options, chunked):
+        if options['slowloris']:
+            size, delay = 1, options['slowloris']
+        elif options['rate']:
+            size = max(1, int(options['rate'] / 10))
+            delay = float(size) / options['rate']
+        else:
+            size, delay = WRITE_SIZE, 0
+        try:
+            for i in range(0, len(body), size):
+                chunk = body[i:i+size]
+                if chunked:
+                    chunk = ('%x\r\n' % len(chunk)).encode('ascii') + chunk + b'\r\n'
+                self.wfile.write(chunk)
+                self.wfile.flush()
+                self.server.sent += len(chunk)
+                if delay:
+                    time.sleep(delay)
+            if chunked:
+                self.wfile.write(b'0\r\n\r\n')
+        except (IOError, OSError):
+            # Client stopped reading
+            self.close_connection = True
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients closing connections early, after the head of a page
+        pass
+
+
+class StandInServer(object):
+    """
+    Serve ``corpus``, a dict mapping paths to ``(content_type, body)``, on
+    a free local port from a background thread.
+    """
+    def __init__(self, corpus=None, latency=0, rate=0, chunked=False,
+                 slowloris=0, gzip=False, host='127.0.0.1', port=0):
+        self.httpd = _ThreadingHTTPServer((host, port), StandInHandler)
+        self.httpd.corpus = dict(CORPUS if corpus is None else corpus)
+        self.httpd.options = {
+            'latency': latency,
+            'rate': rate,
+            'chunked': chunked,
+            'slowloris': slowloris,
+            'gzip': gzip,
+        }
+        self.httpd.hits = 0
+        self.httpd.sent = 0
+        self.httpd.connections = 0
+        self._thread = None
+
+    @property
+    def hits(self):
+        return self.httpd.hits
+
+    @property
+    def connections(self):
+        """Count of client connections accepted."""
+        return self.httpd.connections
+
+    @property
+    def sent(self):
+        """Bytes of bodies sent."""
+        return self.httpd.sent
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return 'http://%s:%d' % (host, port)
+
+    def url(self, path='/', **options):
+        url = self.base_url + path
+        if options:
+            url += '?' + '&'.join('%s=%s' % (k, v) for k, v in sorted(options.items()))
+        return url
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,146 @@
+import os
+import shutil
+import tempfile
+import unittest
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+from web_rich_object import adaptive, rules
+from web_rich_object.api import WebRichObject as WRO
+from web_rich_object.cache import MemoryCache, SqliteCache
+from web_rich_object.failures import FailureGuard
+from web_rich_object.tests.server import StandInServer, CORPUS
+
+IMAGE_KEYS = rules.DEFAULT_PLAN.group_keys['image']
+
+
+class SourceLearnerTest(unittest.TestCase):
+    def setUp(self):
+        self.learner = adaptive.SourceLearner(min_samples=2, explore_every=10)
+
+    def visit(self, winner):
+        page = self.learner.start('example.com')
+        order = page.order('image', IMAGE_KEYS)
+        page.record('image', IMAGE_KEYS, order, winner)
+        return page, order
+
+    def test_learning(self):
+        og_image = IMAGE_KEYS.index('property:og:image')
+        for _ in range(2):
+            page, order = self.visit(og_image)
+            self.assertTrue(page.explore)
+            self.assertIsNone(order)
+        page, order = self.visit(og_image)
+        self.assertFalse(page.explore)
+        self.assertTrue(page.head_only)
+        # Extractor never resolving is skipped
+        self.assertEqual(order[0], og_image)
+        self.assertNotIn(IMAGE_KEYS.index('func:mediawiki_thumbnail'), order)
+        stats = self.learner.get_stats('example.com')
+        self.assertEqual(stats['pages'], 3)
+        self.assertEqual(stats['fields']['image']['property:og:image'], [3, 3, 0])
+        self.assertNotIn('func:biggest_image', stats['fields']['image'])
+
+    def test_body_needed(self):
+        biggest_image = IMAGE_KEYS.index('func:biggest_image')
+        for _ in range(3):
+            page, order = self.visit(biggest_image)
+        self.assertFalse(page.head_only)
+        self.assertEqual(order[0], biggest_image)
+        self.assertNotIn(IMAGE_KEYS.index('func:mediawiki_thumbnail'), order)
+        # Sources which never resolved are demoted
+        self.assertEqual(order, [biggest_image, 8, 9, 1, 2, 3, 4, 5, 6])
+
+    def test_found_in_body(self):
+        og_image = IMAGE_KEYS.index('property:og:image')
+        for _ in range(3):
+            page = self.learner.start('example.com')
+            page.record('image', IMAGE_KEYS, page.order('image', IMAGE_KEYS), og_image,
+                        in_body=True)
+        self.assertFalse(page.head_only)
+        self.assertEqual(
+            self.learner.get_stats('example.com')['fields']['image']['property:og:image'],
+            [3, 3, 3])
+
+    def test_legacy_stats(self):
+        self.learner.cache.set('example.com', {
+            'pages': 5, 'fields': {'image': {'property:og:image': [5, 5]}}})
+        self.assertFalse(self.learner.start('example.com').head_only)
+
+    def test_explore(self):
+        for _ in range(9):
+            self.visit(IMAGE_KEYS.index('property:og:image'))
+        page, order = self.visit(None)
+        self.assertTrue(page.explore)
+        self.assertFalse(page.head_only)
+
+    def test_persistent(self):
+        tmp_dir = tempfile.mkdtemp()
+        path = os.path.join(tmp_dir, 'sources.sqlite')
+        self.learner = adaptive.SourceLearner(path=path, min_samples=2)
+        for _ in range(3):
+            self.visit(IMAGE_KEYS.index('property:og:image'))
+        self.learner.flush()
+        self.learner.cache.close()
+        learner = adaptive.SourceLearner(cache=SqliteCache(path), min_samples=2)
+        page = learner.start('example.com')
+        self.assertEqual(learner.get_stats('example.com')['pages'], 4)
+        self.assertTrue(page.head_only)
+        learner.cache.close()
+        shutil.rmtree(tmp_dir)
+
+
+class AdaptiveExtractionTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StandInServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def get(self, path, learner):
+        return WRO(self.server.url(path), learner=learner, redirect_cache=MemoryCache(),
+                   failure_guard=FailureGuard())
+
+    @patch('web_rich_object.api.READ_CHUNK_SIZE', 1024)
+    def test_head_only(self):
+        learner = adaptive.SourceLearner(min_samples=2)
+        for _ in range(2):
+            wro = self.get('/article', learner)
+            self.assertEqual((wro.title, wro.description), ('Article', 'Article description'))
+            self.assertFalse(wro.head_only)
+        wro = self.get('/article', learner)
+        self.assertTrue(wro.head_only)
+        self.assertLess(len(wro.body), len(CORPUS['/article'][1]))
+        self.assertEqual(wro.to_dict(), self.get('/article', None).to_dict())
+
+    def test_body_needed(self):
+        learner = adaptive.SourceLearner(min_samples=2)
+        corpus = {'/': ('text/html', '<html><head><title>Foo</title></head>'
+                                     '<body><p>%s</p></body></html>' % ('Bar ' * 10))}
+        with StandInServer(corpus) as server:
+            for _ in range(3):
+                wro = WRO(server.url('/'), learner=learner, redirect_cache=MemoryCache(),
+                          failure_guard=FailureGuard())
+                self.assertTrue(wro.description.startswith('Bar'))
+            self.assertFalse(wro.head_only)
+
+    @patch('web_rich_object.api.READ_CHUNK_SIZE', 1024)
+    def test_body_jsonld(self):
+        learner = adaptive.SourceLearner(min_samples=2)
+        jsonld = '{"@type": "Article", "headline": "Foo", "description": "Bar"}'
+        corpus = {'/': ('text/html', '<html><head><meta charset="utf-8"></head><body>%s'
+                                     '<script type="application/ld+json">%s</script>'
+                                     '</body></html>' % ('<div></div>' * 500, jsonld))}
+        with StandInServer(corpus) as server:
+            for _ in range(4):
+                wro = WRO(server.url('/'), learner=learner, redirect_cache=MemoryCache(),
+                          failure_guard=FailureGuard())
+                self.assertEqual((wro.title, wro.description), ('Foo', 'Bar'))
+                self.assertFalse(wro.head_only)
+
+
+if __name__ == '__main__':
+    unittest.main()
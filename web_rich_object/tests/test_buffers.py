@@ -0,0 +1,147 @@
+import mmap
+import unittest
+try:
+    from unittest.mock import patch, MagicMock
+except ImportError:
+    from mock import patch, MagicMock
+from web_rich_object.tests import utils
+from web_rich_object.tests.test_pdf import create_pdf
+from web_rich_object.api import WebRichObject as WRO
+from web_rich_object import buffers
+
+
+class BufferTest(unittest.TestCase):
+    def test_write(self):
+        buffer_ = buffers.Buffer(size=4)
+        buffer_.write(b'foo')
+        buffer_.write(b'bar')
+        self.assertEqual(buffer_.view().tobytes(), b'foobar')
+        self.assertEqual(buffer_.capacity, 8)
+
+    def test_grow_with_exported_view(self):
+        buffer_ = buffers.Buffer(size=4)
+        buffer_.write(b'foo')
+        view = buffer_.view()
+        buffer_.write(b'barbaz')
+        self.assertEqual(view.tobytes(), b'foo')
+        self.assertEqual(buffer_.view().tobytes(), b'foobarbaz')
+
+    def test_clear(self):
+        buffer_ = buffers.Buffer(size=4)
+        buffer_.write(b'foo')
+        buffer_.clear()
+        buffer_.write(b'bar')
+        self.assertEqual(buffer_.view().tobytes(), b'bar')
+
+
+class FileBufferTest(unittest.TestCase):
+    def test_view(self):
+        file_buffer = buffers.FileBuffer()
+        self.assertEqual(file_buffer.view(), b'')
+        file_buffer.write(b'foo')
+        self.assertIsInstance(file_buffer.view(), mmap.mmap)
+        self.assertEqual(buffers.to_bytes(file_buffer.view()), b'foo')
+        file_buffer.write(b'bar')
+        self.assertEqual(buffers.to_bytes(file_buffer.view()), b'foobar')
+        file_buffer.close()
+
+    def test_spill(self):
+        buffer_ = buffers.Buffer()
+        buffer_.write(b'foo')
+        file_buffer = buffers.spill(buffer_)
+        self.assertEqual(buffers.to_bytes(file_buffer.view()), b'foo')
+        file_buffer.close()
+
+
+class BufferPoolTest(unittest.TestCase):
+    def test_reuse(self):
+        pool = buffers.BufferPool(max_buffers=1)
+        buffer_ = pool.acquire()
+        buffer_.write(b'foo')
+        pool.release(buffer_)
+        self.assertIs(pool.acquire(), buffer_)
+        self.assertEqual(buffer_.length, 0)
+
+    def test_bounds(self):
+        pool = buffers.BufferPool(max_buffers=1, max_size=8, initial_size=4)
+        pool.release(buffers.Buffer(size=4))
+        pool.release(buffers.Buffer(size=4))
+        self.assertEqual(len(pool), 1)
+        pool.acquire()
+        pool.release(buffers.Buffer(size=16))
+        self.assertEqual(len(pool), 0)
+        pool.release(buffers.FileBuffer())
+        self.assertEqual(len(pool), 0)
+
+
+class BufferReaderTest(unittest.TestCase):
+    def test_read(self):
+        reader = buffers.BufferReader(b'foobar')
+        self.assertEqual(reader.read(3), b'foo')
+        self.assertEqual(reader.tell(), 3)
+        self.assertEqual(reader.read(), b'bar')
+        self.assertEqual(reader.read(3), b'')
+
+    def test_seek(self):
+        reader = buffers.BufferReader(memoryview(b'foobar'))
+        reader.seek(0, 2)
+        self.assertEqual(reader.tell(), 6)
+        reader.seek(-3, 1)
+        self.assertEqual(reader.read(2), b'ba')
+        reader.seek(1)
+        self.assertEqual(reader.read(2), b'oo')
+
+
+class WroBufferTest(utils.BaseWebRichObjectTestCase):
+    def test_release(self):
+        pool = buffers.BufferPool()
+        with WRO(self.url, buffer_pool=pool) as wro:
+            self.assertEqual(wro.html, b'<html><title>Foo</title></html>')
+            self.assertEqual(wro.title, 'Foo')
+        self.assertEqual(len(pool), 1)
+        self.assertEqual(wro.html, b'')
+        self.assertEqual(wro.title, 'Foo')
+    test_release.mock_attrs = {
+        'return_value.read.return_value': b'<html><title>Foo</title></html>',
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    }
+
+
+def chunked_response(content, info, chunk_size):
+    response = MagicMock()
+    response.read.side_effect = [content[i:i+chunk_size]
+                                 for i in range(0, len(content), chunk_size)] + [b'']
+    response.info.return_value.__dict__ = info
+    return response
+
+
+@patch('web_rich_object.api.READ_CHUNK_SIZE', 64)
+@patch('web_rich_object.buffers.SPILL_THRESHOLD', 128)
+class WroSpillTest(unittest.TestCase):
+    @patch('web_rich_object.api.urlopen')
+    def test_html(self, mock_urlopen):
+        page = b'<html><title>Foo</title>' + b' ' * 200 + b'</html>'
+        mock_urlopen.return_value = chunked_response(page, utils.HTML_RESPONSE_INFO, 64)
+        with WRO('http://example.com') as wro:
+            self.assertIsInstance(wro.body, mmap.mmap)
+            self.assertEqual(wro.html, page)
+            self.assertEqual(wro.title, 'Foo')
+
+    @patch('web_rich_object.api.urlopen')
+    def test_pdf(self, mock_urlopen):
+        pdf = create_pdf(meta={'title': 'Foo'}).read()
+        mock_urlopen.return_value = chunked_response(pdf, utils.PDF_RESPONSE_INFO, 64)
+        with WRO('http://example.com/doc.pdf') as wro:
+            self.assertIsInstance(wro.body, mmap.mmap)
+            self.assertEqual(wro.title, 'Foo')
+
+    @patch('web_rich_object.api.PDF_DOWNLOAD_MAX_SIZE', 256)
+    @patch('web_rich_object.api.urlopen')
+    def test_pdf_max_size(self, mock_urlopen):
+        mock_urlopen.return_value = chunked_response(b' ' * 1024, utils.PDF_RESPONSE_INFO, 64)
+        with WRO('http://example.com/doc.pdf') as wro:
+            self.assertEqual(len(wro.html), 256)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+import os
+import shutil
+import tempfile
+import unittest
+from web_rich_object.cache import MemoryCache, SqliteCache, RedisCache, RedisError
+from web_rich_object.tests.redis_server import FakeRedisServer
+
+
+class MemoryCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = MemoryCache(max_size=2)
+
+    def test_set_get(self):
+        self.cache.set('foo', {'bar': 1})
+        self.assertEqual(self.cache.get('foo'), {'bar': 1})
+        self.assertIsNone(self.cache.get('bar'))
+
+    def test_lru(self):
+        self.cache.set('foo', 1)
+        self.cache.set('bar', 2)
+        self.cache.get('foo')
+        self.cache.set('baz', 3)
+        self.assertEqual(self.cache.get('foo'), 1)
+        self.assertIsNone(self.cache.get('bar'))
+        self.assertEqual(len(self.cache), 2)
+
+    def test_ttl(self):
+        self.cache.set('foo', 1, ttl=-1)
+        self.assertIsNone(self.cache.get('foo'))
+
+    def test_get_many(self):
+        self.cache.set('foo', 1)
+        self.assertEqual(self.cache.get_many(['foo', 'bar']), {'foo': 1})
+
+
+class SqliteCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'cache.sqlite')
+        self.cache = SqliteCache(self.path)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_set_get(self):
+        self.cache.set('foo', {'bar': 1})
+        self.assertEqual(self.cache.get('foo'), {'bar': 1})
+        self.assertIsNone(self.cache.get('bar'))
+
+    def test_persistent(self):
+        self.cache.set('foo', [1, 2])
+        cache = SqliteCache(self.path)
+        self.assertEqual(cache.get('foo'), [1, 2])
+        cache.close()
+
+    def test_ttl(self):
+        self.cache.set('foo', 1, ttl=-1)
+        self.assertIsNone(self.cache.get('foo'))
+
+    def test_get_many(self):
+        self.cache.set('foo', 1)
+        self.cache.set('bar', 2, ttl=-1)
+        self.assertEqual(self.cache.get_many(['foo', 'bar', 'baz']), {'foo': 1})
+
+    def test_delete(self):
+        self.cache.set('foo', 1)
+        self.cache.delete('foo')
+        self.assertNotIn('foo', self.cache)
+
+
+class RedisCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeRedisServer().start()
+        self.cache = RedisCache(*self.server.address)
+
+    def tearDown(self):
+        self.cache.close()
+        self.server.stop()
+
+    def test_set_get(self):
+        self.cache.set('foo', {'bar': 1, 'title': u'\xe9'})
+        self.assertEqual(self.cache.get('foo'), {'bar': 1, 'title': u'\xe9'})
+        self.assertIsNone(self.cache.get('bar'))
+        self.assertIn(b'wro:foo', self.server.data())
+
+    def test_shared(self):
+        self.cache.set('foo', [1, 2])
+        cache = RedisCache(*self.server.address)
+        self.assertEqual(cache.get('foo'), [1, 2])
+        cache.close()
+
+    def test_ttl(self):
+        self.cache.set('foo', 1, ttl=-1)
+        self.assertIsNone(self.cache.get('foo'))
+        self.cache.set('foo', 1, ttl=60)
+        self.assertEqual(self.server.commands[-1][3:], [b'PX', b'60000'])
+
+    def test_get_many(self):
+        self.cache.set_many({'foo': 1, 'bar': 2})
+        self.server.commands[:] = []
+        self.assertEqual(self.cache.get_many(['foo', 'bar', 'baz']), {'foo': 1, 'bar': 2})
+        # Single command
+        self.assertEqual(self.server.commands, [[b'MGET', b'wro:foo', b'wro:bar', b'wro:baz']])
+
+    def test_delete_clear(self):
+        self.cache.set('foo', 1)
+        self.cache.set('bar', 1)
+        self.cache.execute(('SET', 'other', 'value'))
+        self.cache.delete('foo')
+        self.assertNotIn('foo', self.cache)
+        self.cache.clear()
+        self.assertNotIn('bar', self.cache)
+        self.assertEqual(list(self.server.data()), [b'other'])
+
+    def test_invalid_value(self):
+        self.cache.execute(('SET', 'wro:foo', 'not serialized'))
+        self.assertIsNone(self.cache.get('foo'))
+
+    def test_db_password(self):
+        server = FakeRedisServer(password='secret').start()
+        cache = RedisCache(*server.address, db=2, password='secret')
+        cache.set('foo', 1)
+        self.assertEqual(cache.get('foo'), 1)
+        self.assertIn(b'wro:foo', server.data(2))
+        cache.close()
+        cache = RedisCache(*server.address)
+        self.assertRaises(RedisError, cache.execute, ('GET', 'wro:foo'))
+        cache.close()
+        server.stop()
+
+    def test_wrong_password(self):
+        server = FakeRedisServer(password='secret').start()
+        cache = RedisCache(*server.address, password='wrong')
+        # Error replies are misses and the connection is not kept
+        cache.set('foo', 1)
+        cache.set_many({'bar': 2})
+        self.assertIsNone(cache.get('foo'))
+        self.assertEqual(cache.get_many(['foo', 'bar']), {})
+        self.assertIsNone(cache._sock)
+        self.assertEqual(server.data(), {})
+        # Authenticates again on the next call
+        cache.password = 'secret'
+        cache.set('foo', 1)
+        self.assertEqual(cache.get('foo'), 1)
+        cache.close()
+        server.stop()
+
+    def test_server_down(self):
+        self.cache.set('foo', 1)
+        self.server.stop()
+        # Unreachable server is a miss
+        self.cache.set('foo', 2)
+        self.assertIsNone(self.cache.get('foo'))
+        self.assertEqual(self.cache.get_many(['foo']), {})
+        # Reconnects
+        self.server = FakeRedisServer().start()
+        self.cache.address = self.server.address
+        self.cache.set('foo', 2)
+        self.assertEqual(self.cache.get('foo'), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
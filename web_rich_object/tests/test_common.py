@@ -13,6 +13,7 @@ class WroInitTest(utils.BaseWebRichObjectTestCase):
             WRO()
 
     @patch('web_rich_object.api.urlopen', **{
+        'return_value.read.return_value': '',
         'return_value.info.return_value.__dict__': {'headers': ''},
     })
     def test_url(self, mock_urlopen):
@@ -26,6 +27,7 @@ class WroInitTest(utils.BaseWebRichObjectTestCase):
         self.assertEqual(request.headers['User-agent'], DEFAULT_USER_AGENT)
 
     @patch('web_rich_object.api.urlopen', **{
+        'return_value.read.return_value': '',
         'return_value.info.return_value.__dict__': {'headers': ''},
     })
     def test_url_headers(self, mock_urlopen):
@@ -37,6 +39,7 @@ class WroInitTest(utils.BaseWebRichObjectTestCase):
         self.assertEqual(request.headers['Foo'], 'bar')
 
     @patch('web_rich_object.api.urlopen', **{
+        'return_value.read.return_value': '',
         'return_value.info.return_value.__dict__': {'headers': ''},
     })
     def test_url_user_agent(self, mock_urlopen):
@@ -53,6 +56,16 @@ class WroInitTest(utils.BaseWebRichObjectTestCase):
         WRO(html=html)
         self.assertFalse(mock_urlopen.called)
 
+    @patch('web_rich_object.api.urlopen', **{
+        'return_value.read.return_value': '<html><title>Bar</title></html>',
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    })
+    def test_html_with_url(self, mock_urlopen):
+        # URL is downloaded, given HTML ignored
+        wro = WRO(self.url, html='<html><title>Foo</title></html>')
+        self.assertTrue(mock_urlopen.called)
+        self.assertEqual(wro.title, 'Bar')
+
 
 class WroTitleTest(utils.BaseWebRichObjectTestCase):
     def test_default_is_site_name(self):
@@ -153,6 +166,14 @@ class WroLocaleAlternativeTest(utils.BaseWebRichObjectTestCase):
         'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
     }
 
+    def test_not_html_is_none(self):
+        wro = WRO(self.url)
+        self.assertEqual(wro.locale_alternative, None)
+    test_not_html_is_none.mock_attrs = {
+        'return_value.read.return_value': '',
+        'return_value.info.return_value.__dict__': utils.UNKNOW_RESPONSE_INFO,
+    }
+
 
 class WroSiteNameTest(utils.BaseWebRichObjectTestCase):
     def test_default_is_hostname(self):
@@ -0,0 +1,149 @@
+import unittest
+import zlib
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+from web_rich_object import compression, fingerprint
+from web_rich_object.api import WebRichObject as WRO
+from web_rich_object.cache import MemoryCache
+from web_rich_object.failures import FailureGuard
+from web_rich_object.tests import utils
+from web_rich_object.tests.server import StandInServer, CORPUS
+
+BODY = b'<html><head><title>Foo</title></head><body>' + b'<p>Bar</p>' * 1000 + b'</body></html>'
+
+
+def compress(data, wbits):
+    compressor = zlib.compressobj(9, zlib.DEFLATED, wbits)
+    return compressor.compress(data) + compressor.flush()
+
+
+def decode(decoder, data, size=1024):
+    chunks = []
+    for i in range(0, len(data), 100):
+        chunks.extend(compression.iter_decode(decoder, data[i:i+100], size))
+    return chunks
+
+
+class FakeBrotliDecompressor(object):
+    """Expand each input byte a thousand times, bounded like brotli 1.1."""
+    def __init__(self):
+        self.pending = b''
+
+    def can_accept_more_data(self):
+        return not self.pending
+
+    def process(self, data, output_buffer_limit):
+        if data and self.pending:
+            raise ValueError("Input given with pending output")
+        self.pending += b''.join(byte * 1000 for byte in
+                                 (data[i:i+1] for i in range(len(data))))
+        chunk, self.pending = self.pending[:output_buffer_limit], self.pending[output_buffer_limit:]
+        return chunk
+
+
+class DecoderTest(unittest.TestCase):
+    def test_gzip(self):
+        decoder = compression.get_decoder('gzip')
+        self.assertEqual(b''.join(decode(decoder, compress(BODY, 16 + zlib.MAX_WBITS))), BODY)
+
+    def test_deflate(self):
+        decoder = compression.get_decoder('deflate')
+        self.assertEqual(b''.join(decode(decoder, compress(BODY, zlib.MAX_WBITS))), BODY)
+        # Raw deflate sent by some servers
+        decoder = compression.get_decoder('deflate')
+        self.assertEqual(b''.join(decode(decoder, compress(BODY, -zlib.MAX_WBITS))), BODY)
+
+    def test_bounded_pieces(self):
+        bomb = compress(b'\0' * 10**7, 16 + zlib.MAX_WBITS)
+        decoder = compression.get_decoder('gzip')
+        pieces = compression.iter_decode(decoder, bomb, 1024)
+        for _ in range(10):
+            self.assertEqual(len(next(pieces)), 1024)
+
+    def test_invalid(self):
+        decoder = compression.get_decoder('gzip')
+        self.assertRaises(compression.DecodingError, decode, decoder, b'not gzip')
+        self.assertRaises(compression.DecodingError, compression.get_decoder, 'compress')
+
+    def test_identity(self):
+        self.assertIsNone(compression.get_decoder(None))
+        self.assertIsNone(compression.get_decoder('identity'))
+
+    def test_get_content_encoding(self):
+        self.assertEqual(compression.get_content_encoding({'content-encoding': 'X-Gzip '}), 'gzip')
+        self.assertEqual(compression.get_content_encoding({'Content-Encoding': 'br'}), 'br')
+        self.assertIsNone(compression.get_content_encoding({'Content-Type': 'text/html'}))
+
+    @unittest.skipIf(compression.brotli is None, "brotli not installed")
+    def test_brotli(self):
+        decoder = compression.get_decoder('br')
+        self.assertEqual(b''.join(decode(decoder, compression.brotli.compress(BODY))), BODY)
+
+    @patch('web_rich_object.compression.brotli')
+    def test_brotli_bounded(self, mock_brotli):
+        mock_brotli.Decompressor = FakeBrotliDecompressor
+        decoder = compression.BrotliDecoder()
+        chunks = decode(decoder, b'ab' * 100, size=512)
+        self.assertTrue(all(len(chunk) <= 512 for chunk in chunks))
+        self.assertEqual(b''.join(chunks), (b'a' * 1000 + b'b' * 1000) * 100)
+
+
+class CompressedDownloadTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        corpus = dict(CORPUS)
+        corpus['/bomb'] = ('text/html', BODY + b' ' * 5 * 10**6)
+        cls.server = StandInServer(corpus, gzip=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def get(self, path, **kwargs):
+        return WRO(self.server.url(path), redirect_cache=MemoryCache(),
+                   failure_guard=FailureGuard(), **kwargs)
+
+    def test_gzip(self):
+        sent = self.server.sent
+        wro = self.get('/article')
+        self.assertEqual(wro.title, 'Article')
+        self.assertEqual(wro.html, CORPUS['/article'][1].encode('utf-8'))
+        self.assertLess(self.server.sent - sent, len(wro.html) / 5)
+
+    def test_identity(self):
+        wro = self.get('/article', headers={'Accept-Encoding': 'identity'})
+        self.assertEqual(wro.html, CORPUS['/article'][1].encode('utf-8'))
+
+    @patch('web_rich_object.api.DOWNLOAD_MAX_SIZE', 100000)
+    def test_max_size_decoded(self):
+        wro = self.get('/bomb')
+        self.assertEqual(len(wro.body), 100000)
+        self.assertEqual(wro.title, 'Foo')
+
+    @patch('web_rich_object.api.READ_CHUNK_SIZE', 512)
+    def test_head_only(self):
+        html = CORPUS['/article'][1].encode('utf-8')
+        wro = self.get('/article', previous_fingerprint=fingerprint.get_fingerprint(html))
+        self.assertTrue(wro.unchanged)
+        self.assertLess(len(wro.body), len(html))
+
+    def test_decoding_error_not_host_failure(self):
+        guard = FailureGuard()
+        info = dict(utils.HTML_RESPONSE_INFO)
+        info['headers'] = info['headers'] + ['Content-Encoding: gzip\r\n']
+        with patch('web_rich_object.api.urlopen', **{
+            'return_value.read.return_value': b'not gzip',
+            'return_value.info.return_value.__dict__': info,
+        }):
+            for _ in range(guard.breaker.threshold):
+                with self.assertRaises(compression.DecodingError):
+                    WRO('http://example.com/broken', redirect_cache=MemoryCache(),
+                        failure_guard=guard)
+        self.assertFalse(guard.breaker.is_open('example.com'))
+        self.assertIsNone(guard.cache.get('http://example.com/broken'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+from io import BytesIO
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+try:
+    from urllib.error import HTTPError, URLError
+except ImportError:
+    from urllib2 import HTTPError, URLError
+from web_rich_object.api import WebRichObject as WRO
+from web_rich_object.failures import (
+    CircuitBreaker, FailureGuard, CachedFailure, HostUnavailable, is_host_failure,
+)
+from web_rich_object.tests.test_redirects import html_response
+
+
+def http_error(url, code):
+    return HTTPError(url, code, 'Error', {}, BytesIO(b''))
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_open(self):
+        breaker = CircuitBreaker(threshold=2, cooldown=60)
+        breaker.failure('example.com')
+        self.assertTrue(breaker.allow('example.com'))
+        breaker.failure('example.com')
+        self.assertTrue(breaker.is_open('example.com'))
+        self.assertFalse(breaker.allow('example.com'))
+        self.assertTrue(breaker.allow('example.org'))
+
+    def test_success_resets(self):
+        breaker = CircuitBreaker(threshold=2, cooldown=60)
+        breaker.failure('example.com')
+        breaker.success('example.com')
+        breaker.failure('example.com')
+        self.assertTrue(breaker.allow('example.com'))
+
+    @patch('web_rich_object.failures.time')
+    def test_half_open(self, mock_time):
+        mock_time.time.return_value = 1000
+        breaker = CircuitBreaker(threshold=1, cooldown=30)
+        breaker.failure('example.com')
+        self.assertFalse(breaker.allow('example.com'))
+        mock_time.time.return_value = 1030
+        # A single probe
+        self.assertTrue(breaker.allow('example.com'))
+        self.assertFalse(breaker.allow('example.com'))
+        breaker.success('example.com')
+        self.assertTrue(breaker.allow('example.com'))
+        self.assertFalse(breaker.is_open('example.com'))
+
+
+class FailureGuardTest(unittest.TestCase):
+    def test_is_host_failure(self):
+        self.assertTrue(is_host_failure(URLError('timed out')))
+        self.assertTrue(is_host_failure(http_error('http://example.com', 503)))
+        self.assertTrue(is_host_failure(http_error('http://example.com', 429)))
+        self.assertFalse(is_host_failure(http_error('http://example.com', 404)))
+
+    def test_negative_cache(self):
+        guard = FailureGuard()
+        guard.check('http://example.com/foo')
+        guard.failure('http://example.com/foo', http_error('http://example.com/foo', 404))
+        with self.assertRaises(CachedFailure):
+            guard.check('http://example.com/foo')
+        guard.check('http://example.com/bar')
+
+    def test_circuit(self):
+        guard = FailureGuard(breaker=CircuitBreaker(threshold=2))
+        guard.failure('http://example.com/foo', IOError())
+        guard.failure('http://example.com/bar', IOError())
+        with self.assertRaises(HostUnavailable):
+            guard.check('http://example.com/baz')
+
+    def test_redirected_host(self):
+        guard = FailureGuard(breaker=CircuitBreaker(threshold=1))
+        guard.failure('http://t.co/foo', IOError(), host_url='http://example.com/foo')
+        self.assertTrue(guard.breaker.is_open('example.com'))
+        self.assertFalse(guard.breaker.is_open('t.co'))
+
+
+class WroFailureTest(unittest.TestCase):
+    @patch('web_rich_object.api.urlopen')
+    def test_negative_cache(self, mock_urlopen):
+        mock_urlopen.side_effect = http_error('http://example.com/', 500)
+        guard = FailureGuard()
+        with self.assertRaises(HTTPError):
+            WRO('http://example.com/', failure_guard=guard)
+        with self.assertRaises(CachedFailure):
+            WRO('http://example.com/', failure_guard=guard)
+        self.assertEqual(mock_urlopen.call_count, 1)
+
+    @patch('web_rich_object.api.urlopen')
+    def test_circuit(self, mock_urlopen):
+        mock_urlopen.side_effect = URLError('timed out')
+        guard = FailureGuard(breaker=CircuitBreaker(threshold=2))
+        for path in ('/foo', '/bar'):
+            with self.assertRaises(URLError):
+                WRO('http://example.com' + path, failure_guard=guard)
+        with self.assertRaises(HostUnavailable):
+            WRO('http://example.com/baz', failure_guard=guard)
+        self.assertEqual(mock_urlopen.call_count, 2)
+
+    @patch('web_rich_object.api.urlopen')
+    def test_success(self, mock_urlopen):
+        mock_urlopen.side_effect = [URLError('timed out'), html_response()]
+        guard = FailureGuard(breaker=CircuitBreaker(threshold=2))
+        with self.assertRaises(URLError):
+            WRO('http://example.com/foo', failure_guard=guard)
+        WRO('http://example.com/bar', failure_guard=guard)
+        self.assertFalse(guard.breaker.is_open('example.com'))
+        self.assertEqual(guard.breaker._hosts, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
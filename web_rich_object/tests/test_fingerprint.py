@@ -0,0 +1,82 @@
+import unittest
+try:
+    from unittest.mock import patch, MagicMock
+except ImportError:
+    from mock import patch, MagicMock
+from web_rich_object.tests import utils
+from web_rich_object.api import WebRichObject as WRO
+from web_rich_object import fingerprint
+
+PAGE = b'<html><head><title>Foo</title></head><body>Bar</body></html>'
+CHANGED_BODY_PAGE = b'<html><head><title>Foo</title></head><body>Baz</body></html>'
+CHANGED_HEAD_PAGE = b'<html><head><title>Bar</title></head><body>Bar</body></html>'
+
+
+def chunked_response(content, chunk_size=8):
+    response = MagicMock()
+    response.read.side_effect = [content[i:i+chunk_size]
+                                 for i in range(0, len(content), chunk_size)] + [b'']
+    response.info.return_value.__dict__ = utils.HTML_RESPONSE_INFO
+    return response
+
+
+class HeadFingerprintTest(unittest.TestCase):
+    def test_chunks(self):
+        head_fingerprint = fingerprint.HeadFingerprint()
+        for i in range(0, len(PAGE), 5):
+            head_fingerprint.update(PAGE[i:i+5])
+        self.assertTrue(head_fingerprint.done)
+        self.assertEqual(head_fingerprint.hexdigest(), fingerprint.get_fingerprint(PAGE))
+
+    def test_body_ignored(self):
+        self.assertEqual(fingerprint.get_fingerprint(PAGE),
+                         fingerprint.get_fingerprint(CHANGED_BODY_PAGE))
+        self.assertNotEqual(fingerprint.get_fingerprint(PAGE),
+                            fingerprint.get_fingerprint(CHANGED_HEAD_PAGE))
+
+    def test_no_head(self):
+        head_fingerprint = fingerprint.HeadFingerprint()
+        head_fingerprint.update(b'Foo')
+        self.assertFalse(head_fingerprint.done)
+
+
+@patch('web_rich_object.api.READ_CHUNK_SIZE', 8)
+class WroFingerprintTest(unittest.TestCase):
+    @patch('web_rich_object.api.urlopen')
+    def test_full_read(self, mock_urlopen):
+        mock_urlopen.return_value = chunked_response(PAGE)
+        wro = WRO('http://example.com')
+        self.assertEqual(wro.html, PAGE)
+        self.assertEqual(wro.fingerprint, fingerprint.get_fingerprint(PAGE))
+        self.assertFalse(wro.unchanged)
+
+    @patch('web_rich_object.api.urlopen')
+    def test_unchanged_stops_after_head(self, mock_urlopen):
+        mock_urlopen.return_value = chunked_response(CHANGED_BODY_PAGE)
+        wro = WRO('http://example.com', previous_fingerprint=fingerprint.get_fingerprint(PAGE))
+        self.assertTrue(wro.unchanged)
+        self.assertIn(b'</head>', wro.html)
+        self.assertNotIn(b'Baz', wro.html)
+        self.assertTrue(mock_urlopen.return_value.close.called)
+
+
+@patch('web_rich_object.api.READ_CHUNK_SIZE', 8)
+class RefreshTest(unittest.TestCase):
+    @patch('web_rich_object.api.urlopen')
+    def test_refresh(self, mock_urlopen):
+        mock_urlopen.return_value = chunked_response(PAGE)
+        result = fingerprint.refresh('http://example.com')
+        self.assertEqual(result['title'], 'Foo')
+        self.assertEqual(result['fingerprint'], fingerprint.get_fingerprint(PAGE))
+        # Unchanged head
+        mock_urlopen.return_value = chunked_response(CHANGED_BODY_PAGE)
+        with patch('web_rich_object.api.parsing.parse_html') as mock_parse:
+            self.assertIs(fingerprint.refresh('http://example.com', result), result)
+            self.assertFalse(mock_parse.called)
+        # Changed head
+        mock_urlopen.return_value = chunked_response(CHANGED_HEAD_PAGE)
+        self.assertEqual(fingerprint.refresh('http://example.com', result)['title'], 'Bar')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -286,67 +286,127 @@ class WebRichObjectImagesTest(utils.BaseWebRichObjectTestCase):
     }
 
 
-class WebRichObjectStructImageTest(utils.BaseWebRichObjectTestCase):
-    def setUp(self):
-        self.skipTest('In progress')
-
-    def test_url(self):
-        pass
-
-    def test_width(self):
-        pass
+STRUCT_IMAGES = """<html>
+<meta property="og:image:width" content="10"/>
+<meta property="og:image" content="http://example.com/foo.png"/>
+<meta property="og:image:secure_url" content="https://example.com/foo.png"/>
+<meta property="og:image:type" content="image/png"/>
+<meta property="og:image:width" content="400"/>
+<meta property="og:image:height" content="300"/>
+<meta property="og:title" content="Foo"/>
+<meta property="og:image" content="http://example.com/bar.png"/>
+<meta property="og:image:url" content="http://example.com/bar.png"/>
+<meta property="og:image:width" content="1000"/>
+<meta property="og:image:width" content="20"/>
+</html>"""
 
-    def test_height(self):
-        pass
 
-    def test_type(self):
-        pass
+class WebRichObjectStructImageTest(utils.BaseWebRichObjectTestCase):
+    def test_attributes(self):
+        wro = WRO(self.url)
+        self.assertEqual(wro.struct_image, {
+            'url': 'http://example.com/foo.png',
+            'secure_url': 'https://example.com/foo.png',
+            'type': 'image/png',
+            'width': '400',
+            'height': '300',
+        })
+    test_attributes.mock_attrs = {
+        'return_value.read.return_value': STRUCT_IMAGES,
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    }
 
-    def test_secure_url(self):
-        pass
+    def test_all_images(self):
+        wro = WRO(self.url)
+        # Properties before any image dropped, first value wins
+        self.assertEqual(wro.struct_media['image'][1:], [
+            {'url': 'http://example.com/bar.png', 'width': '1000'},
+        ])
+    test_all_images.mock_attrs = test_attributes.mock_attrs
 
     def test_default_is_empty(self):
-        pass
-
-
-class WebRichObjectStructVideoTest(utils.BaseWebRichObjectTestCase):
-    def setUp(self):
-        self.skipTest('In progress')
-
-    def test_url(self):
-        pass
+        wro = WRO(self.url)
+        self.assertEqual(wro.struct_image, {})
+        self.assertEqual(wro.struct_media, {'image': [], 'video': [], 'audio': []})
+    test_default_is_empty.mock_attrs = {
+        'return_value.read.return_value': '<html></html>',
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    }
 
-    def test_width(self):
-        pass
 
-    def test_height(self):
-        pass
+STRUCT_VIDEOS = """<html>
+<meta property="og:video:url" content="http://example.com/foo.mp4"/>
+<meta property="og:video:type" content="video/mp4"/>
+<meta property="og:video:width" content="1280"/>
+<meta property="og:video:height" content="720"/>
+<meta property="og:video" content="http://example.com/bar.swf"/>
+<meta property="og:video:width" content="640"/>
+<meta name="twitter:player:width" content="480"/>
+</html>"""
 
-    def test_type(self):
-        pass
 
-    def test_secure_url(self):
-        pass
+class WebRichObjectStructVideoTest(utils.BaseWebRichObjectTestCase):
+    def test_attributes(self):
+        wro = WRO(self.url)
+        self.assertEqual(wro.struct_video, {
+            'url': 'http://example.com/foo.mp4',
+            'type': 'video/mp4',
+            'width': '1280',
+            'height': '720',
+        })
+        self.assertEqual(len(wro.struct_media['video']), 2)
+    test_attributes.mock_attrs = {
+        'return_value.read.return_value': STRUCT_VIDEOS,
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    }
 
-    def test_default_is_empty(self):
-        pass
+    def test_video_info_from_struct_video(self):
+        wro = WRO(self.url)
+        # og:video has priority, only its own attributes are used
+        self.assertEqual(wro.video_info, {
+            'url': 'http://example.com/bar.swf',
+            'width': '640',
+        })
+    test_video_info_from_struct_video.mock_attrs = test_attributes.mock_attrs
+
+    def test_video_info_without_struct_video(self):
+        wro = WRO(self.url)
+        self.assertEqual(wro.struct_video, {})
+        self.assertEqual(wro.video_info, {
+            'url': 'http://example.com/foo.html',
+            'width': '480',
+        })
+    test_video_info_without_struct_video.mock_attrs = {
+        'return_value.read.return_value': '<html><meta name="twitter:player" content="/foo.html"/>'
+                                          '<meta name="twitter:player:width" content="480"/></html>',
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    }
 
 
 class WebRichObjectStructAudioTest(utils.BaseWebRichObjectTestCase):
-    def setUp(self):
-        self.skipTest('In progress')
-
-    def test_url(self):
-        pass
-
-    def test_type(self):
-        pass
-
-    def test_secure_url(self):
-        pass
+    def test_attributes(self):
+        wro = WRO(self.url)
+        self.assertEqual(wro.struct_audio, {
+            'url': 'http://example.com/foo.mp3',
+            'secure_url': 'https://example.com/foo.mp3',
+            'type': 'audio/mpeg',
+        })
+    test_attributes.mock_attrs = {
+        'return_value.read.return_value': '<html>'
+                                          '<meta property="og:audio" content="http://example.com/foo.mp3"/>'
+                                          '<meta property="og:audio:secure_url" content="https://example.com/foo.mp3"/>'
+                                          '<meta property="og:audio:type" content="audio/mpeg"/>'
+                                          '</html>',
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    }
 
     def test_default_is_empty(self):
-        pass
+        wro = WRO(self.url)
+        self.assertEqual(wro.struct_audio, {})
+    test_default_is_empty.mock_attrs = {
+        'return_value.read.return_value': '<html></html>',
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    }
 
 
 if __name__ == '__main__':
@@ -0,0 +1,144 @@
+import unittest
+from io import BytesIO
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+from PIL import Image
+from web_rich_object.tests import utils
+from web_rich_object.api import WebRichObject as WRO
+from web_rich_object import images
+from web_rich_object import utils as wro_utils
+from web_rich_object.cache import MemoryCache
+from web_rich_object.failures import FailureGuard
+
+
+def create_image(size=(100, 100)):
+    image_file = BytesIO()
+    Image.new('RGB', size).save(image_file, 'PNG')
+    return image_file.getvalue()
+
+
+class GetCandidateTest(unittest.TestCase):
+    def test_from_attributes(self):
+        candidate = images.get_candidate({'src': '/foo.png', 'width': '640', 'height': '480px'})
+        self.assertEqual((candidate.width, candidate.height), (640, 480))
+
+    def test_from_srcset(self):
+        candidate = images.get_candidate({
+            'src': '/foo-small.png',
+            'srcset': '/foo-small.png 320w, /foo-big.png 1280w',
+        })
+        self.assertEqual(candidate.url, '/foo-big.png')
+        self.assertEqual(candidate.width, 1280)
+
+    def test_from_url(self):
+        candidate = images.get_candidate({'src': 'http://s1.dmcdn.net/I8M_O/526x297-FRU.jpg'})
+        self.assertEqual((candidate.width, candidate.height), (526, 297))
+        candidate = images.get_candidate({'src': '/269350328_1280x720.jpg'})
+        self.assertEqual((candidate.width, candidate.height), (1280, 720))
+
+    def test_skipped(self):
+        self.assertIsNone(images.get_candidate({'src': 'data:image/gif;base64,R0lGOD'}))
+        self.assertIsNone(images.get_candidate({'src': '/img/sprite.png'}))
+        self.assertIsNone(images.get_candidate({'src': '/favicon.ico'}))
+        self.assertIsNone(images.get_candidate({'src': '/static/icons/share.png'}))
+        self.assertIsNone(images.get_candidate({}))
+        for url in ('/img/spacer.gif', '/pixel_1x1.gif', '/p/transparent-1.png',
+                    '/ads/banner.jpg', 'https://ad.doubleclick.net/foo.jpg',
+                    '/icons/share.svg', '/tracking/pixel.gif?id=1'):
+            self.assertIsNone(images.get_candidate({'src': url}), url)
+
+    def test_not_skipped(self):
+        for url in ('/img/pixel-3-review.jpg', '/art/spritesheet-art.png',
+                    '/lexicons/cover.jpg', '/news/tracking-the-storm.jpg',
+                    '/blank-canvas-painting.jpg', '/photos/transparent-glass.png'):
+            self.assertIsNotNone(images.get_candidate({'src': url}), url)
+
+
+class RankImagesTest(unittest.TestCase):
+    def test_order(self):
+        candidates = images.rank_images([
+            {'src': '/unknown.png'},
+            {'src': '/small.png', 'width': '10', 'height': '10'},
+            {'src': '/medium.png', 'width': '200', 'height': '100'},
+            {'src': '/big.png', 'width': '800', 'height': '600'},
+            {'src': '/big.png'},
+        ])
+        self.assertEqual([c.url for c in candidates],
+                         ['/big.png', '/medium.png', '/unknown.png'])
+
+
+class HtmlImageRankingTest(utils.BaseWebRichObjectTestCase):
+    def test_from_sized_image(self):
+        wro = WRO(self.url)
+        with patch('web_rich_object.api.utils.get_biggest_image') as mock:
+            self.assertEqual(wro.image, 'http://example.com/big.png')
+            self.assertFalse(mock.called)
+    test_from_sized_image.mock_attrs = {
+        'return_value.read.return_value': '<html><img src="/pixel.gif"><img src="/foo.png"><img src="/big.png" width="800" height="600"></html>',
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    }
+
+    def test_probe_limit(self):
+        wro = WRO(self.url)
+        with patch('web_rich_object.api.utils.get_biggest_image') as mock:
+            mock.return_value = 'http://example.com/0.png'
+            wro.image
+            urls = mock.call_args[0][0]
+            self.assertEqual(len(urls), images.IMAGE_PROBE_COUNT)
+            self.assertEqual(urls[0], 'http://example.com/0.png')
+    test_probe_limit.mock_attrs = {
+        'return_value.read.return_value': '<html>%s</html>' % ''.join(
+            '<img src="/%d.png">' % i for i in range(10)),
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    }
+
+
+class GetImageSizeTest(unittest.TestCase):
+    @patch('web_rich_object.utils.urlopen', **{
+        'return_value.read.return_value': create_image((120, 90)),
+        'return_value.info.return_value': {'Content-Type': 'image/png'},
+    })
+    def test_cached(self, mock_urlopen):
+        cache = MemoryCache()
+        size = wro_utils.get_image_size('http://example.com/foo.png', cache=cache)
+        self.assertEqual(size, {'width': 120, 'height': 90, 'content_type': 'image/png'})
+        wro_utils.get_image_size('http://example.com/foo.png', cache=cache)
+        self.assertEqual(mock_urlopen.call_count, 1)
+
+    @patch('web_rich_object.utils.urlopen', **{
+        'return_value.read.return_value': b'<html></html>',
+    })
+    def test_not_an_image(self, mock_urlopen):
+        cache = MemoryCache()
+        self.assertEqual(wro_utils.get_image_size('http://example.com/', cache=cache), {})
+        self.assertEqual(cache.get('http://example.com/'), {})
+
+    @patch('web_rich_object.utils.urlopen', side_effect=IOError)
+    def test_network_error_not_cached(self, mock_urlopen):
+        cache = MemoryCache()
+        guard = FailureGuard()
+        self.assertIsNone(wro_utils.get_image_size('http://example.com/', cache=cache, guard=guard))
+        self.assertNotIn('http://example.com/', cache)
+        # Negative cached by the guard
+        self.assertIsNone(wro_utils.get_image_size('http://example.com/', cache=cache, guard=guard))
+        self.assertEqual(mock_urlopen.call_count, 1)
+
+    @patch('web_rich_object.utils.urlopen')
+    def test_biggest_image(self, mock_urlopen):
+        cache = MemoryCache()
+        cache.set('http://example.com/small.png', {'width': 10, 'height': 10})
+        cache.set('http://example.com/big.png', {'width': 300, 'height': 200})
+        cache.set('http://example.com/medium.png', {'width': 200, 'height': 100})
+        biggest = wro_utils.get_biggest_image([
+            'http://example.com/small.png',
+            'http://example.com/medium.png',
+            'http://example.com/big.png',
+        ], cache=cache)
+        self.assertEqual(biggest, 'http://example.com/big.png')
+        self.assertFalse(mock_urlopen.called)
+
+
+if __name__ == '__main__':
+    unittest.main()
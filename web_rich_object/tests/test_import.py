@@ -0,0 +1,34 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+import web_rich_object
+
+HEAVY_MODULES = ('bs4', 'chardet', 'pdfminer', 'PIL', 'sqlite3')
+IMPORT_SCRIPT = """
+import json, sys
+sys.path.insert(0, %r)
+import web_rich_object
+print(json.dumps(sorted(sys.modules)))
+"""
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(web_rich_object.__file__)))
+
+
+def get_imported_modules():
+    """Modules loaded by ``import web_rich_object`` in a fresh interpreter."""
+    script = IMPORT_SCRIPT % ROOT_DIR
+    output = subprocess.check_output([sys.executable, '-c', script])
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+class ImportTest(unittest.TestCase):
+    def test_heavy_modules_not_loaded(self):
+        loaded = [name for name in get_imported_modules()
+                  if name.split('.')[0] in HEAVY_MODULES]
+        self.assertEqual(loaded, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import threading
+import time
+import unittest
+from web_rich_object.api import WebRichObject as WRO
+from web_rich_object.tests import utils
+from web_rich_object.lazy import cached_field
+
+PAGE = """<html><head><title>Foo</title></head>
+<body><img src="http://example.com/a.png"/><img src="http://example.com/b.png"/></body></html>"""
+
+
+class Counter(object):
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    @cached_field
+    def value(self):
+        """Slow value."""
+        self.calls += 1
+        time.sleep(0.05)
+        if self.fail:
+            raise ValueError()
+        return 42
+
+
+def run_threads(func, count=8):
+    threads = [threading.Thread(target=func) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class CachedFieldTest(unittest.TestCase):
+    def test_once(self):
+        counter = Counter()
+        results = []
+        run_threads(lambda: results.append(counter.value))
+        self.assertEqual(results, [42] * 8)
+        self.assertEqual(counter.calls, 1)
+        self.assertEqual(counter._value, 42)
+
+    def test_preset(self):
+        counter = Counter()
+        counter._value = 1
+        self.assertEqual(counter.value, 1)
+        self.assertEqual(counter.calls, 0)
+
+    def test_error_retried(self):
+        counter = Counter()
+        counter.fail = True
+        self.assertRaises(ValueError, lambda: counter.value)
+        counter.fail = False
+        self.assertEqual(counter.value, 42)
+        self.assertEqual(counter.calls, 2)
+
+    def test_read_only(self):
+        with self.assertRaises(AttributeError):
+            Counter().value = 1
+        self.assertEqual(Counter.value.__doc__, "Slow value.")
+
+
+class SharedWebRichObjectTest(utils.BaseWebRichObjectTestCase):
+    def test_image_probed_once(self):
+        wro = WRO(self.url)
+        calls = []
+
+        class Prober(object):
+            def get_biggest_image(self, urls, user_agent=None):
+                calls.append(urls)
+                time.sleep(0.05)
+                return urls[-1]
+        wro.image_prober = Prober()
+        results = []
+        run_threads(lambda: results.append((wro.image, wro.title)))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(set(results), set([('http://example.com/b.png', 'Foo')]))
+    test_image_probed_once.mock_attrs = {
+        'return_value.read.return_value': PAGE,
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    }
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import json
+import unittest
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+from web_rich_object.tests import utils
+from web_rich_object.api import WebRichObject as WRO
+from web_rich_object import oembed
+
+YOUTUBE_OEMBED = json.dumps({
+    'type': 'video',
+    'title': 'Sir Samuel - Urban Classik [CLIP OFFICIEL]',
+    'author_name': 'Sir Samuel',
+    'provider_name': 'YouTube',
+    'thumbnail_url': 'https://i.ytimg.com/vi/4nzaATIOAAE/hqdefault.jpg',
+    'html': '<iframe width="480" height="270" src="https://www.youtube.com/embed/4nzaATIOAAE?feature=oembed"></iframe>',
+    'width': 480,
+    'height': 270,
+}).encode('utf-8')
+
+DISCOVERY_PAGE = """<html><head>
+<link rel="alternate" type="application/json+oembed" href="http://example.com/wp-json/oembed/1.0/embed?url=http%3A%2F%2Fexample.com%2Ffoo&amp;maxwidth=600">
+</head></html>"""
+
+
+class GetFieldsTest(unittest.TestCase):
+    def test_video(self):
+        fields = oembed.get_fields(json.loads(YOUTUBE_OEMBED.decode('utf-8')))
+        self.assertEqual(fields['title'], 'Sir Samuel - Urban Classik [CLIP OFFICIEL]')
+        self.assertEqual(fields['author'], 'Sir Samuel')
+        self.assertEqual(fields['type'], 'video')
+        self.assertEqual(fields['video'], 'https://www.youtube.com/embed/4nzaATIOAAE?feature=oembed')
+        self.assertEqual(fields['video_width'], '480')
+
+    def test_photo(self):
+        fields = oembed.get_fields({'type': 'photo', 'url': 'http://example.com/foo.jpg'})
+        self.assertEqual(fields, {'type': 'image', 'image': 'http://example.com/foo.jpg'})
+
+
+class DiscoverTest(unittest.TestCase):
+    def test_discover(self):
+        self.assertEqual(
+            oembed.discover(DISCOVERY_PAGE.encode('utf-8')),
+            'http://example.com/wp-json/oembed/1.0/embed?url=http%3A%2F%2Fexample.com%2Ffoo&maxwidth=600')
+
+    def test_not_found(self):
+        self.assertIsNone(oembed.discover(b'<html></html>'))
+
+
+class OembedProvidersTest(unittest.TestCase):
+    def test_known_provider(self):
+        providers = oembed.OembedProviders()
+        self.assertEqual(
+            providers.get_oembed_url('https://www.youtube.com/watch?v=4nzaATIOAAE'),
+            'https://www.youtube.com/oembed?format=json&url=https%3A%2F%2Fwww.youtube.com%2Fwatch%3Fv%3D4nzaATIOAAE')
+        self.assertIsNone(providers.get_oembed_url('http://example.com/foo'))
+
+    def test_discovered(self):
+        providers = oembed.OembedProviders()
+        providers.add_discovered(
+            'http://www.example.com/foo',
+            'http://example.com/wp-json/oembed/1.0/embed?url=http%3A%2F%2Fexample.com%2Ffoo&maxwidth=600')
+        # Used for other pages of the host
+        self.assertEqual(
+            providers.get_oembed_url('http://www.example.com/bar'),
+            'http://example.com/wp-json/oembed/1.0/embed?format=json&maxwidth=600&url=http%3A%2F%2Fwww.example.com%2Fbar')
+        self.assertIsNone(providers.get_oembed_url('http://blog.example.com/bar'))
+
+    def test_discovered_other_site(self):
+        providers = oembed.OembedProviders()
+        providers.add_discovered(
+            'http://example.com/foo',
+            'http://example.org/oembed?url=http%3A%2F%2Fexample.com%2Ffoo')
+        providers.add_discovered(
+            'http://foo.example.com/',
+            'http://bar.example.com/oembed?url=http%3A%2F%2Ffoo.example.com%2F')
+        self.assertIsNone(providers.get_endpoint('http://example.com/foo'))
+        self.assertIsNone(providers.get_endpoint('http://foo.example.com/'))
+
+    @patch('web_rich_object.sites.urlopen', side_effect=IOError)
+    def test_error(self, mock_urlopen):
+        providers = oembed.OembedProviders()
+        self.assertIsNone(providers.extract('https://vimeo.com/39075039'))
+
+
+class WroOembedTest(unittest.TestCase):
+    @patch('web_rich_object.api.urlopen')
+    @patch('web_rich_object.sites.urlopen', **{
+        'return_value.read.return_value': YOUTUBE_OEMBED,
+    })
+    def test_skips_download(self, mock_site_urlopen, mock_urlopen):
+        wro = WRO('https://www.youtube.com/watch?v=4nzaATIOAAE',
+                  oembed_providers=oembed.OembedProviders())
+        self.assertFalse(mock_urlopen.called)
+        self.assertEqual(wro.title, 'Sir Samuel - Urban Classik [CLIP OFFICIEL]')
+        self.assertEqual(wro.author, 'Sir Samuel')
+        self.assertEqual(wro.url, 'https://www.youtube.com/watch?v=4nzaATIOAAE')
+        # Site extractor has priority
+        self.assertEqual(wro.video, 'https://www.youtube.com/embed/4nzaATIOAAE')
+
+    @patch('web_rich_object.api.urlopen', **{
+        'return_value.read.return_value': DISCOVERY_PAGE,
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    })
+    def test_discovery(self, mock_urlopen):
+        providers = oembed.OembedProviders()
+        WRO('http://example.com/foo', oembed_providers=providers)
+        self.assertIsNotNone(providers.get_endpoint('http://example.com/bar'))
+        self.assertIsNone(providers.get_endpoint('http://example.org/bar'))
+
+    @patch('web_rich_object.api.urlopen')
+    @patch('web_rich_object.sites.urlopen', **{
+        'return_value.read.return_value': YOUTUBE_OEMBED,
+    })
+    def test_discovered_skips_download(self, mock_site_urlopen, mock_urlopen):
+        providers = oembed.OembedProviders()
+        providers.add_discovered(
+            'http://example.com/foo',
+            'http://example.com/wp-json/oembed/1.0/embed?url=http%3A%2F%2Fexample.com%2Ffoo')
+        wro = WRO('http://example.com/bar', oembed_providers=providers)
+        self.assertFalse(mock_urlopen.called)
+        self.assertEqual(wro.title, 'Sir Samuel - Urban Classik [CLIP OFFICIEL]')
+        self.assertEqual(wro.url, 'http://example.com/bar')
+
+
+if __name__ == '__main__':
+    unittest.main()
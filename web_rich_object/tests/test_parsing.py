@@ -0,0 +1,122 @@
+import unittest
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+from web_rich_object.tests import utils
+from web_rich_object.api import WebRichObject as WRO
+from web_rich_object import parsing
+
+PAGE = """<html lang="fr">
+<head>
+<title>Foo</title>
+<meta property="og:title" content="Bar"/>
+<link rel="icon" href="/favicon.ico"/>
+<script>var foo = "<p>not a paragraph</p>";</script>
+<style>p {color: red;}</style>
+</head>
+<body>
+<div id="content"><div class="thumbinner"><img src="/thumb.png"></div>
+<p>First paragraph which is long enough</p>
+<p>Second paragraph</p>
+<video><source src="/foo.mp4"></video>
+</div>
+</body>
+</html>"""
+
+
+class ParseBoundedTest(unittest.TestCase):
+    def setUp(self):
+        self.soup = parsing.parse_bounded(PAGE)
+
+    def test_kept(self):
+        self.assertEqual(self.soup.find('title').text, 'Foo')
+        self.assertIsNotNone(self.soup.find('meta', property='og:title'))
+        self.assertIsNotNone(self.soup.find('link', rel='icon'))
+        self.assertEqual(self.soup.find('source').attrs['src'], '/foo.mp4')
+        thumb_tag = self.soup.find('div', attrs={'class': 'thumbinner'})
+        self.assertEqual(thumb_tag.find('img').attrs['src'], '/thumb.png')
+
+    def test_discarded(self):
+        self.assertIsNone(self.soup.find('script'))
+        self.assertIsNone(self.soup.find('style'))
+        self.assertIsNone(self.soup.find('body'))
+        self.assertIsNone(self.soup.find('div', id='content'))
+        self.assertNotIn('not a paragraph', self.soup.text)
+
+    def test_html_attrs(self):
+        self.assertEqual(self.soup.find('html').attrs, {'lang': 'fr'})
+
+    def test_max_paragraphs(self):
+        soup = parsing.parse_bounded(PAGE, max_paragraphs=1)
+        self.assertEqual(len(soup.find_all('p')), 1)
+
+    def test_empty_paragraphs_not_counted(self):
+        html = '<p></p><p> </p><p>&nbsp;<br></p><p>Foo</p><p>Bar</p>'
+        soup = parsing.parse_bounded(html, max_paragraphs=1)
+        self.assertEqual([p.get_text().strip() for p in soup.find_all('p')][-1], 'Foo')
+        self.assertNotIn('Bar', soup.text)
+
+    def test_unclosed_paragraphs(self):
+        soup = parsing.parse_bounded('<p>Foo<p>Bar<p>Baz', max_paragraphs=1)
+        self.assertEqual(soup.text.strip(), 'Foo')
+
+    def test_no_html(self):
+        soup = parsing.parse_bounded(b'Foo')
+        self.assertIsNone(soup.find())
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            parsing.parse_html(PAGE, 'foo')
+
+
+class HeadEndTest(unittest.TestCase):
+    def test_positions(self):
+        head_end = parsing.get_head_end(PAGE.encode('utf-8'))
+        self.assertEqual(head_end, (8, 0))
+        self.assertEqual(parsing.get_head_end(PAGE), head_end)
+        for mode in (parsing.PARSE_MODE_FULL, parsing.PARSE_MODE_BOUNDED):
+            soup = parsing.parse_html(PAGE, mode)
+            for name, in_head in (('title', True), ('link', True), ('img', False)):
+                tag = soup.find(name)
+                self.assertEqual((tag.sourceline, tag.sourcepos) < head_end, in_head)
+
+    def test_multibyte_line(self):
+        html = u'<title>\xe9\xe9</title></head><meta>'.encode('utf-8')
+        self.assertEqual(parsing.get_head_end(html, 'utf-8'), (1, 17))
+
+    def test_no_head(self):
+        self.assertIsNone(parsing.get_head_end(b'<p>Foo</p>'))
+
+
+class WroHeadEndTest(utils.BaseWebRichObjectTestCase):
+    def test_in_head(self):
+        wro = WRO(self.url)
+        self.assertFalse(wro.meta_index.in_body('property', 'og:title'))
+    test_in_head.mock_attrs = {
+        'return_value.read.return_value': PAGE,
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    }
+
+    @patch.object(parsing, 'HEAD_END_SEARCH_SIZE', 64)
+    def test_head_end_after_search_size(self):
+        wro = WRO(self.url)
+        self.assertTrue(wro.meta_index.in_body('property', 'og:title'))
+    test_head_end_after_search_size.mock_attrs = test_in_head.mock_attrs
+
+
+class WroBoundedParseTest(utils.BaseWebRichObjectTestCase):
+    def test_extraction(self):
+        wro = WRO(self.url, parse_mode=parsing.PARSE_MODE_BOUNDED)
+        self.assertEqual(wro.title, 'Bar')
+        self.assertEqual(wro.locale, 'FR')
+        self.assertEqual(wro.video, 'http://example.com/foo.mp4')
+        self.assertTrue(wro.description.startswith('First paragraph'))
+    test_extraction.mock_attrs = {
+        'return_value.read.return_value': PAGE,
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    }
+
+
+if __name__ == '__main__':
+    unittest.main()
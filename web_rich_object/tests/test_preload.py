@@ -0,0 +1,39 @@
+import sys
+import unittest
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+import web_rich_object
+from web_rich_object import adaptive, preload, profiling, timestamps
+
+
+class WarmupTest(unittest.TestCase):
+    @patch('web_rich_object.utils.get_biggest_image')
+    @patch('web_rich_object.api.urlopen')
+    def test_warmup(self, mock_urlopen, mock_biggest_image):
+        web_rich_object.warmup(freeze=False)
+        for module in ('bs4', 'chardet', 'pdfminer.pdfdocument', 'PIL.Image'):
+            self.assertIn(module, sys.modules)
+        self.assertFalse(mock_urlopen.called)
+        self.assertFalse(mock_biggest_image.called)
+
+    @patch.object(adaptive, 'ADAPTIVE', True)
+    @patch.object(profiling, 'PROFILE', True)
+    def test_shared_state_untouched(self):
+        timestamps.DEFAULT_PARSER.site_formats.pop('example.com', None)
+        profiling.DEFAULT_PROFILER.clear()
+        adaptive.DEFAULT_LEARNER.clear()
+        web_rich_object.warmup(freeze=False)
+        self.assertNotIn('example.com', timestamps.DEFAULT_PARSER.site_formats)
+        self.assertEqual(profiling.DEFAULT_PROFILER.top(), [])
+        self.assertEqual(adaptive.DEFAULT_LEARNER.get_stats('example.com')['pages'], 0)
+
+    @patch('web_rich_object.preload.gc')
+    def test_freeze(self, mock_gc):
+        preload.warmup()
+        self.assertTrue(mock_gc.freeze.called)
+
+
+if __name__ == '__main__':
+    unittest.main()
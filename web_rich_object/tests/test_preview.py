@@ -0,0 +1,128 @@
+import threading
+import unittest
+from datetime import datetime
+from web_rich_object import preview
+from web_rich_object.cache import MemoryCache, RedisCache
+from web_rich_object.timestamps import UTC
+from web_rich_object.tests.redis_server import FakeRedisServer
+
+
+class FakeExtract(object):
+    def __init__(self):
+        self.calls = []
+        self.error = None
+        self.title = 'Foo'
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, url, previous=None):
+        self.calls.append((url, previous))
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return {'title': self.title, 'published_time': datetime(2016, 12, 12, tzinfo=UTC)}
+
+
+class FieldsTest(unittest.TestCase):
+    def test_dump_load(self):
+        fields = {'title': 'Foo', 'published_time': datetime(2016, 12, 12, 8, 0, 15, tzinfo=UTC),
+                  'modified_time': None}
+        dumped = preview.dump_fields(fields)
+        self.assertEqual(dumped['published_time'], '2016-12-12T08:00:15+00:00')
+        self.assertEqual(preview.load_fields(dumped), fields)
+
+
+class PreviewCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.extract = FakeExtract()
+
+    def wait_refreshes(self, previews):
+        for refresh in list(previews._refreshes.values()):
+            refresh.done.wait(5)
+
+    def test_fresh(self):
+        previews = preview.PreviewCache(extract=self.extract)
+        self.assertEqual(previews.get('http://example.com/?utm_source=foo')['title'], 'Foo')
+        self.assertEqual(previews.get('http://example.com/')['title'], 'Foo')
+        self.assertEqual(len(self.extract.calls), 1)
+
+    def test_stale_while_revalidate(self):
+        previews = preview.PreviewCache(extract=self.extract, ttl=0, stale_while_revalidate=60)
+        previews.get('http://example.com/')
+        self.extract.title = 'Bar'
+        self.extract.release.clear()
+        # Stale served, a single refresh in flight
+        self.assertEqual(previews.get('http://example.com/')['title'], 'Foo')
+        self.assertEqual(previews.get('http://example.com/')['title'], 'Foo')
+        self.assertEqual(len(previews._refreshes), 1)
+        self.extract.release.set()
+        self.wait_refreshes(previews)
+        self.assertEqual(len(self.extract.calls), 2)
+        self.assertEqual(self.extract.calls[1][1]['title'], 'Foo')
+        entry = previews.cache.get(previews.get_key('http://example.com/'))
+        self.assertEqual(entry['fields']['title'], 'Bar')
+
+    def test_stale_if_error(self):
+        previews = preview.PreviewCache(extract=self.extract, ttl=0, stale_while_revalidate=0,
+                                        stale_if_error=60)
+        previews.get('http://example.com/')
+        self.extract.error = IOError()
+        self.assertEqual(previews.get('http://example.com/')['title'], 'Foo')
+        self.extract.error = None
+        self.extract.title = 'Bar'
+        self.assertEqual(previews.get('http://example.com/')['title'], 'Bar')
+
+    def test_stale_if_slow(self):
+        previews = preview.PreviewCache(extract=self.extract, ttl=0, stale_while_revalidate=0,
+                                        stale_if_error=60, refresh_timeout=0.01)
+        previews.get('http://example.com/')
+        self.extract.release.clear()
+        self.assertEqual(previews.get('http://example.com/')['title'], 'Foo')
+        self.extract.release.set()
+        self.wait_refreshes(previews)
+
+    def test_max_refreshes(self):
+        previews = preview.PreviewCache(extract=self.extract, ttl=0, stale_while_revalidate=60,
+                                        max_refreshes=1)
+        previews.get('http://example.com/foo')
+        previews.get('http://example.com/bar')
+        self.extract.release.clear()
+        previews.get('http://example.com/foo')
+        previews.get('http://example.com/bar')
+        self.assertEqual(list(previews._refreshes), [previews.get_key('http://example.com/foo')])
+        self.extract.release.set()
+        self.wait_refreshes(previews)
+
+    def test_error_without_entry(self):
+        self.extract.error = IOError()
+        previews = preview.PreviewCache(extract=self.extract)
+        with self.assertRaises(IOError):
+            previews.get('http://example.com/')
+
+    def test_invalidate(self):
+        previews = preview.PreviewCache(cache=MemoryCache(), extract=self.extract)
+        previews.get('http://example.com/')
+        previews.invalidate('http://example.com/')
+        previews.get('http://example.com/')
+        self.assertEqual(len(self.extract.calls), 2)
+
+    def test_get_many_shared(self):
+        with FakeRedisServer() as server:
+            previews = preview.PreviewCache(cache=RedisCache(*server.address),
+                                            extract=self.extract)
+            previews.get('http://example.com/foo')
+            # Another node
+            previews = preview.PreviewCache(cache=RedisCache(*server.address),
+                                            extract=self.extract)
+            results = previews.get_many(['http://example.com/foo', 'http://example.com/bar'])
+            self.assertEqual(sorted(results), ['http://example.com/bar', 'http://example.com/foo'])
+            self.assertEqual(results['http://example.com/foo']['published_time'],
+                             datetime(2016, 12, 12, tzinfo=UTC))
+            self.assertEqual([url for url, _ in self.extract.calls],
+                             ['http://example.com/foo', 'http://example.com/bar'])
+            self.assertEqual(len([c for c in server.commands if c[0] == b'MGET']), 1)
+            previews.cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import threading
+import unittest
+from io import BytesIO
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+from PIL import Image
+from web_rich_object import probes
+from web_rich_object.api import WebRichObject as WRO
+from web_rich_object.cache import MemoryCache
+from web_rich_object.failures import FailureGuard
+from web_rich_object.tests.server import StandInServer
+
+
+def create_image(size, format_='PNG'):
+    image_file = BytesIO()
+    Image.new('RGB', size).save(image_file, format_)
+    return image_file.getvalue()
+
+
+def create_page(*images):
+    return ('text/html', '<html><head><title>Foo</title></head><body>%s</body></html>' % (
+        ''.join('<img src="%s"/>' % image for image in images)))
+
+
+BIG_IMAGE = create_image((600, 600), 'BMP')
+CORPUS = {
+    '/page1': create_page('/a.png', '/b.png'),
+    '/page2': create_page('/b.png', '/c.png'),
+    '/page3': create_page('/c.png', '/missing.png'),
+    '/a.png': ('image/png', create_image((100, 100))),
+    '/b.png': ('image/png', create_image((200, 300))),
+    '/c.png': ('image/png', create_image((400, 200))),
+    '/big.bmp': ('image/bmp', BIG_IMAGE),
+    '/text': ('text/plain', 'Foo'),
+}
+
+
+class ImageProberTest(unittest.TestCase):
+    def setUp(self):
+        self.server = StandInServer(CORPUS).start()
+        self.prober = probes.ImageProber(cache=MemoryCache(), guard=FailureGuard(),
+                                         host_concurrency=1)
+
+    def tearDown(self):
+        self.prober.close()
+        self.server.stop()
+
+    def test_probe(self):
+        urls = [self.server.url(path) for path in ('/a.png', '/b.png', '/text', '/missing.png')]
+        sizes = self.prober.probe(urls + urls[:1])
+        self.assertEqual(sizes[urls[1]], {'width': 200, 'height': 300,
+                                          'content_type': 'image/png'})
+        self.assertEqual(sizes[urls[2]], {})
+        self.assertIsNone(sizes[urls[3]])
+        self.assertEqual(self.prober.probes, 4)
+        # Cached, missing image remembered by the guard
+        self.prober.probe(urls)
+        self.assertEqual(self.prober.probes, 4)
+        # Single connection per host, kept alive
+        self.assertLess(self.server.connections, 4)
+
+    def test_partial_read(self):
+        sent = self.server.sent
+        size = self.prober.probe([self.server.url('/big.bmp')])[self.server.url('/big.bmp')]
+        self.assertEqual((size['width'], size['height']), (600, 600))
+        self.assertLessEqual(self.server.sent - sent, probes.PROBE_RANGE_SIZE)
+
+    @patch.object(probes, 'PROBE_RANGE_SIZE', 16)
+    def test_header_after_range(self):
+        url = self.server.url('/big.bmp')
+        self.assertIsNone(self.prober.probe([url])[url])
+        # Unknown size isn't cached
+        self.assertIsNone(self.prober.cache.get(url))
+
+    def test_reuse_after_partial_read(self):
+        urls = [self.server.url(path) for path in ('/big.bmp', '/a.png', '/big.bmp?b', '/b.png')]
+        for url in urls:
+            self.assertTrue(self.prober.probe([url])[url])
+        self.assertEqual(self.server.connections, 1)
+
+    def test_redirect(self):
+        url = self.server.url('/redirect/2/b.png')
+        self.assertEqual(self.prober.probe([url])[url]['height'], 300)
+
+    def test_inflight(self):
+        url = self.server.url('/a.png', latency=0.2)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.prober.probe([url])))
+                   for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.prober.probes, 1)
+        self.assertEqual([r[url]['width'] for r in results], [100] * 3)
+
+    def test_resolve_images(self):
+        wros = [WRO(self.server.url(path), redirect_cache=MemoryCache(),
+                    failure_guard=FailureGuard())
+                for path in ('/page1', '/page2', '/page3')]
+        hits = self.server.hits
+        results = probes.resolve_images(wros, self.prober)
+        self.assertEqual(results, [self.server.url(path) for path in ('/b.png', '/b.png', '/c.png')])
+        # Images shared by pages probed once
+        self.assertEqual(self.prober.probes, 4)
+        self.assertEqual(self.server.hits - hits, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
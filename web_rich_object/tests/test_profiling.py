@@ -0,0 +1,93 @@
+import time
+import unittest
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+from web_rich_object.tests import utils
+from web_rich_object.api import WebRichObject as WRO
+from web_rich_object import profiling
+from web_rich_object.failures import FailureGuard
+
+PAGE = """<html><head>
+<meta property="og:title" content="Foo"/>
+</head><body>
+<img src="/profiling.jpg"/>
+<p>A first paragraph long enough to be a description.</p>
+</body></html>"""
+
+
+class ProfileTest(unittest.TestCase):
+    def test_exclusive_time(self):
+        profiler = profiling.Profiler()
+        profile = profiling.Profile(site='example.com', profiler=profiler)
+        with profile.branch('title', 'tag:title'):
+            time.sleep(0.01)
+            with profile.branch('_document', 'parse'):
+                time.sleep(0.02)
+        title_stats = profile.stats[('title', 'tag:title')]
+        parse_stats = profile.stats[('_document', 'parse')]
+        self.assertLess(title_stats.time, 0.02)
+        self.assertGreaterEqual(parse_stats.time, 0.02)
+        self.assertEqual(profiler.stats[('title', 'tag:title')].calls, 1)
+
+    def test_counters(self):
+        profile = profiling.Profile()
+        profiling.count_tree_scan()
+        with profile.branch('image', 'func:biggest_image'):
+            profiling.count_tree_scan()
+            profiling.count_fetch()
+            profiling.count_fetch()
+        stats = profile.stats[('image', 'func:biggest_image')]
+        self.assertEqual(stats.tree_scans, 1)
+        self.assertEqual(stats.fetches, 2)
+
+    def test_wrap_source(self):
+        profile = profiling.Profile()
+        get_source = profile.wrap_source('title', lambda kind, key: ['Foo'])
+        self.assertEqual(get_source('tag', 'title'), ['Foo'])
+        self.assertEqual(profile.stats[('title', 'tag:title')].calls, 1)
+
+
+class WroProfileTest(utils.BaseWebRichObjectTestCase):
+    @patch('web_rich_object.utils.urlopen', side_effect=IOError)
+    def test_branches(self, mock_urlopen):
+        profiler = profiling.Profiler()
+        wro = WRO(self.url, profiler=profiler, failure_guard=FailureGuard())
+        self.assertEqual(wro.title, 'Foo')
+        self.assertTrue(wro.description.startswith('A first paragraph'))
+        self.assertIsNone(wro.image)
+        stats = profiler.stats
+        self.assertEqual(stats[('title', 'property:og:title')].calls, 1)
+        self.assertNotIn(('title', 'tag:title'), stats)
+        self.assertEqual(stats[('description', 'func:first_paragraph')].tree_scans, 1)
+        self.assertEqual(stats[('image', 'func:biggest_image')].fetches, 1)
+        self.assertEqual(stats[('_document', 'index')].tree_scans, 1)
+        self.assertIn(('_download', 'http'), stats)
+        self.assertIn(('_document', 'parse'), stats)
+        report = profiler.report()
+        self.assertIn('func:first_paragraph', report)
+        self.assertIn('example.com', report)
+    test_branches.mock_attrs = {
+        'return_value.read.return_value': PAGE,
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    }
+
+    def test_disabled(self):
+        wro = WRO(self.url)
+        self.assertIsNone(wro.profile)
+        self.assertEqual(wro.title, 'Foo')
+    test_disabled.mock_attrs = test_branches.mock_attrs
+
+    @patch('web_rich_object.profiling.PROFILE', True)
+    def test_env(self):
+        profiling.DEFAULT_PROFILER.clear()
+        wro = WRO(self.url)
+        self.assertEqual(wro.title, 'Foo')
+        self.assertIn(('title', 'property:og:title'), profiling.DEFAULT_PROFILER.stats)
+        profiling.DEFAULT_PROFILER.clear()
+    test_env.mock_attrs = test_branches.mock_attrs
+
+
+if __name__ == '__main__':
+    unittest.main()
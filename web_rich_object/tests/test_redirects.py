@@ -0,0 +1,91 @@
+import unittest
+from io import BytesIO
+try:
+    from unittest.mock import patch, MagicMock
+except ImportError:
+    from mock import patch, MagicMock
+try:
+    from urllib.error import HTTPError
+except ImportError:
+    from urllib2 import HTTPError
+from web_rich_object.tests import utils
+from web_rich_object.api import WebRichObject as WRO
+from web_rich_object.redirects import RedirectCache, TooManyRedirects
+
+
+def redirect_error(url, location, code=302):
+    return HTTPError(url, code, 'Found', {'Location': location}, BytesIO(b''))
+
+
+def html_response():
+    response = MagicMock()
+    response.read.return_value = '<html></html>'
+    response.info.return_value.__dict__ = utils.HTML_RESPONSE_INFO
+    return response
+
+
+class RedirectCacheTest(unittest.TestCase):
+    def test_set_get(self):
+        cache = RedirectCache()
+        cache.set('http://t.co/foo', 'http://example.com/foo')
+        self.assertEqual(cache.get('http://t.co/foo'), 'http://example.com/foo')
+
+    def test_not_shortener(self):
+        cache = RedirectCache()
+        cache.set('http://example.org/foo', 'http://example.com/foo')
+        self.assertIsNone(cache.get('http://example.org/foo'))
+
+    def test_expired(self):
+        cache = RedirectCache(ttl=-1)
+        cache.set('http://t.co/foo', 'http://example.com/foo')
+        self.assertIsNone(cache.get('http://t.co/foo'))
+
+    def test_max_size(self):
+        cache = RedirectCache(max_size=1, hosts=None)
+        cache.set('http://example.com/foo', 'http://example.com/bar')
+        cache.set('http://example.com/baz', 'http://example.com/bar')
+        self.assertEqual(len(cache), 1)
+
+
+class WroRedirectTest(unittest.TestCase):
+    @patch('web_rich_object.api.urlopen')
+    def test_follow(self, mock_urlopen):
+        mock_urlopen.side_effect = [
+            redirect_error('http://t.co/foo', 'http://example.com/foo'),
+            redirect_error('http://example.com/foo', '/bar', 301),
+            html_response(),
+        ]
+        wro = WRO('http://t.co/foo', redirect_cache=RedirectCache())
+        self.assertEqual(wro.base_url, 'http://t.co/foo')
+        self.assertEqual(wro.final_url, 'http://example.com/bar')
+        self.assertEqual(wro.redirect_chain,
+                         ['http://t.co/foo', 'http://example.com/foo'])
+
+    @patch('web_rich_object.api.urlopen')
+    def test_max_redirects(self, mock_urlopen):
+        mock_urlopen.side_effect = [
+            redirect_error('http://t.co/foo', 'http://example.com/foo'),
+            redirect_error('http://example.com/foo', 'http://example.com/bar'),
+        ]
+        with self.assertRaises(TooManyRedirects):
+            WRO('http://t.co/foo', max_redirects=1)
+
+    @patch('web_rich_object.api.urlopen')
+    def test_cached(self, mock_urlopen):
+        cache = RedirectCache()
+        mock_urlopen.side_effect = [
+            redirect_error('http://t.co/foo', 'http://example.com/foo'),
+            html_response(),
+            html_response(),
+        ]
+        WRO('http://t.co/foo', redirect_cache=cache)
+        wro = WRO('http://t.co/foo', redirect_cache=cache)
+        self.assertEqual(mock_urlopen.call_count, 3)
+        self.assertEqual(wro.final_url, 'http://example.com/foo')
+        self.assertEqual(wro.redirect_chain, [])
+        request = mock_urlopen.call_args[0][0]
+        self.assertEqual(request.get_full_url(), 'http://example.com/foo')
+
+
+if __name__ == '__main__':
+    unittest.main()
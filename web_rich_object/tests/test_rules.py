@@ -0,0 +1,220 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+from web_rich_object.tests import utils
+from web_rich_object.api import WebRichObject as WRO
+from web_rich_object.timestamps import UTC
+from web_rich_object import parsing, rules
+
+PAGE = """<html lang="fr"><head>
+<title>Foo</title>
+<meta property="og:title" content="Bar"/>
+<meta property="og:tag" content="foo"/>
+<meta property="article:tag" content="bar"/>
+<meta name="keywords" content="baz, qux"/>
+<link rel="shortcut icon" href="/favicon.ico"/>
+</head></html>"""
+
+
+class SourceTest(unittest.TestCase):
+    def test_parse(self):
+        source = rules.Source('property:og:video:url')
+        self.assertEqual((source.kind, source.key), ('property', 'og:video:url'))
+
+    def test_filter(self):
+        source = rules.Source('name:keywords|split')
+        self.assertEqual(source.apply_filters('foo, bar'), ['foo', 'bar'])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            rules.Source('title')
+
+    def test_unknown(self):
+        for source in ('propery:og:title', 'func:foo', 'name:keywords|spilt', 42):
+            self.assertRaises(ValueError, rules.Source, source)
+        self.assertEqual(rules.Source('func:foo', func_extractors=('foo',)).key, 'foo')
+
+    def test_func_extractors_implemented(self):
+        for key in rules.FUNC_EXTRACTORS:
+            self.assertTrue(hasattr(WRO, '_extract_%s' % key), key)
+
+
+class ExtractionPlanTest(unittest.TestCase):
+    def setUp(self):
+        self.plan = rules.compile_rules({
+            'title': ['property:og:title', 'tag:title'],
+            'tags': [['property:og:tag', 'property:article:tag'], 'name:keywords|split'],
+        })
+        self.index = rules.MetaIndex(parsing.parse_html(PAGE), self.plan)
+
+    def test_indexed(self):
+        self.assertEqual(self.plan.indexed['tag'], frozenset(['title']))
+        self.assertIn('contextly-page', self.plan.indexed['name'])
+
+    def test_candidates(self):
+        candidates = list(self.plan.candidates('title', self.index.get))
+        self.assertEqual(candidates, ['Bar', 'Foo'])
+
+    def test_multi_valued_candidates(self):
+        candidates = list(self.plan.candidates('tags', self.index.get))
+        self.assertEqual(candidates, [['foo', 'bar'], ['baz', 'qux']])
+
+    def test_group_candidates(self):
+        candidates = list(self.plan.group_candidates('title', self.index.get, order=[1, 0]))
+        self.assertEqual(candidates, [(1, 'Foo'), (0, 'Bar')])
+        self.assertEqual(self.plan.group_keys['tags'],
+                         ('property:og:tag+property:article:tag', 'name:keywords|split'))
+
+    def test_lazy_sources(self):
+        fetched = []
+
+        def get_source(kind, key):
+            fetched.append(key)
+            return self.index.get(kind, key)
+        next(self.plan.candidates('title', get_source))
+        self.assertEqual(fetched, ['og:title'])
+
+    def test_link_index(self):
+        plan = rules.compile_rules({'image': ['link:icon']})
+        index = rules.MetaIndex(parsing.parse_html(PAGE), plan)
+        self.assertEqual(index.get('link', 'icon'), ['/favicon.ico'])
+
+    def test_invalid_rule(self):
+        with self.assertRaises(ValueError) as context:
+            rules.compile_rules({'title': ['tag:title', 'propery:og:title']})
+        self.assertIn('title', str(context.exception))
+        self.assertIn('propery:og:title', str(context.exception))
+
+    def test_load_rules_file(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, 'rules.json')
+            with open(path, 'w') as fd:
+                json.dump({'title': ['tag:title']}, fd)
+            loaded_rules = rules.load_rules(path)
+        finally:
+            shutil.rmtree(tmp_dir)
+        self.assertEqual(loaded_rules['title'], ['tag:title'])
+        self.assertEqual(loaded_rules['author'], rules.RULES['author'])
+
+
+JSONLD_PAGE = """<html><head>
+<script type="application/ld+json">
+{"@context": "http://schema.org", "@graph": [
+  {"@type": "Organization", "name": "Publisher"},
+  {"@type": "NewsArticle",
+   "headline": "Foo",
+   "image": [{"@type": "ImageObject", "url": "http://example.com/foo.jpg"}],
+   "author": [{"@type": "Person", "name": "Bar", "url": "http://example.com/bar"}],
+   "thumbnailUrl": {"@type": "ImageObject", "name": "Thumbnail", "contentUrl": "/thumb.jpg"},
+   "articleSection": {"@type": "Thing", "name": "News", "url": "http://example.com/news"},
+   "datePublished": "2016-12-12T08:00:15+00:00",
+   "keywords": ["foo", "bar"]}
+]}
+</script>
+<script type="application/ld+json">{invalid</script>
+</head><body><img src="/foo.png"></body></html>"""
+
+TWITTER_PAGE = """<html><head>
+<meta name="twitter:card" content="summary_large_image"/>
+<meta name="twitter:title" content="Foo"/>
+<meta name="twitter:description" content="Bar"/>
+<meta name="twitter:image" content="http://example.com/foo.jpg"/>
+</head><body><img src="/foo.png"></body></html>"""
+
+
+class ParseJsonldTest(unittest.TestCase):
+    def test_entities(self):
+        entities = rules.parse_jsonld('[{"@type": "Person"}, {"@type": ["WebPage", "Thing"], "name": "Foo"}]')
+        self.assertEqual(entities, [{'@type': 'WebPage', 'name': 'Foo'}])
+
+    def test_invalid(self):
+        self.assertEqual(rules.parse_jsonld('{invalid'), [])
+        self.assertEqual(rules.parse_jsonld(None), [])
+
+
+class WroJsonldTest(utils.BaseWebRichObjectTestCase):
+    def test_fields(self):
+        wro = WRO(self.url)
+        with patch('web_rich_object.api.utils.get_biggest_image') as mock:
+            self.assertEqual(wro.image, 'http://example.com/foo.jpg')
+            self.assertFalse(mock.called)
+        self.assertEqual(wro.title, 'Foo')
+        # Name of nodes, URL of media nodes
+        self.assertEqual(wro.author, 'Bar')
+        self.assertEqual(wro.section, 'News')
+        self.assertEqual(wro.meta_index.get('jsonld', 'thumbnailUrl'), ['/thumb.jpg'])
+        self.assertEqual(wro.tags, ['foo', 'bar'])
+        self.assertEqual(wro.published_time, datetime(2016, 12, 12, 8, 0, 15, tzinfo=UTC))
+    test_fields.mock_attrs = {
+        'return_value.read.return_value': JSONLD_PAGE,
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    }
+
+    def test_bounded_parse(self):
+        wro = WRO(self.url, parse_mode=parsing.PARSE_MODE_BOUNDED)
+        self.assertEqual(wro.title, 'Foo')
+    test_bounded_parse.mock_attrs = {
+        'return_value.read.return_value': JSONLD_PAGE,
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    }
+
+
+class WroTwitterCardTest(utils.BaseWebRichObjectTestCase):
+    def test_fields(self):
+        wro = WRO(self.url)
+        with patch('web_rich_object.api.utils.get_biggest_image') as mock:
+            self.assertEqual(wro.image, 'http://example.com/foo.jpg')
+            self.assertFalse(mock.called)
+        self.assertEqual(wro.title, 'Foo')
+        self.assertEqual(wro.description, 'Bar')
+    test_fields.mock_attrs = {
+        'return_value.read.return_value': TWITTER_PAGE,
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    }
+
+
+class WroPlanTest(utils.BaseWebRichObjectTestCase):
+    def test_reordered_plan(self):
+        plan = rules.compile_rules(dict(rules.RULES, title=['tag:title', 'property:og:title']))
+        wro = WRO(self.url, plan=plan)
+        self.assertEqual(wro.title, 'Foo')
+    test_reordered_plan.mock_attrs = {
+        'return_value.read.return_value': PAGE,
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    }
+
+    def test_tags(self):
+        wro = WRO(self.url)
+        self.assertEqual(wro.tags, ['foo', 'bar'])
+    test_tags.mock_attrs = {
+        'return_value.read.return_value': PAGE,
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    }
+
+    def test_meta_author(self):
+        wro = WRO(self.url)
+        self.assertEqual(wro.author, 'Foo')
+    test_meta_author.mock_attrs = {
+        'return_value.read.return_value': '<html><meta name="author" content="Foo"/></html>',
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    }
+
+    def test_issued_published_time(self):
+        wro = WRO(self.url)
+        self.assertEqual(wro.published_time, datetime(2016, 12, 12, 8, 0, 15, tzinfo=UTC))
+    test_issued_published_time.mock_attrs = {
+        'return_value.read.return_value': '<html><meta name="issued" content="2016-12-12T08:00:15+00:00"/></html>',
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    }
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import json
+import unittest
+from datetime import datetime
+from web_rich_object import serialization
+from web_rich_object.timestamps import UTC, get_timezone
+
+
+class SerializationTest(unittest.TestCase):
+    def assertRoundTrip(self, value):
+        self.assertEqual(serialization.loads(serialization.dumps(value)), value)
+
+    def test_scalars(self):
+        for value in (None, True, False, 0, 1, -1, 2**40, -2**40, 1.5, u'', u'caf\xe9'):
+            self.assertRoundTrip(value)
+        self.assertIs(serialization.loads(serialization.dumps(True)), True)
+
+    def test_bytes(self):
+        self.assertEqual(serialization.loads(serialization.dumps(b'\xff\x00')), b'\xff\x00')
+
+    def test_datetimes(self):
+        self.assertRoundTrip(datetime(2016, 12, 12, 8, 0, 15, 123))
+        self.assertRoundTrip(datetime(1950, 1, 1))
+        value = datetime(2016, 12, 12, 8, 0, 15, tzinfo=get_timezone(-330))
+        loaded = serialization.loads(serialization.dumps(value))
+        self.assertEqual(loaded, value)
+        self.assertEqual(loaded.utcoffset(), value.utcoffset())
+
+    def test_fields(self):
+        fields = {
+            'title': u'Foo', 'images': [u'http://example.com/a.png'],
+            'published_time': datetime(2016, 12, 12, tzinfo=UTC),
+            'video_width': 640, 'extra': {'nested': None},
+        }
+        self.assertRoundTrip(fields)
+        self.assertRoundTrip({'fields': fields, 'expires': 1481529615.5})
+        # Version, dict, size, key tag and index, value
+        self.assertEqual(len(serialization.dumps({'published_time': None})), 6)
+
+    def test_compact(self):
+        fields = {'title': u'Foo bar', 'description': u'Baz ' * 20,
+                  'url': u'http://example.com/foo', 'video_width': 640}
+        self.assertLess(len(serialization.dumps(fields)), len(json.dumps(fields)))
+        fields['description'] *= 20
+        dumped = serialization.dumps(fields)
+        self.assertEqual(dumped[:1], serialization.VERSION_ZLIB)
+        self.assertLess(len(dumped), len(fields['description']))
+        self.assertRoundTrip(fields)
+
+    def test_invalid(self):
+        self.assertRaises(serialization.SerializationError, serialization.dumps, object())
+        self.assertRaises(serialization.SerializationError, serialization.loads, b'{}')
+        self.assertRaises(serialization.SerializationError, serialization.loads, b'\x01s\x05ab')
+
+
+if __name__ == '__main__':
+    unittest.main()
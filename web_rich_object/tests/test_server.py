@@ -0,0 +1,84 @@
+import time
+import unittest
+try:
+    from urllib.request import Request, urlopen
+except ImportError:
+    from urllib2 import Request, urlopen
+from web_rich_object.api import WebRichObject as WRO
+from web_rich_object import loadtest
+from web_rich_object.cache import MemoryCache
+from web_rich_object.tests.server import StandInServer, CORPUS
+
+
+class StandInServerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StandInServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def test_html(self):
+        wro = WRO(self.server.url('/'))
+        self.assertEqual(wro.title, 'Home')
+        self.assertEqual(wro.image, self.server.url('/image.png'))
+
+    def test_pdf(self):
+        wro = WRO(self.server.url('/doc.pdf'))
+        self.assertEqual(wro.subtype, 'pdf')
+        self.assertEqual(wro.title, 'Warm-up')
+
+    def test_redirects(self):
+        wro = WRO(self.server.url('/redirect/2/article'),
+                  redirect_cache=MemoryCache())
+        self.assertEqual(len(wro.redirect_chain), 2)
+        self.assertEqual(wro.final_url, self.server.url('/article'))
+        self.assertEqual(wro.title, 'Article')
+
+    def test_chunked(self):
+        response = urlopen(self.server.url('/article', chunked=1))
+        self.assertEqual(response.info().get('Transfer-Encoding'), 'chunked')
+        self.assertEqual(response.read(), CORPUS['/article'][1].encode('utf-8'))
+
+    def test_range(self):
+        request = Request(self.server.url('/bare'), headers={'Range': 'bytes=6-11'})
+        response = urlopen(request)
+        self.assertEqual(response.getcode(), 206)
+        self.assertEqual(response.read(), b'<head>')
+
+    def test_latency(self):
+        start = time.time()
+        urlopen(self.server.url('/bare', latency=0.1)).read()
+        self.assertGreaterEqual(time.time() - start, 0.1)
+
+    def test_slowloris(self):
+        response = urlopen(self.server.url('/bare', slowloris=0.01))
+        start = time.time()
+        response.read()
+        self.assertGreaterEqual(time.time() - start, 0.5)
+
+    def test_not_found(self):
+        with self.assertRaises(Exception):
+            urlopen(self.server.url('/not-found'))
+
+
+class LoadTest(unittest.TestCase):
+    def test_run_load(self):
+        with StandInServer() as server:
+            urls = [server.url('/'), server.url('/article'), server.url('/missing')]
+            result = loadtest.run_load(urls, concurrency=2, requests=6)
+        self.assertEqual(result.count, 6)
+        self.assertEqual(result.errors, 2)
+        self.assertEqual(len(result.latencies), 4)
+        self.assertIn('URL/s', result.report())
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(loadtest.percentile(values, 50), 50)
+        self.assertEqual(loadtest.percentile(values, 99), 99)
+        self.assertIsNone(loadtest.percentile([], 50))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import json
+import unittest
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+from web_rich_object.tests import utils
+from web_rich_object.api import WebRichObject as WRO
+from web_rich_object import sites
+from web_rich_object.oembed import OembedProviders
+from web_rich_object.redirects import MAX_REDIRECTS
+from web_rich_object.tests.server import StandInServer
+
+WIKIPEDIA_SUMMARY = json.dumps({
+    'type': 'standard',
+    'title': 'Portugal',
+    'titles': {'normalized': 'Portugal'},
+    'lang': 'en',
+    'extract': 'Portugal is a country.',
+    'thumbnail': {'source': 'https://upload.wikimedia.org/foo.png'},
+    'content_urls': {'desktop': {'page': 'https://en.wikipedia.org/wiki/Portugal'}},
+}).encode('utf-8')
+
+
+class SiteRegistryTest(unittest.TestCase):
+    def test_get(self):
+        registry = sites.SiteRegistry([sites.YoutubeExtractor()])
+        self.assertIsNotNone(registry.get('https://www.youtube.com/watch?v=4nzaATIOAAE'))
+        self.assertIsNotNone(registry.get('https://m.youtube.com/watch?v=4nzaATIOAAE'))
+        self.assertIsNone(registry.get('https://notyoutube.com/watch?v=4nzaATIOAAE'))
+        self.assertIsNone(registry.get('http://example.com'))
+
+    def test_unregister(self):
+        registry = sites.SiteRegistry([sites.YoutubeExtractor()])
+        registry.unregister('youtube.com')
+        self.assertIsNone(registry.get('https://www.youtube.com/watch?v=4nzaATIOAAE'))
+
+
+class YoutubeExtractorTest(unittest.TestCase):
+    def test_video_urls(self):
+        extractor = sites.YoutubeExtractor()
+        for url in ('https://www.youtube.com/watch?v=4nzaATIOAAE&t=3',
+                    'https://youtu.be/4nzaATIOAAE',
+                    'https://www.youtube.com/embed/4nzaATIOAAE'):
+            fields = extractor.extract(url)
+            self.assertEqual(fields['url'], 'https://www.youtube.com/watch?v=4nzaATIOAAE')
+            self.assertEqual(fields['video'], 'https://www.youtube.com/embed/4nzaATIOAAE')
+            self.assertEqual(fields['image'], 'https://i.ytimg.com/vi/4nzaATIOAAE/hqdefault.jpg')
+
+    def test_not_video(self):
+        extractor = sites.YoutubeExtractor()
+        self.assertIsNone(extractor.extract('https://www.youtube.com/feed/trending'))
+        self.assertIsNone(extractor.extract('https://www.youtube.com/watch?v=foo'))
+
+
+class SiteFetchTest(unittest.TestCase):
+    def test_follows_redirects(self):
+        with StandInServer({'/summary': ('application/json', WIKIPEDIA_SUMMARY)}) as server:
+            extractor = sites.SiteExtractor()
+            self.assertEqual(extractor.fetch(server.url('/redirect/2/summary')),
+                             WIKIPEDIA_SUMMARY)
+            with self.assertRaises(IOError):
+                extractor.fetch(server.url('/redirect/%d/summary' % (MAX_REDIRECTS + 1)))
+
+    @patch('web_rich_object.sites.urlopen', side_effect=KeyError)
+    def test_unexpected_error(self, mock_urlopen):
+        with self.assertRaises(KeyError):
+            sites.WikipediaExtractor().extract('https://en.wikipedia.org/wiki/Portugal')
+
+
+class WikipediaExtractorTest(unittest.TestCase):
+    @patch('web_rich_object.sites.urlopen', **{
+        'return_value.read.return_value': WIKIPEDIA_SUMMARY,
+    })
+    def test_summary(self, mock_urlopen):
+        fields = sites.WikipediaExtractor().extract('https://en.wikipedia.org/wiki/Portugal')
+        request = mock_urlopen.call_args[0][0]
+        self.assertEqual(request.get_full_url(),
+                         'https://en.wikipedia.org/api/rest_v1/page/summary/Portugal')
+        self.assertEqual(fields['title'], 'Portugal')
+        self.assertEqual(fields['description'], 'Portugal is a country.')
+        self.assertEqual(fields['image'], 'https://upload.wikimedia.org/foo.png')
+        self.assertTrue(sites.is_complete(fields))
+
+    @patch('web_rich_object.sites.urlopen', side_effect=IOError)
+    def test_error(self, mock_urlopen):
+        self.assertIsNone(sites.WikipediaExtractor().extract('https://en.wikipedia.org/wiki/Portugal'))
+
+    @patch('web_rich_object.sites.urlopen')
+    def test_special_page(self, mock_urlopen):
+        self.assertIsNone(sites.WikipediaExtractor().extract('https://en.wikipedia.org/wiki/Special:Random'))
+        self.assertIsNone(sites.WikipediaExtractor().extract('https://en.wikipedia.org/wiki/Main_Page'))
+        self.assertFalse(mock_urlopen.called)
+
+
+class WroSiteExtractorTest(unittest.TestCase):
+    @patch('web_rich_object.api.urlopen')
+    @patch('web_rich_object.sites.urlopen', **{
+        'return_value.read.return_value': WIKIPEDIA_SUMMARY,
+    })
+    def test_complete_skips_download(self, mock_site_urlopen, mock_urlopen):
+        wro = WRO('https://en.wikipedia.org/wiki/Portugal')
+        self.assertFalse(mock_urlopen.called)
+        self.assertEqual(wro.title, 'Portugal')
+        self.assertEqual(wro.type, 'website')
+        self.assertEqual(wro.locale, 'EN')
+        self.assertEqual(wro.tags, [])
+
+    @patch('web_rich_object.api.urlopen', **{
+        'return_value.read.return_value': '<html><title>Foo</title><meta property="og:image" content="http://example.com/foo.png"></html>',
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    })
+    def test_partial_downloads(self, mock_urlopen):
+        wro = WRO('https://www.youtube.com/watch?v=4nzaATIOAAE',
+                  oembed_providers=OembedProviders(providers=()))
+        self.assertTrue(mock_urlopen.called)
+        self.assertEqual(wro.title, 'Foo')
+        self.assertEqual(wro.image, 'https://i.ytimg.com/vi/4nzaATIOAAE/hqdefault.jpg')
+        self.assertEqual(wro.type, 'video')
+
+    @patch('web_rich_object.api.urlopen', **{
+        'return_value.read.return_value': '<html></html>',
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    })
+    def test_facebook_video(self, mock_urlopen):
+        wro = WRO('https://www.facebook.com/foo/videos/1234/')
+        self.assertEqual(wro.type, 'video')
+
+
+if __name__ == '__main__':
+    unittest.main()
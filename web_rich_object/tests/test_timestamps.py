@@ -0,0 +1,80 @@
+import pickle
+import unittest
+from datetime import datetime
+from web_rich_object import timestamps
+from web_rich_object.timestamps import UTC, get_timezone, parse_timestamp
+
+
+class ParseOffsetTest(unittest.TestCase):
+    def test_offsets(self):
+        self.assertEqual(timestamps.parse_offset('Z'), 0)
+        self.assertEqual(timestamps.parse_offset('+02'), 120)
+        self.assertEqual(timestamps.parse_offset('+0530'), 330)
+        self.assertEqual(timestamps.parse_offset('-03:30'), -210)
+        self.assertEqual(timestamps.parse_offset("+05'45'"), 345)
+
+
+class ParseTimestampTest(unittest.TestCase):
+    def test_iso(self):
+        self.assertEqual(parse_timestamp('2016-12-12T08:00:15+00:00'),
+                         datetime(2016, 12, 12, 8, 0, 15, tzinfo=UTC))
+        self.assertEqual(parse_timestamp('2016-12-12T08:00:15Z'),
+                         datetime(2016, 12, 12, 8, 0, 15, tzinfo=UTC))
+        self.assertEqual(parse_timestamp('2016-12-12T08:00:15.123456789-0800'),
+                         datetime(2016, 12, 12, 8, 0, 15, 123456, tzinfo=get_timezone(-480)))
+        self.assertEqual(parse_timestamp('2016-12-12'), datetime(2016, 12, 12))
+
+    def test_minute_offset(self):
+        date = parse_timestamp('2016-12-12T08:00:15+05:30')
+        self.assertEqual(date.utcoffset().total_seconds(), 5.5 * 3600)
+        self.assertEqual(date, datetime(2016, 12, 12, 2, 30, 15, tzinfo=UTC))
+
+    def test_sql(self):
+        self.assertEqual(parse_timestamp('2016-12-12 08:00:15'),
+                         datetime(2016, 12, 12, 8, 0, 15))
+
+    def test_pdf(self):
+        self.assertEqual(parse_timestamp("D:20161212080015+01'00'"),
+                         datetime(2016, 12, 12, 8, 0, 15, tzinfo=get_timezone(60)))
+        self.assertEqual(parse_timestamp("D:20161212080015Z00'00'"),
+                         datetime(2016, 12, 12, 8, 0, 15, tzinfo=UTC))
+        self.assertEqual(parse_timestamp("D:2016"), datetime(2016, 1, 1))
+
+    def test_cms(self):
+        self.assertEqual(parse_timestamp('12/11/2016 08:00:15 +01:00'),
+                         datetime(2016, 11, 12, 8, 0, 15, tzinfo=get_timezone(60)))
+        self.assertEqual(parse_timestamp('2016/12/12 08:00'),
+                         datetime(2016, 12, 12, 8, 0))
+        self.assertEqual(parse_timestamp('Mon, 12 Dec 2016 08:00:15 GMT'),
+                         datetime(2016, 12, 12, 8, 0, 15, tzinfo=UTC))
+
+    def test_invalid(self):
+        self.assertIsNone(parse_timestamp(''))
+        self.assertIsNone(parse_timestamp(None))
+        self.assertIsNone(parse_timestamp('yesterday'))
+        self.assertIsNone(parse_timestamp('2016-13-12T08:00:15Z'))
+        self.assertIsNone(parse_timestamp('{{ date }}'))
+
+    def test_pickle(self):
+        date = parse_timestamp('2016-12-12T08:00:15+05:30')
+        self.assertEqual(pickle.loads(pickle.dumps(date)), date)
+
+
+class TimestampParserTest(unittest.TestCase):
+    def test_site_format(self):
+        parser = timestamps.TimestampParser()
+        parser.parse('12/12/2016 08:00:15', site='example.com')
+        self.assertEqual(parser.site_formats.get('example.com'), 'dmy')
+        self.assertEqual(parser.parse('2016-12-12T08:00:15Z', site='example.com'),
+                         datetime(2016, 12, 12, 8, 0, 15, tzinfo=UTC))
+        self.assertEqual(parser.site_formats.get('example.com'), 'iso')
+
+    def test_max_sites(self):
+        parser = timestamps.TimestampParser(max_sites=1)
+        parser.parse('2016-12-12', site='example.com')
+        parser.parse('2016-12-12', site='example.org')
+        self.assertEqual(parser.site_formats, {'example.org': 'iso'})
+
+
+if __name__ == '__main__':
+    unittest.main()
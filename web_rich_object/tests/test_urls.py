@@ -0,0 +1,92 @@
+import unittest
+from web_rich_object.tests import utils
+from web_rich_object.api import WebRichObject as WRO
+from web_rich_object.urls import UrlCanonicalizer, UrlIndex, canonicalize_url
+
+
+class CanonicalizeUrlTest(unittest.TestCase):
+    def test_tracking_params(self):
+        url = canonicalize_url('http://example.com/foo?utm_source=bar&id=1&fbclid=baz')
+        self.assertEqual(url, 'http://example.com/foo?id=1')
+
+    def test_fragment(self):
+        url = canonicalize_url('http://example.com/foo#bar')
+        self.assertEqual(url, 'http://example.com/foo')
+
+    def test_default_port(self):
+        self.assertEqual(canonicalize_url('http://example.com:80/'),
+                         'http://example.com/')
+        self.assertEqual(canonicalize_url('https://example.com:443/'),
+                         'https://example.com/')
+        self.assertEqual(canonicalize_url('http://example.com:8080/'),
+                         'http://example.com:8080/')
+
+    def test_host_case(self):
+        url = canonicalize_url('HTTP://Example.COM/Foo')
+        self.assertEqual(url, 'http://example.com/Foo')
+
+    def test_trailing_slash(self):
+        self.assertEqual(canonicalize_url('http://example.com/foo/'),
+                         'http://example.com/foo')
+        self.assertEqual(canonicalize_url('http://example.com'),
+                         'http://example.com/')
+
+    def test_sorted_params(self):
+        url = canonicalize_url('http://example.com/?b=2&a=1')
+        self.assertEqual(url, 'http://example.com/?a=1&b=2')
+
+    def test_youtube_rule(self):
+        url = canonicalize_url('https://www.youtube.com/watch?feature=share&v=foo&t=3')
+        self.assertEqual(url, 'https://www.youtube.com/watch?v=foo')
+        url = canonicalize_url('https://youtu.be/foo?t=3')
+        self.assertEqual(url, 'https://www.youtube.com/watch?v=foo')
+
+    def test_custom_rule(self):
+        canonicalizer = UrlCanonicalizer(strip_params=['ref'], domain_rules={})
+        canonicalizer.add_rule('example.org', ('id',))
+        self.assertEqual(canonicalizer('http://example.com/?ref=1&utm_source=a'),
+                         'http://example.com/?utm_source=a')
+        self.assertEqual(canonicalizer('http://www.example.org/?id=1&foo=2'),
+                         'http://www.example.org/?id=1')
+
+
+class UrlIndexTest(unittest.TestCase):
+    def test_add(self):
+        index = UrlIndex()
+        key = index.add('http://example.com/foo?utm_medium=a')
+        self.assertEqual(key, index.add('http://EXAMPLE.com/foo/#bar'))
+        self.assertEqual(len(index), 1)
+        self.assertEqual(len(index.variants(key)), 2)
+
+    def test_link(self):
+        index = UrlIndex()
+        key = index.add('http://example.com/?p=42')
+        index.link('http://example.com/foo-bar', 'http://example.com/?p=42')
+        self.assertEqual(index.key('http://example.com/foo-bar/'), key)
+        self.assertIn('http://example.com/foo-bar', index)
+        self.assertEqual(len(index), 1)
+
+
+class WroCanonicalUrlTest(utils.BaseWebRichObjectTestCase):
+    def test_canonical_url(self):
+        wro = WRO(self.url + '/foo/?utm_source=bar')
+        self.assertEqual(wro.canonical_url, 'http://example.com/foo')
+    test_canonical_url.mock_attrs = {
+        'return_value.read.return_value': '<html></html>',
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    }
+
+    def test_og_url_alias(self):
+        index = UrlIndex()
+        wro = WRO(self.url + '/?p=1', url_index=index)
+        key = wro.canonical_url
+        self.assertEqual(wro.url, 'http://example.com/foo')
+        self.assertEqual(index.key('http://example.com/foo'), key)
+    test_og_url_alias.mock_attrs = {
+        'return_value.read.return_value': '<html><meta property="og:url" content="http://example.com/foo"/></html>',
+        'return_value.info.return_value.__dict__': utils.HTML_RESPONSE_INFO,
+    }
+
+
+if __name__ == '__main__':
+    unittest.main()
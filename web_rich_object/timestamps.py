@@ -0,0 +1,161 @@
+"""
+Timestamp parsing for OpenGraph, PDF and CMS dates
+
+Formats are matched with precompiled regexes sharing the same named groups.
+Offsets are kept to the minute and give timezone-aware datetimes, values
+without an offset give naive datetimes. The format matched for a site is
+remembered and tried first for its next values.
+"""
+import re
+from datetime import datetime, timedelta, tzinfo
+
+SITE_FORMATS_SIZE = 10000
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+_TIME = r'(?P<hour>\d\d):(?P<minute>\d\d)(?::(?P<second>\d\d)(?:[.,](?P<fraction>\d+))?)?'
+_OFFSET = r"\s*(?P<tz>Z|UTC|GMT|UT|[+-]\d\d(?::?\d\d)?)?"
+FORMATS = (
+    # ISO 8601, RFC 3339 and SQL datetimes
+    ('iso', re.compile(
+        r'^(?P<year>\d{4})-(?P<month>\d\d)-(?P<day>\d\d)(?:[T ]%s)?%s$'
+        % (_TIME, _OFFSET), re.IGNORECASE)),
+    # D:YYYYMMDDHHmmSSOHH'mm'
+    ('pdf', re.compile(
+        r"^D:(?P<year>\d{4})(?P<month>\d\d)?(?P<day>\d\d)?(?P<hour>\d\d)?"
+        r"(?P<minute>\d\d)?(?P<second>\d\d)?"
+        r"(?P<tz>Z(?:00'?00'?)?|[+-]\d\d'?(?:\d\d'?)?)?$")),
+    # 12/12/2016 08:00:15
+    ('dmy', re.compile(
+        r'^(?P<day>\d\d)/(?P<month>\d\d)/(?P<year>\d{4})(?:[T ]%s)?%s$'
+        % (_TIME, _OFFSET), re.IGNORECASE)),
+    # 2016/12/12 08:00:15
+    ('ymd', re.compile(
+        r'^(?P<year>\d{4})/(?P<month>\d\d)/(?P<day>\d\d)(?:[T ]%s)?%s$'
+        % (_TIME, _OFFSET), re.IGNORECASE)),
+    # RFC 2822: Mon, 12 Dec 2016 08:00:15 +0000
+    ('rfc2822', re.compile(
+        r'^(?:[a-z]{3},\s*)?(?P<day>\d{1,2})\s+(?P<month_name>[a-z]{3})[a-z]*\s+'
+        r'(?P<year>\d{4})\s+%s%s$' % (_TIME, _OFFSET), re.IGNORECASE)),
+)
+
+
+class FixedOffset(tzinfo):
+    """Timezone with a fixed offset in minutes east of UTC."""
+    def __init__(self, minutes):
+        self.minutes = minutes
+        self._offset = timedelta(minutes=minutes)
+
+    def utcoffset(self, dt):
+        return self._offset
+
+    def dst(self, dt):
+        return timedelta(0)
+
+    def tzname(self, dt):
+        if not self.minutes:
+            return 'UTC'
+        sign = '-' if self.minutes < 0 else '+'
+        return 'UTC%s%02d:%02d' % ((sign,) + divmod(abs(self.minutes), 60))
+
+    def __reduce__(self):
+        return (get_timezone, (self.minutes,))
+
+    def __repr__(self):
+        return 'FixedOffset(%d)' % self.minutes
+
+
+_TIMEZONES = {}
+
+
+def get_timezone(minutes):
+    """Shared ``FixedOffset`` instance for an offset in minutes."""
+    timezone = _TIMEZONES.get(minutes)
+    if timezone is None:
+        timezone = _TIMEZONES.setdefault(minutes, FixedOffset(minutes))
+    return timezone
+
+
+UTC = get_timezone(0)
+
+
+def parse_offset(value):
+    """Minutes east of UTC of ``Z``, ``+HH``, ``+HHMM``, ``+HH:MM`` or ``+HH'MM'``."""
+    digits = value.replace(':', '').replace("'", '')
+    if digits[0] not in '+-':
+        return 0
+    minutes = int(digits[1:3]) * 60 + int(digits[3:5] or 0)
+    return -minutes if digits[0] == '-' else minutes
+
+
+def _build(match):
+    groups = match.groupdict()
+    if groups.get('month_name'):
+        month = MONTHS.get(groups['month_name'][:3].lower())
+        if month is None:
+            return None
+    else:
+        month = int(groups['month'] or 1)
+    fraction = groups.get('fraction')
+    try:
+        date = datetime(
+            int(groups['year']), month, int(groups['day'] or 1),
+            int(groups['hour'] or 0), int(groups['minute'] or 0),
+            int(groups['second'] or 0),
+            int(fraction[:6].ljust(6, '0')) if fraction else 0,
+        )
+    except ValueError:
+        return None
+    if groups['tz']:
+        date = date.replace(tzinfo=get_timezone(parse_offset(groups['tz'])))
+    return date
+
+
+class TimestampParser(object):
+    """
+    Parse timestamps with ``formats``, a sequence of ``(name, regex)``,
+    remembering the last format matched for each site. A plain dict is used
+    as memo since a lookup must stay cheaper than a regex match, it is
+    emptied when reaching ``max_sites``.
+    """
+    def __init__(self, formats=FORMATS, max_sites=SITE_FORMATS_SIZE):
+        self.formats = tuple(formats)
+        self._formats_by_name = dict(self.formats)
+        self.max_sites = max_sites
+        self.site_formats = {}
+
+    def _match(self, value, site):
+        if site is not None:
+            name = self.site_formats.get(site)
+            if name is not None:
+                match = self._formats_by_name[name].match(value)
+                if match is not None:
+                    return match
+        for name, regex in self.formats:
+            match = regex.match(value)
+            if match is not None:
+                if site is not None:
+                    if len(self.site_formats) >= self.max_sites:
+                        self.site_formats.clear()
+                    self.site_formats[site] = name
+                return match
+        return None
+
+    def parse(self, value, site=None):
+        """Return a datetime or ``None`` if ``value`` isn't a known format."""
+        if not value:
+            return None
+        match = self._match(value.strip(), site)
+        if match is None:
+            return None
+        return _build(match)
+
+    __call__ = parse
+
+
+DEFAULT_PARSER = TimestampParser()
+
+
+def parse_timestamp(value, site=None):
+    return DEFAULT_PARSER.parse(value, site=site)
@@ -0,0 +1,171 @@
+"""URL canonicalisation and variant index"""
+import fnmatch
+try:
+    from urllib.parse import urlsplit, urlunsplit
+except ImportError:
+    from urlparse import urlsplit, urlunsplit
+
+DEFAULT_PORTS = {
+    'http': 80,
+    'https': 443,
+}
+TRACKING_PARAMS = (
+    'utm_*',
+    'fbclid',
+    'gclid',
+    'dclid',
+    'msclkid',
+    'mc_cid',
+    'mc_eid',
+    '_ga',
+    'igshid',
+)
+
+
+def _youtube_short_url(parts):
+    """Rewrite ``youtu.be/<id>`` into ``www.youtube.com/watch?v=<id>``."""
+    video_id = parts.path.strip('/')
+    if not video_id:
+        return parts
+    return urlsplit('https://www.youtube.com/watch?v=%s' % video_id)
+
+
+# Rules are a tuple of query parameters to keep, or a callable which
+# receives and returns a ``urlsplit`` result.
+DOMAIN_RULES = {
+    'youtube.com': ('v', 'list'),
+    'youtu.be': _youtube_short_url,
+}
+
+
+class UrlCanonicalizer(object):
+    """
+    Build a stable key from a URL by removing the parts which don't change
+    the targeted page: tracking parameters, fragment, default port, host
+    case and trailing slash.
+    """
+    def __init__(self, strip_params=TRACKING_PARAMS, domain_rules=None,
+                 strip_fragment=True, strip_trailing_slash=True,
+                 sort_params=True, strip_www=False):
+        self.strip_params = tuple(strip_params or ())
+        self.domain_rules = dict(DOMAIN_RULES if domain_rules is None
+                                 else domain_rules)
+        self.strip_fragment = strip_fragment
+        self.strip_trailing_slash = strip_trailing_slash
+        self.sort_params = sort_params
+        self.strip_www = strip_www
+
+    def add_rule(self, domain, rule):
+        self.domain_rules[domain.lower()] = rule
+
+    def get_rule(self, hostname):
+        """Find the rule of a hostname or of its closest parent domain."""
+        labels = hostname.split('.')
+        for i in range(len(labels) - 1):
+            domain = '.'.join(labels[i:])
+            if domain in self.domain_rules:
+                return self.domain_rules[domain]
+        return None
+
+    def _is_stripped(self, name):
+        for pattern in self.strip_params:
+            if fnmatch.fnmatchcase(name, pattern):
+                return True
+        return False
+
+    def canonicalize(self, url):
+        parts = urlsplit(url.strip())
+        hostname = parts.hostname or ''
+        rule = self.get_rule(hostname)
+        if callable(rule):
+            parts = rule(parts)
+            hostname = parts.hostname or ''
+            rule = self.get_rule(hostname)
+        scheme = parts.scheme.lower()
+        # Host
+        netloc = hostname
+        if self.strip_www and netloc.startswith('www.'):
+            netloc = netloc[4:]
+        try:
+            port = parts.port
+        except ValueError:
+            port = None
+        if port is not None and port != DEFAULT_PORTS.get(scheme):
+            netloc = '%s:%d' % (netloc, port)
+        if parts.username:
+            userinfo = parts.username
+            if parts.password:
+                userinfo += ':' + parts.password
+            netloc = '%s@%s' % (userinfo, netloc)
+        # Path
+        path = parts.path or '/'
+        if self.strip_trailing_slash and len(path) > 1:
+            path = path.rstrip('/') or '/'
+        # Query
+        params = [p for p in parts.query.split('&') if p]
+        if isinstance(rule, (tuple, list)):
+            params = [p for p in params if p.split('=', 1)[0] in rule]
+        else:
+            params = [p for p in params
+                      if not self._is_stripped(p.split('=', 1)[0])]
+        if self.sort_params:
+            params.sort()
+        query = '&'.join(params)
+        fragment = '' if self.strip_fragment else parts.fragment
+        return urlunsplit((scheme, netloc, path, query, fragment))
+
+    __call__ = canonicalize
+
+
+DEFAULT_CANONICALIZER = UrlCanonicalizer()
+
+
+def canonicalize_url(url):
+    return DEFAULT_CANONICALIZER.canonicalize(url)
+
+
+class UrlIndex(object):
+    """
+    Map URL variants to a canonical key.
+
+    Variants are first canonicalised, then aliases (for example the
+    ``og:url`` announced by a page) are resolved to the key of the page
+    they have been linked to.
+    """
+    def __init__(self, canonicalizer=None):
+        self.canonicalizer = canonicalizer or DEFAULT_CANONICALIZER
+        self._aliases = {}
+        self._variants = {}
+
+    def key(self, url):
+        canonical = self.canonicalizer(url)
+        return self._aliases.get(canonical, canonical)
+
+    def add(self, url):
+        key = self.key(url)
+        self._variants.setdefault(key, set()).add(url)
+        return key
+
+    def link(self, alias, url):
+        """Declare ``alias`` as another name of the page of ``url``."""
+        key = self.key(url)
+        canonical = self.canonicalizer(alias)
+        if canonical != key:
+            self._aliases[canonical] = key
+            for other, other_key in list(self._aliases.items()):
+                if other_key == canonical:
+                    self._aliases[other] = key
+            # Move variants already indexed under the alias
+            variants = self._variants.pop(canonical, set())
+            self._variants.setdefault(key, set()).update(variants)
+        self._variants.setdefault(key, set()).add(alias)
+        return key
+
+    def variants(self, url):
+        return set(self._variants.get(self.key(url), ()))
+
+    def __contains__(self, url):
+        return self.key(url) in self._variants
+
+    def __len__(self):
+        return len(self._variants)
@@ -1,60 +1,102 @@
-import re
-from datetime import datetime, timedelta
+import os
 from io import BytesIO
 try:
     from urllib.request import urlopen
 except ImportError:
     from urllib2 import urlopen
-from PIL import Image
 
-UTC_OFFSET_REG = re.compile(r'.*([+-]\d\d).*')
+from web_rich_object import timestamps, profiling, failures
+from web_rich_object.cache import MemoryCache, SqliteCache
 
+try:
+    string_types = (basestring,)
+except NameError:
+    string_types = (str,)
+
+MIN_IMAGE_SIZE = 80
+IMAGE_CACHE_PATH = os.environ.get('WRO_IMAGE_CACHE_PATH')
+IMAGE_CACHE_SIZE = int(os.environ.get('WRO_IMAGE_CACHE_SIZE', 10000))
+IMAGE_CACHE_TTL = int(os.environ.get('WRO_IMAGE_CACHE_TTL', 7*24*3600))
+
+if IMAGE_CACHE_PATH:
+    IMAGE_CACHE = SqliteCache(IMAGE_CACHE_PATH, ttl=IMAGE_CACHE_TTL,
+                              table='image_size')
+else:
+    IMAGE_CACHE = MemoryCache(max_size=IMAGE_CACHE_SIZE, ttl=IMAGE_CACHE_TTL)
+
+
+def get_image_size(url, cache=None, guard=None):
+    """
+    Return ``{'width', 'height', 'content_type'}`` of an image URL or an
+    empty dict if it isn't an image, the result is cached by URL. Returns
+    ``None`` on network errors, which are only remembered by ``guard`` for
+    a short time, as are failing hosts.
+    """
+    cache = IMAGE_CACHE if cache is None else cache
+    guard = failures.DEFAULT_GUARD if guard is None else guard
+    size = cache.get(url)
+    if size is not None:
+        return size
+    try:
+        guard.check(url)
+    except failures.URLError:
+        return None
+    profiling.count_fetch()
+    try:
+        response = urlopen(url)
+        content = response.read()
+    except Exception as err:
+        guard.failure(url, err)
+        return None
+    guard.success(url)
+    # Heavy, imported on first image
+    from PIL import Image
+    try:
+        image = Image.open(BytesIO(content))
+        width, height = image.size
+        size = {
+            'width': width,
+            'height': height,
+            'content_type': response.info().get('Content-Type'),
+        }
+    except Exception:
+        size = {}
+    cache.set(url, size)
+    return size
 
-def get_biggest_image(urls):
+
+def pick_biggest_image(urls, sizes):
+    """
+    Tallest of ``urls`` at least ``MIN_IMAGE_SIZE`` wide and high, from
+    ``sizes`` mapping URLs to results of ``get_image_size``.
+    """
     biggest = (None, 0)
-    unknown = []
     for url in urls:
-        try:
-            image = Image.open(BytesIO(urlopen(url).read()))
-        except:
+        size = sizes.get(url)
+        if not size:
             continue
-        width, height = image.size
+        width, height = size['width'], size['height']
         # Skip too small
-        if height < 80 or width < 80:
+        if height < MIN_IMAGE_SIZE or width < MIN_IMAGE_SIZE:
             continue
         if height > biggest[1]:
             biggest = (url, height)
-    if biggest[0] is None and unknown:
-        biggest = unknown[0]
     return biggest[0]
 
 
+def get_biggest_image(urls, cache=None, guard=None):
+    sizes = dict((url, get_image_size(url, cache=cache, guard=guard))
+                 for url in urls)
+    return pick_biggest_image(urls, sizes)
+
+
 def parse_pdf_time(date_str):
-    try:
-        date = datetime.strptime(date_str[2:-7], '%Y%m%d%H%M%S')
-        offset = int(UTC_OFFSET_REG.sub(r'\1', date_str))
-        utc_offset = timedelta(seconds=offset*3600)
-        return date + utc_offset
-    except ValueError:
-        return None
+    return timestamps.parse_timestamp(date_str)
 
 
 def parse_opengraph_time(date_str):
-    try:
-        try:
-            date = datetime.strptime(date_str[:-6], '%Y-%m-%dT%H:%M:%S')
-        except ValueError:
-            date = datetime.strptime(date_str[:-6].strip(), '%d/%m/%Y %H:%M:%S')
-        offset = int(UTC_OFFSET_REG.sub(r'\1', date_str))
-        utc_offset = timedelta(seconds=offset*3600)
-        return date + utc_offset
-    except (ValueError, NameError):
-        return None
+    return timestamps.parse_timestamp(date_str)
 
 
 def parse_contextly_time(date_str):
-    try:
-        date = datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S')
-        return date
-    except ValueError:
-        return None
+    return timestamps.parse_timestamp(date_str)